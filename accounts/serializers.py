@@ -29,6 +29,11 @@ class UserSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'profile'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'is_verified']
+        # Profil `?profile=card`
+        card_fields = [
+            'id', 'username', 'first_name', 'last_name', 'user_type', 'user_type_display',
+            'profile_picture', 'dance_level', 'city'
+        ]
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -20,6 +20,10 @@ urlpatterns = [
     path('users/<int:user_id>/verify/', views.UserVerificationView.as_view(), name='user-verify'),
     path('users/update-type/', views.update_user_type_view, name='update-user-type'),
     
+    # Calendrier personnel (abonnement .ics)
+    path('calendar/', views.calendar_feed_url_view, name='calendar-feed-url'),
+    path('calendar.ics', views.calendar_feed_view, name='calendar-feed'),
+    
     # Mot de passe
     path('password/change/', views.PasswordChangeView.as_view(), name='password-change'),
 ]
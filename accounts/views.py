@@ -1,11 +1,20 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from django.contrib.auth import update_session_auth_hash
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from core.calendar import ICalendarRenderer, calendar_response, check_feed_token, make_feed_token, upcoming
+from core.fieldsets import SparseFieldsetMixin
+from courses.models import Course, CourseEnrollment
+from events.models import Event, EventEnrollment
+from festivals.models import Festival, FestivalEnrollment
 
 from .models import User, UserProfile
 from .serializers import (
@@ -96,7 +105,7 @@ class UserProfileUpdateView(generics.UpdateAPIView):
         return self.request.user.profile
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(SparseFieldsetMixin, generics.RetrieveAPIView):
     """
     Vue pour afficher le profil d'un autre utilisateur
     """
@@ -106,7 +115,7 @@ class UserDetailView(generics.RetrieveAPIView):
     lookup_field = 'username'
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(SparseFieldsetMixin, generics.ListAPIView):
     """
     Vue pour lister les utilisateurs (admin seulement)
     """
@@ -213,5 +222,42 @@ def update_user_type_view(request):
                        status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_feed_url_view(request):
+    """
+    Vue retournant l'URL d'abonnement au calendrier personnel (inscriptions)
+    """
+    url = reverse('accounts:calendar-feed') + '?' + urlencode({'token': make_feed_token(request.user)})
+    return Response({'url': request.build_absolute_uri(url)})
 
 
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+@renderer_classes([ICalendarRenderer, JSONRenderer])
+def calendar_feed_view(request):
+    """
+    Flux iCalendar des inscriptions actives (événements, cours, festivals),
+    authentifié par le jeton de l'URL d'abonnement
+    """
+    user = check_feed_token(request.query_params.get('token'))
+    if user is None:
+        return Response({'error': 'Lien de calendrier invalide'}, status=status.HTTP_403_FORBIDDEN)
+
+    sources = [
+        (Event.objects.filter(
+            enrollments__user=user, enrollments__status__in=EventEnrollment.seat_capacity.holding_statuses
+        ), Event.calendar_feed),
+        (Course.objects.filter(
+            enrollments__participant=user, enrollments__status__in=CourseEnrollment.seat_capacity.holding_statuses
+        ), Course.calendar_feed),
+        (Festival.objects.filter(
+            enrollments__participant=user, enrollments__status__in=FestivalEnrollment.seat_capacity.holding_statuses
+        ), Festival.calendar_feed),
+    ]
+    sources = [(upcoming(queryset), feed) for queryset, feed in sources]
+    # Les annulations d'inscription retirent des contenus du flux : versions des inscriptions
+    enrollments = (EventEnrollment._meta.label, CourseEnrollment._meta.label, FestivalEnrollment._meta.label)
+    return calendar_response(request, f"Mes inscriptions ({user.username})", sources, 'inscriptions.ics',
+                             models=enrollments)
@@ -14,7 +14,7 @@ class ArtistAdmin(admin.ModelAdmin):
     search_fields = [
         'artist_name', 'bio', 'base_location', 'specialties', 'awards'
     ]
-    readonly_fields = ['created_at', 'updated_at', 'awards_count']
+    readonly_fields = ['created_at', 'updated_at', 'awards_count', 'rating', 'reviews_count']
     list_editable = ['is_verified']
     
     fieldsets = (
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:31
+
+from django.db import migrations
+from django.db.models import Count, DecimalField, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+# Logique de core/ratings.py (rebuild_summaries, refresh_rated_columns) figée à la date de la migration
+RATING_SCALE = range(1, 6)
+SCOPE = "artists.artistreview"
+CRITERIA = ["overall_rating", "teaching_rating", "performance_rating", "professionalism_rating"]
+
+
+def rebuild_summaries(RatingSummary, Review):
+    """Recalcule les lignes d'agrégat de chaque critère à partir des avis"""
+    summaries = []
+    for criterion in CRITERIA:
+        rows = Review.objects.order_by().values("artist_id").annotate(
+            ratings_count=Count("pk"),
+            ratings_sum=Sum(criterion),
+            **{f"stars_{value}": Count("pk", filter=Q(**{criterion: value})) for value in RATING_SCALE},
+        )
+        for row in rows:
+            object_id = row.pop("artist_id")
+            summaries.append(RatingSummary(scope=SCOPE, object_id=object_id, criterion=criterion, **row))
+    RatingSummary.objects.filter(scope=SCOPE).delete()
+    RatingSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+def refresh_rated_columns(RatingSummary, parent_queryset):
+    """Recopie la moyenne et le nombre d'avis du critère principal dans les objets notés"""
+    summary = RatingSummary.objects.filter(scope=SCOPE, criterion=CRITERIA[0], object_id=OuterRef("pk"))
+    average = Cast(F("ratings_sum"), FloatField()) / NullIf(F("ratings_count"), 0)
+    parent_queryset.update(
+        rating=Coalesce(
+            Subquery(summary.values(rounded=Cast(average, DecimalField(max_digits=3, decimal_places=2)))[:1]),
+            Value(0), output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        reviews_count=Coalesce(Subquery(summary.values("ratings_count")[:1], output_field=IntegerField()), Value(0)),
+    )
+
+
+def aggregate_reviews(apps, schema_editor):
+    """Calcule les agrégats des avis existants et la note des profils"""
+    RatingSummary = apps.get_model("core", "RatingSummary")
+    ArtistProfile = apps.get_model("artists", "ArtistProfile")
+    ArtistReview = apps.get_model("artists", "ArtistReview")
+    rebuild_summaries(RatingSummary, ArtistReview)
+    refresh_rated_columns(RatingSummary, ArtistProfile.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("artists", "0001_initial"),
+        ("core", "0002_rating_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(aggregate_reviews, migrations.RunPython.noop),
+    ]
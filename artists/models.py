@@ -3,11 +3,16 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from core.counters import view_counter
+from core.models import AtomicCountersModel, RatedReviewModel
+from core.ratings import RatingAggregate
 
 User = get_user_model()
 
-class ArtistProfile(models.Model):
+class ArtistProfile(AtomicCountersModel):
     """Profil détaillé d'un artiste de bachata"""
+    # Agrégats des avis, tenus par ArtistReview.rating_aggregate (voir core/ratings.py)
+    atomic_fields = ('rating', 'reviews_count')
     user = models.OneToOneField(
         User,
         on_delete=models.CASCADE,
@@ -126,8 +131,7 @@ class ArtistProfile(models.Model):
         return self.artist_name or self.user.get_full_name()
     
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        view_counter.increment(self)
 
 class ArtistPortfolio(models.Model):
     """Portfolio d'un artiste avec ses réalisations"""
@@ -183,8 +187,13 @@ class ArtistPortfolio(models.Model):
     def __str__(self):
         return f"{self.artist} - {self.title}"
 
-class ArtistReview(models.Model):
+class ArtistReview(RatedReviewModel):
     """Avis d'un utilisateur sur un artiste"""
+    rating_aggregate = RatingAggregate(
+        'artist',
+        criteria=('overall_rating', 'teaching_rating', 'performance_rating', 'professionalism_rating'),
+        average_field='rating',
+    )
     artist = models.ForeignKey(
         ArtistProfile,
         on_delete=models.CASCADE,
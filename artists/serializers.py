@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import ArtistProfile
 from django.contrib.auth import get_user_model
+from core.counters import view_counter
+from core.serializers import BufferedCountField
 
 User = get_user_model()
 
@@ -13,6 +15,7 @@ class UserSerializer(serializers.ModelSerializer):
 class ArtistProfileSerializer(serializers.ModelSerializer):
     """Sérialiseur pour les profils d'artistes"""
     user = UserSerializer(read_only=True)
+    views_count = BufferedCountField(view_counter)
     
     class Meta:
         model = ArtistProfile
@@ -5,10 +5,12 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
-from .models import ArtistProfile
+from core.conditional import ConditionalMixin
+from core.fieldsets import SparseFieldsetMixin
+from .models import ArtistProfile, ArtistReview
 from .serializers import ArtistProfileSerializer
 
-class ArtistProfileViewSet(viewsets.ModelViewSet):
+class ArtistProfileViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les profils d'artistes
     """
@@ -20,6 +22,9 @@ class ArtistProfileViewSet(viewsets.ModelViewSet):
     search_fields = ['artist_name', 'bio', 'base_location', 'specialties']
     ordering_fields = ['rating', 'reviews_count', 'views_count', 'created_at']
     ordering = ['-rating', '-created_at']
+    conditional_models = ('artists.ArtistProfile', 'artists.ArtistReview', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'featured', 'search', 'by_location', 'by_style', 'ratings')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = ArtistProfile.objects.filter(is_verified=True)
@@ -72,6 +77,11 @@ class ArtistProfileViewSet(viewsets.ModelViewSet):
             models.Q(dance_styles__contains=[query])
         )
         
+        page = self.paginate_queryset(artists)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
         serializer = self.get_serializer(artists, many=True)
         return Response(serializer.data)
     
@@ -97,12 +107,17 @@ class ArtistProfileViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(artists, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def ratings(self, request, pk=None):
+        """Notes d'un artiste par critère (moyenne, nombre d'avis, histogramme)"""
+        artist = self.get_object()
+        return Response(ArtistReview.rating_aggregate.summaries(artist))
+    
     @action(detail=True, methods=['post'])
     def increment_views(self, request, pk=None):
         """Incrémente le compteur de vues d'un artiste"""
         artist = self.get_object()
-        artist.views_count += 1
-        artist.save()
+        artist.increment_views()
         return Response({'status': 'Vues incrémentées'})
 
 
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'django_filters',
     
     # Local apps
+    'core',
     'accounts',
     'courses',
     'festivals',
@@ -134,7 +135,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Pagination numérotée, ou par curseur avec ?pagination=cursor (voir core/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -157,6 +159,57 @@ SITE_ID = 1
 # Email settings (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Compteurs de vues à écriture différée (voir core/counters.py)
+BUFFERED_COUNTERS_ENABLED = True
+BUFFERED_COUNTERS_FLUSH_INTERVAL = 10  # secondes entre deux écritures groupées
+BUFFERED_COUNTERS_MAX_PENDING = 1000  # écriture immédiate au-delà de ce nombre d'objets en attente
+
+# Écritures différées des journaux, insérés par lots (voir core/buffers.py)
+BUFFERED_WRITES_ENABLED = True
+BUFFERED_WRITES_FLUSH_INTERVAL = 5  # secondes entre deux insertions groupées
+BUFFERED_WRITES_MAX_PENDING = 500  # insertion immédiate au-delà de ce nombre de lignes en attente
+
+# Logs bruts de recherche conservés après agrégation quotidienne (jours)
+FORMATION_SEARCH_LOG_RETENTION_DAYS = 30
+
+# Analyse des médias envoyés (dimensions, durée, empreinte, vignette) hors requête (voir core/media.py)
+MEDIA_PROCESSING_ASYNC = True  # False : analyse immédiate après l'enregistrement
+MEDIA_PROCESSING_WORKERS = 2  # fils de travail du pool d'analyse
+
+# Recherche « autour de moi » (?lat=..&lng=..&radius=.., voir core/geo.py)
+GEO_DEFAULT_RADIUS_KM = 25  # rayon appliqué si seul le point est fourni
+GEO_MAX_RADIUS_KM = 500
+
+# Flux iCalendar (.ics, voir core/calendar.py)
+CALENDAR_FEED_PAST_DAYS = 30  # contenus terminés depuis moins de N jours encore inclus
+CALENDAR_UID_DOMAIN = 'bachata-site'  # suffixe des identifiants UID des VEVENT
+
+# Statistiques globales pré-agrégées (voir core/rollups.py)
+STATS_ROLLUP_ASYNC = True  # False : recalcul immédiat après chaque modification validée
+STATS_ROLLUP_DELAY = 30  # secondes de regroupement des modifications avant recalcul
+STATS_ROLLUP_MAX_AGE = 300  # secondes au-delà desquelles un rollup est recalculé à la lecture
+STATS_ROLLUP_CACHE_TIMEOUT = 60  # durée de la copie en cache (le cache local n'est pas partagé entre processus)
+
+# Requêtes conditionnelles des vues en lecture (voir core/conditional.py)
+CONDITIONAL_VALIDATOR_LIFETIME = 300  # secondes au-delà desquelles les validateurs sont renouvelés (listes « à venir », écritures sans signal)
+
+# Promotion des listes d'attente des événements (voir events/waitlist.py)
+WAITLIST_PROMOTION_ASYNC = True  # False : promotion immédiate après la libération d'une place
+WAITLIST_PROMOTION_DELAY = 2  # secondes de regroupement des annulations avant promotion
+WAITLIST_NOTIFICATIONS_ASYNC = True  # False : courriels envoyés dans le fil de la promotion
+
+# Agenda unifié (voir core/agenda.py)
+AGENDA_PAGE_SIZE = 20
+AGENDA_MAX_PAGE_SIZE = 100
+
+# Page d'accueil agrégée (voir core/home.py)
+HOME_STALE_TIMEOUT = 3600  # secondes pendant lesquelles une section expirée reste servie pendant sa reconstruction
+HOME_REBUILD_LOCK_TIMEOUT = 30  # durée maximale d'une reconstruction (verrou single-flight)
+
+# Recherche à facettes (voir core/facets.py)
+FACET_PRICE_BUCKETS = (0, 20, 50, 100)  # bornes des tranches de prix (€) : 0-20, 20-50, 50-100, 100+
+FACET_CACHE_TIMEOUT = 300  # secondes de cache des comptes par jeu de filtres
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
@@ -44,6 +44,9 @@ urlpatterns = [
     # API des soins
     path('api/care/', include('care.urls')),
     
+    # Agenda unifié (tous les contenus datés) et page d'accueil agrégée
+    path('api/', include('core.urls')),
+    
     # Servir les vidéos du build React (ex: /videos/paris-drone.mp4)
     re_path(r'^videos/(?P<path>.*)$', serve_static, {
         'document_root': settings.BASE_DIR / 'frontend' / 'build' / 'videos'
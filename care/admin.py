@@ -23,7 +23,7 @@ class ServiceAdmin(admin.ModelAdmin):
             'fields': ('practitioner', 'practitioner_name', 'practitioner_email', 'practitioner_phone', 'qualifications')
         }),
         ('Localisation', {
-            'fields': ('location', 'address', 'city', 'postal_code', 'country')
+            'fields': ('location', 'address', 'city', 'postal_code', 'country', 'latitude', 'longitude')
         }),
         ('Prix et durée', {
             'fields': ('price', 'currency', 'duration', 'is_free')
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:34
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("care", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="geohash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=12,
+                verbose_name="Geohash",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="latitude",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-90),
+                    django.core.validators.MaxValueValidator(90),
+                ],
+                verbose_name="Latitude",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="longitude",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-180),
+                    django.core.validators.MaxValueValidator(180),
+                ],
+                verbose_name="Longitude",
+            ),
+        ),
+    ]
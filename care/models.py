@@ -3,10 +3,12 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from core.models import GeoLocatedModel, TagLinkModel
+from core.tags import TagIndex
 
 User = get_user_model()
 
-class Service(models.Model):
+class Service(GeoLocatedModel):
     """Modèle pour les services de soins et bien-être"""
     CATEGORY_CHOICES = [
         ('massage', 'Massage'),
@@ -125,3 +127,13 @@ class Service(models.Model):
                 return f"{hours}h{minutes}"
 
 
+class ServiceTag(TagLinkModel):
+    """Lien entre un service et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Service'))
+    tag_index = TagIndex('service', source_fields=('tags', 'benefits'))
+
+    class Meta:
+        verbose_name = _("Tag de service")
+        verbose_name_plural = _("Tags de services")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
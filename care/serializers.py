@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Service
 from django.contrib.auth import get_user_model
+from core.serializers import DistanceField
 
 User = get_user_model()
 
@@ -16,6 +17,7 @@ class ServiceSerializer(serializers.ModelSerializer):
     
     # Champs calculés
     duration_display = serializers.ReadOnlyField()
+    distance = DistanceField()
     
     class Meta:
         model = Service
@@ -23,7 +25,8 @@ class ServiceSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'description', 'short_description',
             'category', 'practitioner', 'practitioner_name', 'practitioner_email',
             'practitioner_phone', 'qualifications', 'location', 'address',
-            'city', 'postal_code', 'country', 'price', 'currency',
+            'city', 'postal_code', 'country', 'latitude', 'longitude', 'distance',
+            'price', 'currency',
             'duration', 'duration_display', 'is_free', 'is_available',
             'is_featured', 'schedule', 'booking_required', 'main_image',
             'gallery', 'video_url', 'benefits', 'contraindications',
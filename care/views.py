@@ -4,22 +4,28 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from .models import Service
+from core.conditional import ConditionalMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import NearbyFilterBackend, TagFilterBackend
+from .models import Service, ServiceTag
 from .serializers import ServiceSerializer
 from django.db import models
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les services de soins et bien-être
     """
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, NearbyFilterBackend, TagFilterBackend]
     filterset_fields = ['category', 'city', 'is_available', 'is_featured']
     search_fields = ['title', 'description', 'practitioner_name', 'city']
     ordering_fields = ['price', 'duration', 'created_at']
     ordering = ['-created_at']
+    conditional_models = ('care.Service', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'featured', 'search', 'by_category')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = Service.objects.filter(is_available=True)
@@ -69,8 +75,14 @@ class ServiceViewSet(viewsets.ModelViewSet):
             models.Q(description__icontains=query) |
             models.Q(practitioner_name__icontains=query) |
             models.Q(city__icontains=query) |
-            models.Q(benefits__contains=[query])
+            ServiceTag.tag_index.search_q(query)
         )
+        services = NearbyFilterBackend().filter_queryset(request, services, self)
+        
+        page = self.paginate_queryset(services)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(services, many=True)
         return Response(serializer.data)
@@ -12,7 +12,7 @@ class CompetitionAdmin(admin.ModelAdmin):
         'category', 'status', 'city', 'start_date', 'created_at'
     ]
     search_fields = ['title', 'description', 'location', 'city']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['current_participants', 'created_at', 'updated_at']
     date_hierarchy = 'start_date'
     
     fieldsets = (
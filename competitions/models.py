@@ -3,11 +3,16 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from core.capacity import SeatCapacity
+from core.models import AtomicCountersModel, SeatHoldingModel, TagLinkModel
+from core.tags import TagIndex
 
 User = get_user_model()
 
-class Competition(models.Model):
+class Competition(AtomicCountersModel):
     """Modèle pour les compétitions de bachata"""
+    # Compteur tenu par les réservations atomiques (voir core/capacity.py)
+    atomic_fields = ('current_participants',)
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('registration_open', 'Inscriptions ouvertes'),
@@ -175,8 +180,21 @@ class Competition(models.Model):
         now = timezone.now()
         return self.start_date <= now <= self.end_date
 
-class CompetitionEnrollment(models.Model):
+class CompetitionTag(TagLinkModel):
+    """Lien entre une compétition et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Compétition'))
+    tag_index = TagIndex('competition')
+
+    class Meta:
+        verbose_name = _("Tag de compétition")
+        verbose_name_plural = _("Tags de compétitions")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
+
+class CompetitionEnrollment(SeatHoldingModel):
     """Inscription à une compétition"""
+    seat_capacity = SeatCapacity('competition')
+    
     STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('confirmed', 'Confirmé'),
@@ -5,21 +5,27 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
-from .models import Competition
+from core.conditional import ConditionalMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import TagFilterBackend
+from .models import Competition, CompetitionTag
 from .serializers import CompetitionSerializer
 
-class CompetitionViewSet(viewsets.ModelViewSet):
+class CompetitionViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les compétitions de bachata
     """
     queryset = Competition.objects.all()
     serializer_class = CompetitionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, TagFilterBackend]
     filterset_fields = ['category', 'status', 'city', 'country']
     search_fields = ['title', 'description', 'location', 'city']
     ordering_fields = ['start_date', 'prize_pool', 'created_at']
     ordering = ['-start_date']
+    conditional_models = ('competitions.Competition', 'competitions.CompetitionEnrollment', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'upcoming', 'featured', 'search', 'by_category')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = Competition.objects.all()
@@ -85,7 +91,7 @@ class CompetitionViewSet(viewsets.ModelViewSet):
             models.Q(description__icontains=query) |
             models.Q(location__icontains=query) |
             models.Q(city__icontains=query) |
-            models.Q(tags__contains=[query])
+            CompetitionTag.tag_index.search_q(query)
         )
         
         serializer = self.get_serializer(competitions, many=True)
@@ -0,0 +1,128 @@
+"""
+Agenda unifié : événements, cours, festivals, compétitions et trainings
+publics dans un seul ordre chronologique.
+
+Chaque source est parcourue dans l'ordre (start_date, id) par pages de la
+taille demandée, à partir d'une condition de curseur (keyset) indexée par
+(status, start_date). Les sources sont fusionnées paresseusement
+(`heapq.merge`) : une page ne lit qu'environ `page_size` lignes par source,
+quelle que soit la profondeur dans l'agenda.
+
+Le curseur encode la dernière position servie (date de début, type, id) ;
+l'ordre global est (start_date, rang du type, id), total et stable.
+"""
+import base64
+import binascii
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from django.apps import apps
+from django.db.models import Q
+
+from .serializers import CONTENT_CARD_FIELDS
+
+AGENDA_FIELDS = CONTENT_CARD_FIELDS + ('end_date', 'location')
+
+
+class InvalidCursor(ValueError):
+    """Curseur d'agenda illisible"""
+
+
+class AgendaSource:
+    """Type de contenu de l'agenda : modèle et statuts publics"""
+
+    def __init__(self, kind, model_label, statuses):
+        self.kind = kind
+        self.model_label = model_label
+        self.statuses = tuple(statuses)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def get_queryset(self, date_from=None, date_to=None, city=None):
+        queryset = self.model._default_manager.filter(status__in=self.statuses)
+        if date_from is not None:
+            queryset = queryset.filter(start_date__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(start_date__lt=date_to)
+        if city:
+            queryset = queryset.filter(city__icontains=city)
+        return queryset.only(*AGENDA_FIELDS).order_by('start_date', 'pk')
+
+
+# Ordre des types à date de début égale
+AGENDA_SOURCES = (
+    AgendaSource('event', 'events.Event', ('published',)),
+    AgendaSource('course', 'courses.Course', ('approved',)),
+    AgendaSource('festival', 'festivals.Festival', ('approved', 'ongoing')),
+    AgendaSource('competition', 'competitions.Competition', ('registration_open', 'registration_closed', 'ongoing')),
+    AgendaSource('training', 'trainings.Training', ('approved', 'ongoing')),
+)
+AGENDA_KINDS = tuple(source.kind for source in AGENDA_SOURCES)
+
+
+def encode_cursor(position):
+    """Curseur opaque d'une position (start_date, type, id)"""
+    start_date, kind, pk = position
+    raw = f'{start_date.isoformat()}|{kind}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Position (start_date, type, id) d'un curseur ; lève InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        start_date, kind, pk = raw.split('|')
+        position = (datetime.fromisoformat(start_date), kind, int(pk))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if kind not in AGENDA_KINDS or position[0].tzinfo is None:
+        raise InvalidCursor(cursor)
+    return position
+
+
+def after_position(source, position):
+    """Condition keyset des lignes d'une source situées après `position` dans l'ordre global"""
+    start_date, kind, pk = position
+    rank, cursor_rank = AGENDA_KINDS.index(source.kind), AGENDA_KINDS.index(kind)
+    if rank < cursor_rank:
+        return Q(start_date__gt=start_date)
+    if rank > cursor_rank:
+        return Q(start_date__gte=start_date)
+    return Q(start_date__gt=start_date) | Q(start_date=start_date, pk__gt=pk)
+
+
+def iterate_source(source, queryset, position, batch_size):
+    """Parcourt une source dans l'ordre global, par lots lus à la demande"""
+    while True:
+        batch = queryset.filter(after_position(source, position)) if position else queryset
+        batch = list(batch[:batch_size])
+        for obj in batch:
+            obj.agenda_kind = source.kind
+            yield obj
+        if len(batch) < batch_size:
+            return
+        last = batch[-1]
+        position = (last.start_date, source.kind, last.pk)
+
+
+def agenda_page(page_size, cursor=None, kinds=None, date_from=None, date_to=None, city=None):
+    """
+    Retourne (objets, curseur suivant ou None) d'une page de l'agenda ; les
+    objets portent leur type dans `agenda_kind`.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    sources = [source for source in AGENDA_SOURCES if not kinds or source.kind in kinds]
+    streams = [
+        iterate_source(source, source.get_queryset(date_from, date_to, city), position, page_size + 1)
+        for source in sources
+    ]
+    merged = heapq.merge(*streams, key=lambda obj: (obj.start_date, AGENDA_KINDS.index(obj.agenda_kind), obj.pk))
+    objects = list(islice(merged, page_size + 1))
+    if len(objects) <= page_size:
+        return objects, None
+    objects = objects[:page_size]
+    last = objects[-1]
+    return objects, encode_cursor((last.start_date, last.agenda_kind, last.pk))
@@ -0,0 +1,45 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+    verbose_name = "Socle commun"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete
+
+        from .capacity import seat_capacities
+        from .conditional import connect_signals
+        from .ratings import rating_aggregates
+        from .tags import tag_indexes
+
+        # Versions des modèles (validateurs des requêtes conditionnelles)
+        connect_signals()
+
+        # Libération des places à la suppression des inscriptions (y compris en cascade)
+        for capacity in seat_capacities.values():
+            post_delete.connect(release_deleted_seat, sender=capacity.model,
+                                dispatch_uid=f'release_seat_{capacity.model._meta.label_lower}')
+
+        # Retrait des notes à la suppression des avis, et des agrégats à celle des objets notés
+        for aggregate in rating_aggregates.values():
+            post_delete.connect(discount_deleted_review, sender=aggregate.model,
+                                dispatch_uid=f'discount_review_{aggregate.scope}')
+            post_delete.connect(aggregate.forget_deleted, sender=aggregate.parent_model, weak=False,
+                                dispatch_uid=f'forget_ratings_{aggregate.scope}')
+
+        # Index des tags : liens mis à jour à l'enregistrement des contenus, comptes à leur suppression
+        for index in tag_indexes.values():
+            post_save.connect(index.after_save, sender=index.content_model, weak=False,
+                              dispatch_uid=f'tag_index_save_{index.scope}')
+            pre_delete.connect(index.before_delete, sender=index.content_model, weak=False,
+                               dispatch_uid=f'tag_index_delete_{index.scope}')
+
+
+def release_deleted_seat(sender, instance, **kwargs):
+    instance.release_seat()
+
+
+def discount_deleted_review(sender, instance, **kwargs):
+    instance.discount_ratings()
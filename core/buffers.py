@@ -0,0 +1,118 @@
+"""
+Écritures différées (write-behind) pour les lignes de journalisation.
+
+Les instances à créer sont mises en file dans le processus puis insérées
+périodiquement par `bulk_create`, hors du fil de la requête.
+"""
+import atexit
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """File d'instances d'un modèle, insérées par lots"""
+
+    def __init__(self, model_label, flush_interval=None, max_pending=None, batch_size=500):
+        self.model_label = model_label
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'BUFFERED_WRITES_ENABLED', True)
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'BUFFERED_WRITES_FLUSH_INTERVAL', 5)
+
+    def get_max_pending(self):
+        if self.max_pending is not None:
+            return self.max_pending
+        return getattr(settings, 'BUFFERED_WRITES_MAX_PENDING', 500)
+
+    def add(self, instance):
+        """Met une instance non enregistrée en file d'insertion"""
+        if not self.enabled:
+            instance.save()
+            return
+
+        with self._lock:
+            self._pending.append(instance)
+            should_flush = len(self._pending) >= self.get_max_pending()
+            if not should_flush:
+                self._schedule_flush()
+
+        if should_flush:
+            # Le seuil est atteint : l'insertion part dans un fil dédié
+            threading.Thread(target=self.flush_safely, daemon=True).start()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Insère toutes les instances en attente ; retourne le nombre de lignes créées"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not pending:
+                return 0
+
+            created = 0
+            try:
+                while pending:
+                    batch = pending[:self.batch_size]
+                    self.model._default_manager.bulk_create(batch)
+                    created += len(batch)
+                    del pending[:self.batch_size]
+            except Exception:
+                # Remet en file les lots non écrits, dans la limite d'un lot maximal
+                with self._lock:
+                    overflow = len(pending) + len(self._pending) - 10 * self.get_max_pending()
+                    if overflow > 0:
+                        logger.warning("%s : %d ligne(s) abandonnée(s)", self.model_label, overflow)
+                        pending = pending[overflow:]
+                    self._pending[:0] = pending
+                raise
+            return created
+
+    def flush_safely(self):
+        """Insère les instances en attente hors requête (minuterie, arrêt du processus)"""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Échec de l'écriture différée de %s", self.model_label)
+        finally:
+            connection.close()
+
+    def _schedule_flush(self):
+        """Programme une écriture différée si aucune n'est en attente (appelé sous verrou)"""
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.get_flush_interval(), self.flush_safely)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def register_exit_flush(self):
+        """Écrit la file à l'arrêt du processus"""
+        atexit.register(self.flush_safely)
+        return self
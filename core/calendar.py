@@ -0,0 +1,220 @@
+"""
+Flux iCalendar (.ics) des événements, cours et festivals.
+
+Les flux sont produits au fil de l'eau (`StreamingHttpResponse` sur
+`.iterator()`), sans construire la réponse en mémoire. Ils portent un ETag,
+calculé par une requête agrégée par source (nombre d'objets, somme des
+identifiants, `max(updated_at)`) et les versions des modèles dont ils
+dépendent (voir core/conditional.py), et un Last-Modified, date de version la
+plus récente de ces modèles : contrairement à `max(updated_at)`, elle avance
+aussi quand un contenu est supprimé ou une inscription annulée. Un client qui
+interroge le flux toutes les quelques minutes reçoit un 304 sans que rien ne
+soit sérialisé.
+
+Les flux personnels (« mes inscriptions ») sont authentifiés par un jeton
+signé passé dans l'URL, les applications de calendrier n'envoyant pas
+d'en-tête d'authentification.
+"""
+import hashlib
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import Count, Max, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import BaseRenderer
+
+from .conditional import get_versions
+
+ICAL_LINE_LIMIT = 75
+STREAM_BATCH_SIZE = 200
+
+
+def escape_text(value):
+    """Échappe une valeur texte (RFC 5545, 3.3.11)"""
+    return (str(value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n'))
+
+
+def fold_line(line):
+    """Replie une ligne en segments de 75 octets au plus, sans couper un caractère UTF-8"""
+    if len(line.encode('utf-8')) <= ICAL_LINE_LIMIT:
+        return line + '\r\n'
+    segments, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        # Les lignes de continuation commencent par une espace
+        if size + width > ICAL_LINE_LIMIT - (1 if segments else 0):
+            segments.append(''.join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    segments.append(''.join(current))
+    return '\r\n '.join(segments) + '\r\n'
+
+
+def format_datetime(value):
+    """Date-heure UTC au format iCalendar"""
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+class CalendarFeed:
+    """
+    Conversion d'un type de contenu en VEVENT. Se déclare sur le modèle
+    (`calendar_feed = CalendarFeed('event')`).
+    """
+
+    def __init__(self, kind, description_field='short_description', location_fields=('location', 'address', 'city')):
+        self.kind = kind
+        self.description_field = description_field
+        self.location_fields = tuple(location_fields)
+
+    @property
+    def fields(self):
+        """Colonnes lues pour un VEVENT"""
+        return ('id', 'title', 'start_date', 'end_date', 'updated_at', 'latitude', 'longitude',
+                self.description_field, *self.location_fields)
+
+    def uid(self, obj):
+        domain = getattr(settings, 'CALENDAR_UID_DOMAIN', 'bachata-site')
+        return f'{self.kind}-{obj.pk}@{domain}'
+
+    def lines(self, obj, stamp):
+        """Lignes (non repliées) du VEVENT d'un objet"""
+        location = ', '.join(str(value) for value in (getattr(obj, name) for name in self.location_fields) if value)
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{self.uid(obj)}',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{format_datetime(obj.start_date)}',
+            f'DTEND:{format_datetime(obj.end_date)}',
+            f'LAST-MODIFIED:{format_datetime(obj.updated_at)}',
+            f'SUMMARY:{escape_text(obj.title)}',
+        ]
+        description = getattr(obj, self.description_field)
+        if description:
+            lines.append(f'DESCRIPTION:{escape_text(description)}')
+        if location:
+            lines.append(f'LOCATION:{escape_text(location)}')
+        if obj.latitude is not None and obj.longitude is not None:
+            lines.append(f'GEO:{obj.latitude:.6f};{obj.longitude:.6f}')
+        lines.append('END:VEVENT')
+        return lines
+
+
+def upcoming(queryset):
+    """Restreint un queryset de contenus aux dates utiles d'un calendrier (récentes et à venir)"""
+    past_days = getattr(settings, 'CALENDAR_FEED_PAST_DAYS', 30)
+    return queryset.filter(end_date__gte=timezone.now() - timedelta(days=past_days))
+
+
+def feed_validators(querysets, models=()):
+    """
+    Retourne (ETag, dernière modification) d'un ensemble de querysets (une
+    requête agrégée chacun, plus une sur les versions) ; `models` ajoute les
+    modèles dont dépend la sélection (inscriptions d'un flux personnel).
+    """
+    labels = sorted({queryset.model._meta.label for queryset in querysets} | set(models))
+    versions = get_versions(labels)
+    digest = hashlib.md5()
+    for queryset in querysets:
+        stats = queryset.order_by().aggregate(last=Max('updated_at'), count=Count('pk'), checksum=Sum('pk'))
+        digest.update(f"{queryset.model._meta.label}:{stats['count']}:{stats['checksum']}:{stats['last']};".encode())
+    for label in labels:
+        version, _ = versions.get(label, (0, None))
+        digest.update(f'{label}@{version};'.encode())
+    changes = [changed_at for _, changed_at in versions.values()]
+    return digest.hexdigest(), max(changes) if changes else None
+
+
+def stream_calendar(name, sources):
+    """Génère le calendrier par blocs, en parcourant chaque source avec `.iterator()`"""
+    stamp = format_datetime(timezone.now())
+    yield ''.join(fold_line(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Bachata//Calendrier//FR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ))
+    for queryset, feed in sources:
+        queryset = queryset.select_related(None).prefetch_related(None).only(*feed.fields)
+        chunk = []
+        for index, obj in enumerate(queryset.iterator(chunk_size=STREAM_BATCH_SIZE), 1):
+            chunk.extend(fold_line(line) for line in feed.lines(obj, stamp))
+            if index % STREAM_BATCH_SIZE == 0:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+    yield fold_line('END:VCALENDAR')
+
+
+def calendar_response(request, name, sources, filename, models=()):
+    """
+    Réponse .ics d'un ensemble de sources [(queryset, CalendarFeed)] : 304 si
+    le client a déjà la version courante, flux continu sinon. `models` : voir
+    feed_validators.
+    """
+    querysets = [queryset for queryset, _ in sources]
+    digest, last_modified = feed_validators(querysets, models)
+    etag = quote_etag(hashlib.md5(f'{request.get_full_path()}:{digest}'.encode()).hexdigest())
+    last_modified_timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_timestamp)
+    if not_modified is not None:
+        return not_modified
+
+    response = StreamingHttpResponse(stream_calendar(name, sources), content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    if last_modified_timestamp is not None:
+        response['Last-Modified'] = http_date(last_modified_timestamp)
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    return response
+
+
+class ICalendarRenderer(BaseRenderer):
+    """
+    Rend les vues .ics négociables (`Accept: text/calendar`, suffixe `.ics`).
+    Le calendrier lui-même est une réponse Django déjà construite : seules les
+    erreurs passent par ce rendu.
+    """
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+def _feed_signer(user):
+    # Le hash du mot de passe entre dans le sel : changer de mot de passe révoque les anciens liens
+    return signing.Signer(salt=f'core.calendar.feed:{user.password}')
+
+
+def make_feed_token(user):
+    """Jeton du flux personnel d'un utilisateur"""
+    return _feed_signer(user).sign(str(user.pk))
+
+
+def check_feed_token(token):
+    """Retourne l'utilisateur d'un jeton de flux valide, ou None"""
+    user_id, _, _ = (token or '').partition(':')
+    if not user_id.isdigit():
+        return None
+    user = get_user_model()._default_manager.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return None
+    try:
+        _feed_signer(user).unsign(token)
+    except signing.BadSignature:
+        return None
+    return user
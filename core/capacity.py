@@ -0,0 +1,138 @@
+"""
+Gestion atomique des places (cours, festivals, compétitions, trainings,
+événements).
+
+Chaque modèle parent porte un compteur de places occupées et un plafond ; une
+inscription occupe une place tant que son statut fait partie des statuts
+« occupants ». La réservation est un UPDATE conditionnel
+(`compteur < plafond`) exécuté par la base : deux inscriptions simultanées
+ne peuvent pas dépasser la capacité, quel que soit le nombre de requêtes
+concurrentes. La libération décrémente le compteur de la même façon.
+
+Les transitions sont appliquées par `SeatHoldingModel` (core/models.py) à
+chaque enregistrement ou suppression d'inscription, y compris depuis
+l'administration ; la commande `reconcile_capacity` corrige les écarts.
+Chaque libération émet le signal `seats_released` (promotion des listes
+d'attente).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+HOLDING_STATUSES = ('pending', 'confirmed', 'completed')
+
+# Capacités déclarées, par modèle d'inscription (pour la réconciliation)
+seat_capacities = {}
+
+# Places libérées chez un parent (sender : modèle d'inscription ; arguments parent_id, seats)
+seats_released = Signal()
+
+
+class CapacityError(Exception):
+    """Plus aucune place disponible"""
+
+
+class SeatCapacity:
+    """
+    Places d'un modèle parent occupées par les inscriptions d'un modèle.
+
+    S'attache au modèle d'inscription comme attribut de classe
+    (`seat_capacity = SeatCapacity('course')`).
+    """
+
+    def __init__(self, parent_field, user_field='participant', holding_statuses=HOLDING_STATUSES,
+                 count_field='current_participants', capacity_field='max_participants'):
+        self.parent_field = parent_field
+        self.user_field = user_field
+        self.holding_statuses = tuple(holding_statuses)
+        self.count_field = count_field
+        self.capacity_field = capacity_field
+        self.model = None
+
+    def contribute_to_class(self, cls, name):
+        self.model = cls
+        setattr(cls, name, self)
+        if not cls._meta.abstract:
+            seat_capacities[cls._meta.label] = self
+
+    @property
+    def parent_model(self):
+        return self.model._meta.get_field(self.parent_field).related_model
+
+    @property
+    def parent_attname(self):
+        return self.model._meta.get_field(self.parent_field).attname
+
+    def holds_seat(self, status):
+        return status in self.holding_statuses
+
+    def reserve(self, parent_id, seats=1):
+        """Occupe `seats` places si elles sont disponibles ; retourne False sinon"""
+        return bool(self.parent_model._default_manager.filter(
+            pk=parent_id, **{f'{self.count_field}__lte': F(self.capacity_field) - seats}
+        ).update(**{self.count_field: F(self.count_field) + seats}))
+
+    def release(self, parent_id, seats=1):
+        """Libère `seats` places (sans descendre sous zéro)"""
+        released = self.parent_model._default_manager.filter(
+            pk=parent_id, **{f'{self.count_field}__gte': seats}
+        ).update(**{self.count_field: F(self.count_field) - seats})
+        if released:
+            seats_released.send(sender=self.model, parent_id=parent_id, seats=seats)
+
+    def enroll(self, parent, user, **values):
+        """
+        Inscrit `user` (idempotent) ; retourne (inscription, créée). Une
+        inscription active existante est retournée telle quelle, une
+        inscription annulée est réactivée. Lève CapacityError si c'est complet.
+        """
+        lookup = {self.parent_field: parent, self.user_field: user}
+        manager = self.model._default_manager
+        enrollment = manager.filter(**lookup).first()
+        if enrollment is None:
+            try:
+                with transaction.atomic():
+                    return manager.create(**lookup, **values), True
+            except IntegrityError:
+                # Requête concurrente (ou rejouée) du même utilisateur
+                enrollment = manager.filter(**lookup).first()
+                if enrollment is None:
+                    raise
+        if enrollment.holds_seat():
+            return enrollment, False
+        for field, value in values.items():
+            setattr(enrollment, field, value)
+        if not enrollment.holds_seat():
+            enrollment.status = self.holding_statuses[0]
+        enrollment.save()
+        return enrollment, True
+
+    def cancel(self, enrollment, status='cancelled'):
+        """Annule une inscription (idempotent : la place n'est libérée qu'une fois)"""
+        if enrollment.status != status:
+            enrollment.status = status
+            enrollment.save()
+        return enrollment
+
+    def held_count_subquery(self):
+        """Sous-requête du nombre d'inscriptions occupant une place, par parent"""
+        return Subquery(
+            self.model._default_manager.filter(
+                **{self.parent_field: OuterRef('pk'), 'status__in': self.holding_statuses}
+            ).order_by().values(self.parent_attname).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        )
+
+    def reconcile(self):
+        """Recalcule les compteurs qui ont dérivé ; retourne les identifiants des parents corrigés"""
+        manager = self.parent_model._default_manager
+        drifted = list(manager.annotate(
+            held=Coalesce(self.held_count_subquery(), Value(0))
+        ).exclude(**{self.count_field: F('held')}).values_list('pk', flat=True))
+        if drifted:
+            # Le compte est refait dans l'UPDATE lui-même (sûr en cas d'inscriptions concurrentes)
+            manager.filter(pk__in=drifted).update(
+                **{self.count_field: Coalesce(self.held_count_subquery(), Value(0))}
+            )
+        return drifted
@@ -0,0 +1,175 @@
+"""
+Requêtes conditionnelles (ETag, Last-Modified, 304) des vues en lecture.
+
+Chaque modèle des applications du projet a une version (`ModelVersion`),
+incrémentée après la validation de toute transaction qui enregistre ou
+supprime un de ses objets. Les validateurs d'une réponse sont calculés avant
+toute sérialisation, par une seule requête sur les versions des modèles dont
+elle dépend (`conditional_models`) : l'ETag combine ces versions, l'URL,
+l'utilisateur et le format de la réponse ; Last-Modified est la date de la
+dernière modification. Un client qui présente l'ETag (`If-None-Match`) ou la
+date (`If-Modified-Since`) courants reçoit un 304 sans qu'aucune requête
+métier ne soit exécutée.
+
+Les changements sans signal (UPDATE groupés des actions d'administration,
+compteurs de vues différés) et les listes qui dépendent de l'heure courante
+(« à venir ») sont couverts par le renouvellement des validateurs toutes les
+`CONDITIONAL_VALIDATOR_LIFETIME` secondes.
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import ModelVersion
+
+# Applications dont les modèles ne sont pas versionnés (infrastructure)
+UNVERSIONED_APPS = ('core',)
+# Enregistrements partiels qui ne changent aucune réponse
+UNVERSIONED_UPDATE_FIELDS = frozenset({'last_login'})
+
+
+def is_versioned(model):
+    """Indique si les écritures d'un modèle incrémentent sa version"""
+    if model._meta.apps is not apps:
+        # Modèles historiques des migrations
+        return False
+    return (model._meta.app_label not in UNVERSIONED_APPS
+            and not model._meta.app_config.name.startswith(('django.', 'rest_framework')))
+
+
+def bump_versions(*labels):
+    """Incrémente la version de modèles ("app_label.Model")"""
+    now = timezone.now()
+    for label in labels:
+        if ModelVersion.objects.filter(label=label).update(version=F('version') + 1, changed_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                ModelVersion.objects.create(label=label, version=1, changed_at=now)
+        except IntegrityError:
+            # Ligne créée entre-temps par un autre processus
+            ModelVersion.objects.filter(label=label).update(version=F('version') + 1, changed_at=now)
+
+
+def versions_changed(*labels):
+    """Programme l'incrément de versions après la validation de la transaction courante"""
+    transaction.on_commit(lambda: bump_versions(*labels))
+
+
+def get_versions(labels):
+    """Retourne {label: (version, date de modification)} des modèles (une requête)"""
+    rows = ModelVersion.objects.filter(label__in=labels).values_list('label', 'version', 'changed_at')
+    return {label: (version, changed_at) for label, version, changed_at in rows}
+
+
+def version_after_save(sender, raw=False, update_fields=None, **kwargs):
+    if raw or not is_versioned(sender):
+        return
+    if update_fields is not None and set(update_fields) <= UNVERSIONED_UPDATE_FIELDS:
+        return
+    versions_changed(sender._meta.label)
+
+
+def version_after_delete(sender, **kwargs):
+    if is_versioned(sender):
+        versions_changed(sender._meta.label)
+
+
+def version_after_m2m_change(sender, instance, action, model, **kwargs):
+    if not action.startswith('post_'):
+        return
+    labels = [related._meta.label for related in (type(instance), model) if is_versioned(related)]
+    if labels:
+        versions_changed(*labels)
+
+
+def connect_signals():
+    """Branche l'incrément des versions sur les écritures de tous les modèles"""
+    post_save.connect(version_after_save, dispatch_uid='model_version_save')
+    post_delete.connect(version_after_delete, dispatch_uid='model_version_delete')
+    m2m_changed.connect(version_after_m2m_change, dispatch_uid='model_version_m2m')
+
+
+class NotModified(Exception):
+    """Réponse 304 à renvoyer à la place de l'action"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalMixin:
+    """
+    ViewSets dont les actions en lecture `conditional_actions` portent des
+    validateurs et répondent 304 aux requêtes conditionnelles. Les réponses
+    dépendent des modèles `conditional_models` ("app_label.Model") ;
+    `cache_control` donne les directives Cache-Control par action
+    (`default_cache_control` sinon : le client revalide à chaque usage).
+    """
+    conditional_models = ()
+    conditional_actions = ('list', 'retrieve')
+    cache_control = {}
+    default_cache_control = {'no_cache': True}
+
+    def is_conditional(self, request):
+        return (request.method in ('GET', 'HEAD') and bool(self.conditional_models)
+                and getattr(self, 'action', None) in self.conditional_actions)
+
+    def get_validators(self, request):
+        """Retourne (ETag, Last-Modified en secondes) de la réponse, sans la calculer"""
+        versions = get_versions(self.conditional_models)
+        lifetime = getattr(settings, 'CONDITIONAL_VALIDATOR_LIFETIME', 300)
+        now = int(timezone.now().timestamp())
+        period = now - now % lifetime
+        parts = [
+            request.get_full_path(),
+            str(request.user.pk or '') if request.user.is_authenticated else '',
+            request.accepted_renderer.format,
+            str(period),
+        ] + [f'{label}:{versions.get(label, (0, None))[0]}' for label in self.conditional_models]
+        etag = 'W/"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+        changes = [changed_at for _, changed_at in versions.values()]
+        changes.append(datetime.fromtimestamp(period, tz=dt_timezone.utc))
+        return etag, int(max(changes).timestamp())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        if not self.is_conditional(request):
+            return
+        self.conditional_validators = self.get_validators(request)
+        etag, last_modified = self.conditional_validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'conditional_validators', None) and response.status_code in (200, 304):
+            self.patch_validators(request, response)
+        return response
+
+    def patch_validators(self, request, response):
+        """Ajoute les validateurs et les directives de cache de l'action à une réponse"""
+        etag, last_modified = self.conditional_validators
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, **self.cache_control.get(self.action, self.default_cache_control))
+        if request.user.is_authenticated:
+            # Réponse propre à l'utilisateur : jamais dans un cache partagé
+            patch_cache_control(response, private=True)
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
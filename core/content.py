@@ -0,0 +1,93 @@
+"""
+Dérivation des contenus HTML : texte brut, extrait, nombre de mots, temps de
+lecture et table des matières, calculés une fois à l'enregistrement.
+"""
+import math
+import re
+
+from django.utils.text import slugify
+
+from .text import WORD_RE, strip_html
+
+HEADING_RE = re.compile(r'<h([1-6])\b([^>]*)>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+ID_ATTR_RE = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Tronque un texte brut à `length` caractères, sans couper de mot"""
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip(' ,;:.') + '...'
+
+
+def extract_table_of_contents(html):
+    """
+    Retourne les titres (h1 à h6) du contenu : niveau, texte et ancre.
+    L'ancre reprend l'attribut id du titre s'il existe, sinon le slug du texte
+    (suffixé en cas de doublon).
+    """
+    toc = []
+    used_anchors = set()
+    for match in HEADING_RE.finditer(html or ''):
+        level, attributes, inner = match.groups()
+        title = strip_html(inner)
+        if not title:
+            continue
+        id_match = ID_ATTR_RE.search(attributes)
+        anchor = id_match.group(1) if id_match else slugify(title) or 'section'
+        base, suffix = anchor, 2
+        while anchor in used_anchors:
+            anchor = f'{base}-{suffix}'
+            suffix += 1
+        used_anchors.add(anchor)
+        toc.append({'level': int(level), 'title': title, 'anchor': anchor})
+    return toc
+
+
+def derive_content(html, excerpt_length=EXCERPT_LENGTH, words_per_minute=WORDS_PER_MINUTE):
+    """Calcule les données dérivées d'un contenu HTML"""
+    plain_text = strip_html(html)
+    word_count = len(WORD_RE.findall(plain_text))
+    return {
+        'plain_text': plain_text,
+        'generated_excerpt': make_excerpt(plain_text, excerpt_length),
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / words_per_minute)),
+        'table_of_contents': extract_table_of_contents(html),
+    }
+
+
+def backfill_derived_content(queryset, content_field='content', reading_time_field='reading_time', batch_size=500):
+    """
+    Recalcule par lots les données dérivées des lignes d'un queryset et
+    retourne le nombre de lignes mises à jour (utilisable en migration).
+    """
+    fields = ['plain_text', 'generated_excerpt', 'word_count', 'table_of_contents']
+    if reading_time_field:
+        fields.append(reading_time_field)
+    model = queryset.model
+    updated = 0
+    batch = []
+    for instance in queryset.only('pk', content_field).order_by('pk').iterator(chunk_size=batch_size):
+        derived = derive_content(getattr(instance, content_field))
+        reading_time = derived.pop('reading_time')
+        for field, value in derived.items():
+            setattr(instance, field, value)
+        if reading_time_field:
+            setattr(instance, reading_time_field, reading_time)
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, fields)
+            updated += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    return updated
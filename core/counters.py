@@ -0,0 +1,143 @@
+"""
+Compteurs différés (write-behind) pour les champs de statistiques.
+
+Les incréments sont accumulés en mémoire dans le processus puis écrits
+périodiquement en base par lots de `UPDATE ... SET champ = champ + n`,
+au lieu d'une transaction d'écriture par consultation.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedCounter:
+    """Tampon d'incréments pour un champ compteur, partagé par tous les modèles"""
+
+    def __init__(self, field_name, flush_interval=None, max_pending=None):
+        self.field_name = field_name
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'BUFFERED_COUNTERS_ENABLED', True)
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'BUFFERED_COUNTERS_FLUSH_INTERVAL', 10)
+
+    def get_max_pending(self):
+        if self.max_pending is not None:
+            return self.max_pending
+        return getattr(settings, 'BUFFERED_COUNTERS_MAX_PENDING', 1000)
+
+    def increment(self, instance, amount=1):
+        """
+        Enregistre un incrément. Le champ de l'instance garde la valeur lue en
+        base : les lectures y ajoutent les incréments en attente (voir
+        current_value et pending_many).
+        """
+        if not self.enabled:
+            type(instance)._default_manager.filter(pk=instance.pk).update(
+                **{self.field_name: F(self.field_name) + amount}
+            )
+            setattr(instance, self.field_name, getattr(instance, self.field_name) + amount)
+            return
+        
+        key = (instance._meta.label, instance.pk)
+        with self._lock:
+            self._pending[key] += amount
+            should_flush = len(self._pending) >= self.get_max_pending()
+            if not should_flush:
+                self._schedule_flush()
+        
+        if should_flush:
+            # Le seuil est atteint : l'écriture part dans un fil dédié
+            threading.Thread(target=self.flush_safely, daemon=True).start()
+
+    def pending(self, instance):
+        """Retourne le delta non encore écrit pour un objet"""
+        with self._lock:
+            return self._pending.get((instance._meta.label, instance.pk), 0)
+
+    def pending_many(self, model, pks):
+        """Retourne les deltas non écrits d'un ensemble d'objets d'un même modèle"""
+        label = model._meta.label
+        with self._lock:
+            return {pk: self._pending[(label, pk)] for pk in pks if (label, pk) in self._pending}
+
+    def current_value(self, instance):
+        """Retourne la valeur du compteur en incluant les incréments non écrits"""
+        return getattr(instance, self.field_name) + self.pending(instance)
+
+    def flush(self):
+        """Écrit tous les incréments en attente ; retourne le nombre de lignes mises à jour"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(int)
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not pending:
+                return 0
+            
+            # Regroupe par modèle puis par valeur de delta : un UPDATE par groupe
+            batches = defaultdict(lambda: defaultdict(list))
+            for (label, pk), amount in pending.items():
+                batches[label][amount].append(pk)
+            
+            updated = 0
+            try:
+                for label, by_amount in batches.items():
+                    model = apps.get_model(label)
+                    for amount in list(by_amount):
+                        updated += model._default_manager.filter(pk__in=by_amount[amount]).update(
+                            **{self.field_name: F(self.field_name) + amount}
+                        )
+                        del by_amount[amount]
+            except Exception:
+                # Remet en attente les lots non écrits pour la prochaine tentative
+                with self._lock:
+                    for label, by_amount in batches.items():
+                        for amount, pks in by_amount.items():
+                            for pk in pks:
+                                self._pending[(label, pk)] += amount
+                raise
+            return updated
+
+    def flush_safely(self):
+        """Écrit les incréments en attente hors requête (minuterie, arrêt du processus)"""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Échec de l'écriture des compteurs %s", self.field_name)
+        finally:
+            connection.close()
+
+    def _schedule_flush(self):
+        """Programme une écriture différée si aucune n'est en attente (appelé sous verrou)"""
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.get_flush_interval(), self.flush_safely)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+# Compteur de vues partagé par les articles, événements, artistes et contenus théoriques
+view_counter = BufferedCounter('views_count')
+
+atexit.register(view_counter.flush_safely)
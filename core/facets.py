@@ -0,0 +1,205 @@
+"""
+Recherche à facettes.
+
+Une recherche à facettes renvoie, avec ses résultats, le nombre de résultats
+par valeur de chaque facette (ville, niveau, catégorie, tranche de prix,
+gratuit / payant) pour les filtres en cours. Le compte d'une facette ignore
+son propre filtre (choisir « Paris » n'efface pas les autres villes) mais
+tient compte de tous les autres.
+
+Tous les comptes viennent d'une seule requête groupée : les contenus sont
+groupés par combinaison de valeurs des facettes, avec pour chaque filtre de
+facette actif une colonne indiquant si le groupe le satisfait ; le compte
+d'une facette additionne les groupes qui satisfont les autres filtres. Le
+résultat est mis en cache par jeu de filtres normalisé et par versions des
+modèles (voir core/conditional.py) : toute modification l'invalide.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, CharField, Count, F, Q, Value, When
+
+from .conditional import get_versions
+
+# Paramètres sans effet sur les comptes (pagination, tri, forme de la réponse)
+IGNORED_PARAMS = {'facets', 'page', 'page_size', 'pagination', 'cursor', 'ordering', 'fields', 'profile', 'format'}
+
+
+class Facet:
+    """Facette sur un champ : une entrée par valeur distincte du champ"""
+    max_values = 50
+
+    def __init__(self, name, field, lookup='exact', label_field=None, choices=None):
+        self.name = name
+        self.field = field
+        self.lookup = lookup
+        self.label_field = label_field
+        self.choices = dict(choices or ())
+
+    def expression(self):
+        return F(self.field)
+
+    def condition(self, value):
+        """Condition des contenus correspondant à la valeur sélectionnée"""
+        return Q(**{f'{self.field}__{self.lookup}': value})
+
+    def entries(self, totals, labels):
+        entries = [
+            {'value': value, 'label': str(labels.get(value) or self.choices.get(value, value)), 'count': count}
+            for value, count in totals.items()
+        ]
+        entries.sort(key=lambda entry: (-entry['count'], entry['label']))
+        return entries[:self.max_values]
+
+
+class BucketFacet(Facet):
+    """Facette par tranches : `buckets` liste les tranches (valeur, libellé, condition)"""
+
+    def __init__(self, name, buckets, output_field=None):
+        super().__init__(name, field=None)
+        self.buckets = buckets
+        self.output_field = output_field or CharField()
+
+    def expression(self):
+        return Case(
+            *[When(condition, then=Value(value)) for value, _, condition in self.buckets],
+            default=Value(None), output_field=self.output_field,
+        )
+
+    def condition(self, value):
+        # Comparaison sur la forme texte : 'true' (paramètre d'URL) vaut True
+        for bucket, _, condition in self.buckets:
+            if str(bucket).lower() == str(value).lower():
+                return condition
+        return Q(pk__in=[])
+
+    def entries(self, totals, labels):
+        # Toutes les tranches, dans l'ordre, y compris les vides
+        return [{'value': value, 'label': label, 'count': totals.get(value, 0)} for value, label, _ in self.buckets]
+
+
+def price_ranges():
+    """Valeurs des tranches de prix (`FACET_PRICE_BUCKETS`) : '0-20', ..., '100+'"""
+    edges = getattr(settings, 'FACET_PRICE_BUCKETS', (0, 20, 50, 100))
+    return [f'{low}-{high}' for low, high in zip(edges, edges[1:])] + [f'{edges[-1]}+']
+
+
+def price_facet(field):
+    """Facette `price_range` des tranches de prix du champ `field`"""
+    edges = getattr(settings, 'FACET_PRICE_BUCKETS', (0, 20, 50, 100))
+    buckets = [
+        (f'{low}-{high}', f'{low} à {high} €', Q(**{f'{field}__gte': low, f'{field}__lt': high}))
+        for low, high in zip(edges, edges[1:])
+    ]
+    buckets.append((f'{edges[-1]}+', f'{edges[-1]} € et plus', Q(**{f'{field}__gte': edges[-1]})))
+    return BucketFacet('price_range', buckets)
+
+
+def free_facet(condition):
+    """Facette `is_free` gratuit / payant ; `condition` sélectionne les contenus gratuits"""
+    return BucketFacet('is_free', [(True, 'Gratuit', condition), (False, 'Payant', ~condition)], output_field=BooleanField())
+
+
+def normalize_filters(params):
+    """Jeu de filtres normalisé (clé de cache) : paramètres non vides, triés, sans espaces superflus"""
+    filters = {}
+    for key, value in params.items():
+        if key in IGNORED_PARAMS or value is None:
+            continue
+        value = value.strip() if isinstance(value, str) else value
+        if value != '':
+            filters[key] = value
+    return json.dumps(filters, sort_keys=True, default=str)
+
+
+def with_facets(response, facets):
+    """Ajoute les comptes de facettes à une réponse de liste (paginée ou non)"""
+    if isinstance(response.data, dict):
+        response.data['facets'] = facets
+    else:
+        response.data = {'results': response.data, 'facets': facets}
+    return response
+
+
+class FacetSet:
+    """
+    Facettes d'une recherche. Le paramètre d'une facette porte son nom
+    (`?city=Paris&price_range=0-20`) ; `models` liste les modèles dont les
+    versions invalident les comptes en cache.
+    """
+
+    def __init__(self, name, facets, models):
+        self.name = name
+        self.facets = list(facets)
+        self.models = tuple(models)
+
+    def selected(self, params):
+        """Retourne {facette: valeur} des facettes filtrées par les paramètres"""
+        selected = {}
+        for facet in self.facets:
+            value = params.get(facet.name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value is not None and value != '':
+                selected[facet.name] = value
+        return selected
+
+    def condition(self, selected, exclude=None):
+        facets = {facet.name: facet for facet in self.facets}
+        condition = Q()
+        for name, value in selected.items():
+            if name != exclude:
+                condition &= facets[name].condition(value)
+        return condition
+
+    def apply(self, queryset, params):
+        """Applique les filtres de facettes des paramètres"""
+        return queryset.filter(self.condition(self.selected(params)))
+
+    def compute(self, queryset, params):
+        """
+        Calcule les comptes de toutes les facettes sur `queryset` (contenus
+        filtrés par tout sauf les facettes), en une requête groupée.
+        """
+        selected = self.selected(params)
+        dimensions = {f'facet_{facet.name}': facet.expression() for facet in self.facets}
+        labels = {f'label_{facet.name}': F(facet.label_field) for facet in self.facets if facet.label_field}
+        matches = {
+            f'match_{name}': Case(When(self.condition({name: value}), then=Value(True)),
+                                  default=Value(False), output_field=BooleanField())
+            for name, value in selected.items()
+        }
+        rows = list(
+            queryset.order_by().annotate(**dimensions, **labels, **matches)
+            .values(*dimensions, *labels, *matches).annotate(facet_count=Count('pk'))
+        )
+
+        facets = {}
+        for facet in self.facets:
+            others = [f'match_{name}' for name in selected if name != facet.name]
+            totals, names = {}, {}
+            for row in rows:
+                value = row[f'facet_{facet.name}']
+                if value is None or value == '' or not all(row[match] for match in others):
+                    continue
+                totals[value] = totals.get(value, 0) + row['facet_count']
+                if facet.label_field:
+                    names[value] = row[f'label_{facet.name}']
+            facets[facet.name] = facet.entries(totals, names)
+        return facets
+
+    def counts(self, queryset, params, vary=()):
+        """
+        Comptes des facettes pour le jeu de filtres `params`, servis depuis le
+        cache ; `vary` distingue les querysets propres à l'utilisateur.
+        """
+        versions = sorted((label, version) for label, (version, _) in get_versions(self.models).items())
+        payload = json.dumps([normalize_filters(params), list(vary), versions], default=str)
+        key = f'facets:{self.name}:{hashlib.md5(payload.encode()).hexdigest()}'
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.compute(queryset, params)
+            cache.set(key, facets, getattr(settings, 'FACET_CACHE_TIMEOUT', 300))
+        return facets
@@ -0,0 +1,141 @@
+"""
+Champs à la demande (sparse fieldsets) des réponses de l'API en lecture.
+
+- `?fields=id,title,organizer.username` : champs retenus, les champs des
+  sérialiseurs imbriqués étant désignés par chemin pointé ;
+- `?omit=gallery,schedule` : champs retirés ;
+- `?profile=card` : profil réduit du sérialiseur (`Meta.card_fields`, à
+  défaut les champs de carte usuels qu'il possède), appliqué aussi aux
+  sérialiseurs imbriqués ; `full` (défaut) conserve tous les champs.
+
+Dans les listes, les colonnes lourdes (texte, JSON) qu'aucun champ retenu ne
+lit sont différées dans le queryset : la base ne les lit pas. Un champ
+calculé qui lit une telle colonne la déclare dans `Meta.sparse_requires`
+({champ: (colonnes,)}).
+"""
+from django.db import models
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+PROFILE_PARAM = 'profile'
+PROFILES = ('card', 'full')
+
+# Profil « carte » des sérialiseurs qui n'en déclarent pas
+DEFAULT_CARD_FIELDS = (
+    'id', 'slug', 'title', 'name', 'artist_name', 'username', 'first_name', 'last_name',
+    'short_description', 'short_bio', 'category', 'category_name', 'level', 'difficulty', 'status',
+    'start_date', 'end_date', 'city', 'distance', 'main_image', 'profile_image', 'featured_image',
+    'profile_picture', 'price', 'base_price', 'current_price', 'currency', 'is_free',
+    'available_spots', 'average_rating', 'rating', 'reviews_count',
+)
+
+HEAVY_COLUMN_TYPES = (models.TextField, models.JSONField, models.BinaryField)
+
+
+def parse_paths(value):
+    """Arbre {champ: sous-arbre} d'une liste de chemins pointés (`a,b.c,b.d`)"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in (part.strip() for part in path.split('.')):
+            if not name:
+                break
+            node = node.setdefault(name, {})
+    return tree
+
+
+class Fieldset:
+    """Sélection de champs demandée par une requête"""
+
+    def __init__(self, include=None, omit=None, profile='full'):
+        self.include = include or {}
+        self.omit = omit or {}
+        self.profile = profile
+
+    @classmethod
+    def from_request(cls, request):
+        """Sélection des paramètres d'une requête ; None si elle n'en demande aucune"""
+        params = request.query_params
+        if not any(params.get(name) for name in (FIELDS_PARAM, OMIT_PARAM, PROFILE_PARAM)):
+            return None
+        profile = params.get(PROFILE_PARAM) or 'full'
+        if profile not in PROFILES:
+            raise serializers.ValidationError(
+                {PROFILE_PARAM: f"Profil inconnu (attendus : {', '.join(PROFILES)})."}
+            )
+        return cls(parse_paths(params.get(FIELDS_PARAM)), parse_paths(params.get(OMIT_PARAM)), profile)
+
+    def apply(self, serializer):
+        """Retire d'un sérialiseur (et de ses sérialiseurs imbriqués) les champs non demandés"""
+        prune(serializer, self.include, self.omit, self.profile)
+        return serializer
+
+
+def card_fields(serializer):
+    meta = getattr(serializer, 'Meta', None)
+    return getattr(meta, 'card_fields', None) or DEFAULT_CARD_FIELDS
+
+
+def prune(serializer, include, omit, profile):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if not isinstance(serializer, serializers.Serializer):
+        return
+    fields = serializer.fields
+    if include:
+        kept = set(include)
+    elif profile == 'card':
+        kept = set(card_fields(serializer))
+    else:
+        kept = set(fields)
+    for name in list(fields):
+        if name not in kept or (name in omit and not omit[name]):
+            del fields[name]
+        else:
+            prune(fields[name], include.get(name) or {}, omit.get(name) or {}, profile)
+
+
+def deferrable_columns(serializer, model):
+    """Colonnes lourdes du modèle qu'aucun champ (retenu) du sérialiseur ne lit"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    requires = getattr(getattr(serializer, 'Meta', None), 'sparse_requires', {})
+    read = set()
+    for name, field in serializer.fields.items():
+        read.update(requires.get(name, ()))
+        if field.source != '*':
+            read.add(field.source.split('.')[0])
+    return [
+        field.name for field in model._meta.concrete_fields
+        if isinstance(field, HEAVY_COLUMN_TYPES) and not field.primary_key and field.name not in read
+    ]
+
+
+class SparseFieldsetMixin:
+    """
+    Vues (ViewSet, vues génériques) acceptant `?fields=`, `?omit=` et
+    `?profile=` en lecture ; les listes paginées diffèrent les colonnes
+    lourdes non lues.
+    """
+
+    def get_fieldset(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_request(request)
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        return fieldset.apply(serializer) if fieldset is not None else serializer
+
+    def paginate_queryset(self, queryset):
+        fieldset = self.get_fieldset()
+        if fieldset is not None and isinstance(queryset, models.QuerySet) and queryset._fields is None:
+            columns = deferrable_columns(self.get_serializer(), queryset.model)
+            if columns:
+                queryset = queryset.defer(*columns)
+        return super().paginate_queryset(queryset)
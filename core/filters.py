@@ -0,0 +1,45 @@
+"""
+Filtres d'API partagés entre applications.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+from .geo import filter_nearby
+from .serializers import NearbyQuerySerializer
+from .tags import index_for_model
+
+
+def apply_nearby(queryset, data, order=True):
+    """Restreint un queryset au rayon de recherche validé (`lat`, `lng`, `radius`), s'il y en a un"""
+    if data.get('lat') is None:
+        return queryset
+    return filter_nearby(queryset, data['lat'], data['lng'], data['radius'], order=order)
+
+
+class NearbyFilterBackend(BaseFilterBackend):
+    """
+    Recherche « autour de moi » : `?lat=..&lng=..&radius=..` (km) restreint la
+    liste aux objets dans le rayon et la trie par distance, sauf tri explicite
+    (`?ordering=...`). À placer après OrderingFilter.
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = NearbyQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ordering = request.query_params.get(self.ordering_param)
+        return apply_nearby(queryset, serializer.validated_data, order=ordering in (None, '', 'distance'))
+
+
+class TagFilterBackend(BaseFilterBackend):
+    """
+    Filtrage par tags : `?tags=a,b` restreint la liste aux contenus portant
+    tous les tags donnés (jointure sur l'index des tags, voir core/tags.py).
+    """
+    tags_param = 'tags'
+
+    def filter_queryset(self, request, queryset, view):
+        tags = [tag for tag in request.query_params.get(self.tags_param, '').split(',') if tag.strip()]
+        index = index_for_model(queryset.model)
+        if not tags or index is None:
+            return queryset
+        return queryset.filter(index.filter_q(tags))
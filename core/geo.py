@@ -0,0 +1,133 @@
+"""
+Recherche géographique « autour de moi ».
+
+Chaque objet localisé stocke sa latitude, sa longitude et son geohash (voir
+`GeoLocatedModel`, core/models.py). Une recherche par rayon se fait en deux
+temps :
+
+1. préfiltre indexé : les cellules geohash couvrant le rectangle englobant du
+   cercle (au plus quatre, à la précision la plus fine dont une cellule
+   contient le rectangle), combinées au rectangle lui-même ;
+2. distance exacte (haversine) des candidats calculée par la base, dans
+   l'annotation `distance` sur laquelle portent le filtre par rayon et le tri
+   (la pagination par curseur borne chaque page).
+"""
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+# Borne supérieure des geohash d'une cellule (après 'z' dans l'ordre des chaînes)
+GEOHASH_UPPER_BOUND = '~'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Retourne le geohash d'un point"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Retourne (hauteur, largeur) en degrés d'une cellule geohash"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Retourne (lat_min, lat_max, lng_min, lng_max) du rectangle englobant un
+    cercle ; les longitudes ne sont pas ramenées dans [-180, 180] (passage de
+    l'antiméridien) et valent ±180 si le cercle contient un pôle.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_min, lat_max = latitude - delta_lat, latitude + delta_lat
+    if lat_min <= -90 or lat_max >= 90:
+        return max(lat_min, -90.0), min(lat_max, 90.0), -180.0, 180.0
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return lat_min, lat_max, -180.0, 180.0
+    delta_lng = math.degrees(math.asin(ratio))
+    return lat_min, lat_max, longitude - delta_lng, longitude + delta_lng
+
+
+def wrap_longitude(longitude):
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def covering_cells(box):
+    """Préfixes geohash (au plus quatre) couvrant un rectangle englobant ; [''] s'il est trop grand"""
+    lat_min, lat_max, lng_min, lng_max = box
+    height, width = lat_max - lat_min, lng_max - lng_min
+    precision = 0
+    while precision < GEOHASH_PRECISION:
+        cell_height, cell_width = cell_size(precision + 1)
+        if cell_height < height or cell_width < width:
+            break
+        precision += 1
+    if precision == 0:
+        return ['']
+    # Une cellule au moins aussi grande que le rectangle : ses quatre coins touchent toutes les cellules
+    return sorted({
+        encode_geohash(min(max(lat, -90.0), 90.0 - 1e-9), wrap_longitude(lng), precision)
+        for lat in (lat_min, lat_max) for lng in (lng_min, lng_max)
+    })
+
+
+def prefilter(box):
+    """Condition indexée (cellules geohash et rectangle) des candidats d'une recherche par rayon"""
+    lat_min, lat_max, lng_min, lng_max = box
+    condition = Q(latitude__gte=lat_min, latitude__lte=lat_max)
+    if lng_min >= -180 and lng_max <= 180:
+        condition &= Q(longitude__gte=lng_min, longitude__lte=lng_max)
+    else:
+        # Le rectangle traverse l'antiméridien
+        condition &= Q(longitude__gte=wrap_longitude(lng_min)) | Q(longitude__lte=wrap_longitude(lng_max))
+    cells = Q()
+    for prefix in covering_cells(box):
+        if prefix:
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + GEOHASH_UPPER_BOUND)
+    return condition & cells
+
+
+def haversine_distance(latitude, longitude):
+    """Expression SQL de la distance (km) de chaque objet au point (formule de haversine)"""
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    half_dlat = (Radians(F('latitude')) - Value(lat1)) / Value(2.0)
+    half_dlng = (Radians(F('longitude')) - Value(lng1)) / Value(2.0)
+    a = (Power(Sin(half_dlat), 2)
+         + Value(math.cos(lat1)) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlng), 2))
+    return ExpressionWrapper(
+        Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0)))),
+        output_field=FloatField(),
+    )
+
+
+def filter_nearby(queryset, latitude, longitude, radius_km, order=True):
+    """
+    Restreint un queryset aux objets situés dans le rayon, annotés de leur
+    `distance` (km) et triés par distance si `order` est vrai.
+    """
+    queryset = queryset.filter(prefilter(bounding_box(latitude, longitude, radius_km))).annotate(
+        distance=haversine_distance(latitude, longitude),
+    ).filter(distance__lte=radius_km)
+    return queryset.order_by('distance', 'pk') if order else queryset
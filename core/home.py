@@ -0,0 +1,118 @@
+"""
+Page d'accueil agrégée (`/api/home/`).
+
+Les sections de la page d'accueil (statistiques, contenus à venir, contenus
+en vedette) sont les réponses des actions existantes, produites côté serveur
+pour un visiteur anonyme et mises en cache chacune avec sa durée de vie. La
+page entière est servie par une lecture groupée du cache.
+
+Reconstruction « single-flight » : à l'expiration d'une section, un seul
+appel (verrou `cache.add`) la reconstruit ; les appels concurrents servent la
+version précédente, conservée `HOME_STALE_TIMEOUT` secondes. Sans version
+précédente (cache vide), ils attendent la reconstruction en cours plutôt que
+de la refaire.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# En-têtes de la requête d'origine repris par les requêtes internes (URLs absolues des médias)
+FORWARDED_META = ('SERVER_NAME', 'SERVER_PORT', 'HTTP_HOST', 'HTTP_X_FORWARDED_PROTO', 'wsgi.url_scheme')
+WAIT_INTERVAL = 0.05
+
+
+class HomeSection:
+    """Section de la page d'accueil : action `action` de la vue `view` (chemin pointé), en cache `ttl` secondes"""
+
+    def __init__(self, name, view, action, ttl):
+        self.name = name
+        self.view = view
+        self.action = action
+        self.ttl = ttl
+
+    @property
+    def cache_key(self):
+        return f'home:{self.name}'
+
+    @property
+    def lock_key(self):
+        return f'home:{self.name}:lock'
+
+    def build(self, request):
+        """Retourne les données de l'action, calculées pour un visiteur anonyme"""
+        internal = HttpRequest()
+        internal.method = 'GET'
+        internal.path = request.path
+        internal.META = {key: request.META[key] for key in FORWARDED_META if key in request.META}
+        internal.META['HTTP_ACCEPT'] = 'application/json'
+        # Données partagées par tous les visiteurs : aucune information propre à l'utilisateur
+        internal.user = AnonymousUser()
+        view = import_string(self.view).as_view({'get': self.action})
+        response = view(internal)
+        if response.status_code != 200:
+            raise RuntimeError(f'Section {self.name} : réponse {response.status_code}')
+        return response.data
+
+    def rebuild(self, request):
+        """Reconstruit la section et la met en cache ; retourne l'entrée"""
+        entry = {'data': self.build(request), 'expires_at': time.time() + self.ttl}
+        cache.set(self.cache_key, entry, self.ttl + getattr(settings, 'HOME_STALE_TIMEOUT', 3600))
+        return entry
+
+    def resolve(self, request, entry):
+        """Retourne les données d'une section à partir de son entrée en cache (reconstruite au besoin)"""
+        if entry is not None and entry['expires_at'] > time.time():
+            return entry['data']
+        lock_timeout = getattr(settings, 'HOME_REBUILD_LOCK_TIMEOUT', 30)
+        if cache.add(self.lock_key, True, lock_timeout):
+            try:
+                return self.rebuild_safely(request, entry)
+            finally:
+                cache.delete(self.lock_key)
+        if entry is not None:
+            # Reconstruction en cours ailleurs : version précédente
+            return entry['data']
+        deadline = time.time() + lock_timeout
+        while time.time() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = cache.get(self.cache_key)
+            if entry is not None:
+                return entry['data']
+            if cache.get(self.lock_key) is None:
+                break
+        return self.rebuild_safely(request, None)
+
+    def rebuild_safely(self, request, entry):
+        """Reconstruit la section ; en cas d'échec, retourne la version précédente (ou None)"""
+        try:
+            return self.rebuild(request)['data']
+        except Exception:
+            logger.exception("Échec de la reconstruction de la section d'accueil %s", self.name)
+            return entry['data'] if entry is not None else None
+
+
+home_sections = {
+    section.name: section for section in (
+        HomeSection('stats', 'courses.views.CourseViewSet', 'stats', ttl=60),
+        HomeSection('upcoming', 'courses.views.CourseViewSet', 'upcoming_events', ttl=60),
+        HomeSection('featured_courses', 'courses.views.CourseViewSet', 'featured', ttl=300),
+        HomeSection('featured_festivals', 'festivals.views.FestivalViewSet', 'featured', ttl=300),
+        HomeSection('featured_events', 'events.views.EventViewSet', 'featured', ttl=300),
+        HomeSection('featured_artists', 'artists.views.ArtistProfileViewSet', 'featured', ttl=600),
+        HomeSection('featured_articles', 'formations.views.FormationArticleViewSet', 'featured', ttl=600),
+    )
+}
+
+
+def home_page(request, names=None):
+    """Retourne {section: données} des sections demandées (toutes par défaut)"""
+    sections = [section for name, section in home_sections.items() if not names or name in names]
+    entries = cache.get_many([section.cache_key for section in sections])
+    return {section.name: section.resolve(request, entries.get(section.cache_key)) for section in sections}
@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.content import backfill_derived_content
+from core.models import DerivedContentModel
+
+
+class Command(BaseCommand):
+    help = "Recalcule le texte brut, l'extrait, le nombre de mots, le temps de lecture et la table des matières"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help="Modèles à traiter (ex. formations.FormationArticle) ; tous par défaut"
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre de lignes mises à jour par lot")
+
+    def handle(self, *args, **options):
+        models = [
+            model for model in apps.get_models()
+            if issubclass(model, DerivedContentModel)
+        ]
+        if options['models']:
+            labels = {label.lower() for label in options['models']}
+            unknown = labels - {model._meta.label_lower for model in models}
+            if unknown:
+                raise CommandError(f"Modèles sans contenu dérivé : {', '.join(sorted(unknown))}")
+            models = [model for model in models if model._meta.label_lower in labels]
+
+        for model in models:
+            updated = backfill_derived_content(
+                model.objects.all(),
+                content_field=model.content_field,
+                reading_time_field=model.reading_time_field,
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.label} : {updated} ligne(s) mise(s) à jour"))
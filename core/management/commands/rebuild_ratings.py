@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.ratings import rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats de notes (événements, artistes) à partir des avis"
+
+    def handle(self, *args, **options):
+        for label, aggregate in sorted(rating_aggregates.items()):
+            count = aggregate.rebuild()
+            self.stdout.write(f"{label} : {count} agrégat(s) recalculé(s)")
+        self.stdout.write(self.style.SUCCESS("Agrégats de notes reconstruits"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.similarity import similarity_indexes
+
+
+class Command(BaseCommand):
+    help = "Recalcule les vecteurs des index de similarité (articles similaires)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('indexes', nargs='*', help="Index à reconstruire ; par défaut tous")
+
+    def handle(self, *args, **options):
+        names = options['indexes'] or sorted(similarity_indexes)
+        unknown = [name for name in names if name not in similarity_indexes]
+        if unknown:
+            raise CommandError(f"Index inconnu(s) : {', '.join(unknown)} (disponibles : {', '.join(sorted(similarity_indexes))})")
+        for name in names:
+            count = similarity_indexes[name].rebuild()
+            self.stdout.write(f"{name} : {count} objet(s) indexé(s)")
+        self.stdout.write(self.style.SUCCESS("Index de similarité reconstruits"))
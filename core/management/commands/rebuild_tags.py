@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tags import tag_indexes
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index des tags (liens et comptes) à partir des listes de tags des contenus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('scopes', nargs='*', help="Types de contenu à réindexer (tous par défaut)")
+
+    def handle(self, *args, **options):
+        scopes = options['scopes'] or sorted(tag_indexes)
+        unknown = [scope for scope in scopes if scope not in tag_indexes]
+        if unknown:
+            raise CommandError(f"Types de contenu inconnus : {', '.join(unknown)} (disponibles : {', '.join(sorted(tag_indexes))})")
+        for scope in scopes:
+            count = tag_indexes[scope].rebuild()
+            self.stdout.write(f"{scope} : {count} lien(s) indexé(s)")
+        self.stdout.write(self.style.SUCCESS("Index des tags reconstruit"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.capacity import seat_capacities
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de places occupées (cours, festivals, compétitions, trainings, événements) qui ont dérivé"
+
+    def handle(self, *args, **options):
+        total = 0
+        for label, capacity in sorted(seat_capacities.items()):
+            fixed = capacity.reconcile()
+            total += len(fixed)
+            self.stdout.write(f"{capacity.parent_model._meta.label} : {len(fixed)} compteur(s) corrigé(s)")
+        self.stdout.write(self.style.SUCCESS(f"Réconciliation terminée ({total} correction(s))"))
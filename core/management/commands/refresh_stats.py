@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rollups import stats_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques globales pré-agrégées (tâche périodique)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Rollups à recalculer (tous par défaut)")
+
+    def handle(self, *args, **options):
+        names = options['names'] or sorted(stats_rollups)
+        unknown = set(names) - set(stats_rollups)
+        if unknown:
+            raise CommandError(f"Rollup(s) inconnu(s) : {', '.join(sorted(unknown))}")
+        for name in names:
+            stats_rollups[name].refresh()
+            self.stdout.write(f"{name} : statistiques recalculées")
+        self.stdout.write(self.style.SUCCESS("Statistiques globales à jour"))
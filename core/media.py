@@ -0,0 +1,200 @@
+"""
+Inspection des fichiers médias : taille, empreinte, dimensions, durée et
+vignette, calculées hors requête par un pool de fils de travail.
+
+Les images sont lues avec Pillow ; la durée des fichiers WAV est lue avec la
+bibliothèque standard. Pour la vidéo et les autres formats audio, `ffprobe`
+et `ffmpeg` sont utilisés s'ils sont présents sur la machine (sinon ces
+métadonnées restent vides).
+"""
+import atexit
+import hashlib
+import json
+import logging
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+THUMBNAIL_SIZE = (480, 480)
+FFPROBE_TIMEOUT = 30
+
+
+def hash_file(file):
+    """Retourne la taille et l'empreinte SHA-256 d'un fichier ouvert, lu par blocs"""
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return size, digest.hexdigest()
+
+
+def make_thumbnail(image, size=THUMBNAIL_SIZE):
+    """Retourne une vignette JPEG (ContentFile) d'une image Pillow"""
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(size)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=85, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def inspect_image(file, with_thumbnail=True):
+    """Dimensions (et vignette) d'une image"""
+    try:
+        with Image.open(file) as image:
+            metadata = {'dimensions': f"{image.width}x{image.height}"}
+            if with_thumbnail:
+                metadata['thumbnail'] = make_thumbnail(image)
+            return metadata
+    except (UnidentifiedImageError, OSError):
+        return {}
+
+
+def inspect_wave(file):
+    """Durée d'un fichier WAV"""
+    try:
+        with wave.open(file) as audio:
+            return {'duration': round(audio.getnframes() / audio.getframerate())}
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return {}
+
+
+def probe_path(path, with_thumbnail=True):
+    """Durée, dimensions (et vignette) d'un fichier audio ou vidéo via ffprobe/ffmpeg"""
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return {}
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+            capture_output=True, timeout=FFPROBE_TIMEOUT, check=True,
+        )
+        info = json.loads(result.stdout or b'{}')
+    except (subprocess.SubprocessError, ValueError):
+        return {}
+
+    metadata = {}
+    duration = info.get('format', {}).get('duration')
+    if duration:
+        metadata['duration'] = round(float(duration))
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), None)
+    if video and video.get('width') and video.get('height'):
+        metadata['dimensions'] = f"{video['width']}x{video['height']}"
+        ffmpeg = shutil.which('ffmpeg')
+        if with_thumbnail and ffmpeg:
+            # Image extraite à 10 % de la durée (ou à la première image)
+            offset = str(min(float(duration or 0) * 0.1, 10))
+            try:
+                frame = subprocess.run(
+                    [ffmpeg, '-v', 'error', '-ss', offset, '-i', path, '-frames:v', '1',
+                     '-f', 'image2pipe', '-vcodec', 'png', '-'],
+                    capture_output=True, timeout=FFPROBE_TIMEOUT, check=True,
+                ).stdout
+                if frame:
+                    with Image.open(BytesIO(frame)) as image:
+                        metadata['thumbnail'] = make_thumbnail(image)
+            except (subprocess.SubprocessError, UnidentifiedImageError, OSError):
+                pass
+    return metadata
+
+
+def inspect_media(field_file, file_type, with_thumbnail=True):
+    """
+    Retourne les métadonnées d'un fichier stocké : `file_size` et
+    `content_hash` toujours, `dimensions`, `duration` et `thumbnail` selon le
+    type de média et les outils disponibles.
+    """
+    metadata = {}
+    with field_file.open('rb') as file:
+        metadata['file_size'], metadata['content_hash'] = hash_file(file)
+        if file_type == 'image':
+            metadata.update(inspect_image(file, with_thumbnail))
+        elif file_type in ('audio', 'video'):
+            if field_file.name.lower().endswith('.wav'):
+                metadata.update(inspect_wave(file))
+            else:
+                metadata.update(_probe_field_file(field_file, file, with_thumbnail))
+    return metadata
+
+
+def _probe_field_file(field_file, file, with_thumbnail):
+    """Passe à ffprobe le chemin local du fichier, ou une copie temporaire (stockage distant)"""
+    if not shutil.which('ffprobe'):
+        return {}
+    try:
+        return probe_path(field_file.path, with_thumbnail)
+    except NotImplementedError:
+        pass
+    with tempfile.NamedTemporaryFile() as copy:
+        shutil.copyfileobj(file, copy, HASH_CHUNK_SIZE)
+        copy.flush()
+        return probe_path(copy.name, with_thumbnail)
+
+
+class BackgroundPool:
+    """Pool de fils de travail exécutant des traitements hors requête"""
+
+    def __init__(self, name, max_workers=None):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'MEDIA_PROCESSING_ASYNC', True)
+
+    def get_max_workers(self):
+        if self.max_workers is not None:
+            return self.max_workers
+        return getattr(settings, 'MEDIA_PROCESSING_WORKERS', 2)
+
+    def submit(self, function, *args):
+        """Exécute `function(*args)` dans le pool (ou immédiatement si le pool est désactivé)"""
+        if not self.enabled:
+            self._run(function, *args)
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.get_max_workers(), thread_name_prefix=self.name
+                )
+                atexit.register(self.shutdown)
+            return self._executor.submit(self._run_and_close, function, *args)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, function, *args):
+        try:
+            function(*args)
+        except Exception:
+            logger.exception("Échec du traitement %s", self.name)
+
+    def _run_and_close(self, function, *args):
+        try:
+            self._run(function, *args)
+        finally:
+            connection.close()
+
+
+media_pool = BackgroundPool('media')
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarityVector",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.CharField(max_length=50, verbose_name="Index")),
+                ("object_id", models.PositiveIntegerField(verbose_name="Objet")),
+                ("indices", models.BinaryField(verbose_name="Indices (uint32)")),
+                ("weights", models.BinaryField(verbose_name="Poids (float32)")),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Date de mise à jour"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Vecteur de similarité",
+                "verbose_name_plural": "Vecteurs de similarité",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="similarityvector",
+            constraint=models.UniqueConstraint(
+                fields=("index", "object_id"), name="core_similarity_vector_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(max_length=100, verbose_name="Modèle d'avis"),
+                ),
+                ("object_id", models.PositiveIntegerField(verbose_name="Objet noté")),
+                ("criterion", models.CharField(max_length=50, verbose_name="Critère")),
+                (
+                    "ratings_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Nombre de notes"
+                    ),
+                ),
+                (
+                    "ratings_sum",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Somme des notes"
+                    ),
+                ),
+                (
+                    "stars_1",
+                    models.PositiveIntegerField(default=0, verbose_name="Notes de 1"),
+                ),
+                (
+                    "stars_2",
+                    models.PositiveIntegerField(default=0, verbose_name="Notes de 2"),
+                ),
+                (
+                    "stars_3",
+                    models.PositiveIntegerField(default=0, verbose_name="Notes de 3"),
+                ),
+                (
+                    "stars_4",
+                    models.PositiveIntegerField(default=0, verbose_name="Notes de 4"),
+                ),
+                (
+                    "stars_5",
+                    models.PositiveIntegerField(default=0, verbose_name="Notes de 5"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Date de mise à jour"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Agrégat de notes",
+                "verbose_name_plural": "Agrégats de notes",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ratingsummary",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "object_id", "criterion"),
+                name="core_rating_summary_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_rating_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatsSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name="Rollup"
+                    ),
+                ),
+                ("data", models.JSONField(default=dict, verbose_name="Statistiques")),
+                (
+                    "computed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Date du calcul"),
+                ),
+            ],
+            options={
+                "verbose_name": "Statistiques pré-agrégées",
+                "verbose_name_plural": "Statistiques pré-agrégées",
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_stats_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModelVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "label",
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name="Modèle"
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=0, verbose_name="Version"),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(verbose_name="Dernière modification"),
+                ),
+            ],
+            options={
+                "verbose_name": "Version de modèle",
+                "verbose_name_plural": "Versions de modèles",
+            },
+        ),
+    ]
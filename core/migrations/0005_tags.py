@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_model_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="Nom")),
+                (
+                    "slug",
+                    models.SlugField(max_length=100, unique=True, verbose_name="Slug"),
+                ),
+            ],
+            options={
+                "verbose_name": "Tag",
+                "verbose_name_plural": "Tags",
+                "ordering": ["slug"],
+            },
+        ),
+        migrations.CreateModel(
+            name="TagCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(max_length=50, verbose_name="Type de contenu"),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Nombre de contenus"
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counts",
+                        to="core.tag",
+                        verbose_name="Tag",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Compte de tag",
+                "verbose_name_plural": "Comptes de tags",
+                "indexes": [
+                    models.Index(fields=["scope", "-count"], name="core_tag_count_top")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="tagcount",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "tag"), name="core_tag_count_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,368 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+
+from .capacity import CapacityError
+from .content import derive_content
+from .geo import encode_geohash
+from .ratings import RATING_SCALE, star_field
+
+
+class DerivedContentModel(models.Model):
+    """
+    Modèle abstrait stockant les données dérivées du contenu HTML (texte brut,
+    extrait, nombre de mots, table des matières), recalculées à l'enregistrement
+    lorsque le contenu fait partie des champs sauvegardés.
+
+    Le temps de lecture calculé est écrit dans `reading_time_field` si le
+    modèle en définit un.
+    """
+    content_field = 'content'
+    reading_time_field = 'reading_time'
+
+    plain_text = models.TextField(blank=True, editable=False, verbose_name="Texte brut")
+    generated_excerpt = models.TextField(blank=True, editable=False, verbose_name="Extrait généré")
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de mots")
+    table_of_contents = models.JSONField(default=list, blank=True, editable=False, verbose_name="Table des matières")
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def derived_fields(cls):
+        """Retourne les champs recalculés à partir du contenu"""
+        fields = ['plain_text', 'generated_excerpt', 'word_count', 'table_of_contents']
+        if cls.reading_time_field:
+            fields.append(cls.reading_time_field)
+        return fields
+
+    def update_derived_content(self):
+        """Recalcule en mémoire les données dérivées du contenu"""
+        derived = derive_content(getattr(self, self.content_field))
+        reading_time = derived.pop('reading_time')
+        for field, value in derived.items():
+            setattr(self, field, value)
+        if self.reading_time_field:
+            setattr(self, self.reading_time_field, reading_time)
+
+    def get_excerpt(self):
+        """Retourne l'extrait saisi, ou à défaut l'extrait généré"""
+        return getattr(self, 'excerpt', '') or self.generated_excerpt
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.update_derived_content()
+        elif self.content_field in update_fields:
+            self.update_derived_content()
+            kwargs['update_fields'] = set(update_fields) | set(self.derived_fields())
+        super().save(*args, **kwargs)
+
+
+class GeoLocatedModel(models.Model):
+    """
+    Modèle abstrait localisé par latitude et longitude, avec un geohash
+    indexé recalculé à l'enregistrement (recherche par rayon, voir
+    core/geo.py).
+    """
+    latitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+        verbose_name="Latitude"
+    )
+    longitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+        verbose_name="Longitude"
+    )
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False, verbose_name="Geohash")
+
+    class Meta:
+        abstract = True
+
+    @property
+    def has_coordinates(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def update_geohash(self):
+        self.geohash = encode_geohash(self.latitude, self.longitude) if self.has_coordinates else ''
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.update_geohash()
+        elif {'latitude', 'longitude'} & set(update_fields):
+            self.update_geohash()
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
+
+class SimilarityVector(models.Model):
+    """Vecteur TF haché d'un objet dans un index de similarité (voir core/similarity.py)"""
+    index = models.CharField(max_length=50, verbose_name="Index")
+    object_id = models.PositiveIntegerField(verbose_name="Objet")
+    indices = models.BinaryField(verbose_name="Indices (uint32)")
+    weights = models.BinaryField(verbose_name="Poids (float32)")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
+
+    class Meta:
+        verbose_name = "Vecteur de similarité"
+        verbose_name_plural = "Vecteurs de similarité"
+        constraints = [
+            models.UniqueConstraint(fields=['index', 'object_id'], name='core_similarity_vector_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.index} #{self.object_id}"
+
+
+class RatingSummary(models.Model):
+    """Agrégat des notes d'un critère pour un objet noté (voir core/ratings.py)"""
+    scope = models.CharField(max_length=100, verbose_name="Modèle d'avis")
+    object_id = models.PositiveIntegerField(verbose_name="Objet noté")
+    criterion = models.CharField(max_length=50, verbose_name="Critère")
+    ratings_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de notes")
+    ratings_sum = models.PositiveIntegerField(default=0, verbose_name="Somme des notes")
+    stars_1 = models.PositiveIntegerField(default=0, verbose_name="Notes de 1")
+    stars_2 = models.PositiveIntegerField(default=0, verbose_name="Notes de 2")
+    stars_3 = models.PositiveIntegerField(default=0, verbose_name="Notes de 3")
+    stars_4 = models.PositiveIntegerField(default=0, verbose_name="Notes de 4")
+    stars_5 = models.PositiveIntegerField(default=0, verbose_name="Notes de 5")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
+
+    class Meta:
+        verbose_name = "Agrégat de notes"
+        verbose_name_plural = "Agrégats de notes"
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'object_id', 'criterion'], name='core_rating_summary_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} #{self.object_id} ({self.criterion})"
+
+    @property
+    def average(self):
+        return round(self.ratings_sum / self.ratings_count, 2) if self.ratings_count else 0
+
+    def get_histogram(self):
+        """Retourne {note: nombre d'avis}"""
+        return {value: getattr(self, star_field(value)) for value in RATING_SCALE}
+
+
+class StatsSnapshot(models.Model):
+    """Dernier calcul d'un rollup de statistiques globales (voir core/rollups.py)"""
+    name = models.CharField(max_length=100, unique=True, verbose_name="Rollup")
+    data = models.JSONField(default=dict, verbose_name="Statistiques")
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Date du calcul")
+
+    class Meta:
+        verbose_name = "Statistiques pré-agrégées"
+        verbose_name_plural = "Statistiques pré-agrégées"
+
+    def __str__(self):
+        return self.name
+
+
+class ModelVersion(models.Model):
+    """Version d'un modèle, incrémentée à chaque écriture (validateurs HTTP, voir core/conditional.py)"""
+    label = models.CharField(max_length=100, unique=True, verbose_name="Modèle")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Version")
+    changed_at = models.DateTimeField(verbose_name="Dernière modification")
+
+    class Meta:
+        verbose_name = "Version de modèle"
+        verbose_name_plural = "Versions de modèles"
+
+    def __str__(self):
+        return f'{self.label} v{self.version}'
+
+
+class Tag(models.Model):
+    """Tag normalisé partagé par tous les contenus (voir core/tags.py)"""
+    name = models.CharField(max_length=100, verbose_name="Nom")
+    slug = models.SlugField(max_length=100, unique=True, verbose_name="Slug")
+
+    class Meta:
+        verbose_name = "Tag"
+        verbose_name_plural = "Tags"
+        ordering = ['slug']
+
+    def __str__(self):
+        return self.name
+
+
+class TagCount(models.Model):
+    """Nombre de contenus d'un type portant un tag (tenu à jour par deltas)"""
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='counts', verbose_name="Tag")
+    scope = models.CharField(max_length=50, verbose_name="Type de contenu")
+    count = models.PositiveIntegerField(default=0, verbose_name="Nombre de contenus")
+
+    class Meta:
+        verbose_name = "Compte de tag"
+        verbose_name_plural = "Comptes de tags"
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'tag'], name='core_tag_count_unique'),
+        ]
+        indexes = [models.Index(fields=['scope', '-count'], name='core_tag_count_top')]
+
+    def __str__(self):
+        return f'{self.scope} {self.tag_id} : {self.count}'
+
+
+class TagLinkModel(models.Model):
+    """
+    Modèle abstrait de lien entre un contenu et un tag normalisé (voir
+    core/tags.py). Les sous-classes déclarent la clé `content` vers le
+    contenu et `tag_index = TagIndex(...)`.
+    """
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+', verbose_name="Tag")
+    tag_index = None
+
+    class Meta:
+        abstract = True
+
+
+class RatedReviewModel(models.Model):
+    """
+    Modèle abstrait d'avis noté : les agrégats de l'objet noté (voir
+    core/ratings.py) sont mis à jour dans la transaction de chaque
+    enregistrement, et à la suppression par le signal post_delete. Les
+    sous-classes déclarent `rating_aggregate = RatingAggregate(...)`.
+    """
+    rating_aggregate = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Notes chargées : les modifications sont détectées sans relire la base
+        aggregate = cls.rating_aggregate
+        if all(name in instance.__dict__ for name in (aggregate.parent_attname, *aggregate.criteria)):
+            instance._rated = aggregate.snapshot(instance)
+        return instance
+
+    def _stored_ratings(self):
+        """(objet noté, notes) enregistrés en base pour cet avis"""
+        if self._state.adding:
+            return None
+        if hasattr(self, '_rated'):
+            return self._rated
+        aggregate = self.rating_aggregate
+        stored = type(self)._default_manager.filter(pk=self.pk).values_list(
+            aggregate.parent_attname, *aggregate.criteria
+        ).first()
+        return (stored[0], tuple(stored[1:])) if stored else None
+
+    def save(self, *args, **kwargs):
+        aggregate = self.rating_aggregate
+        stored = self._stored_ratings()
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            rated = aggregate.snapshot(self)
+            if rated != stored:
+                aggregate.apply(stored, rated)
+        self._rated = rated
+
+    def discount_ratings(self):
+        """Retire les notes d'un avis supprimé (appelé par le signal post_delete)"""
+        self.rating_aggregate.apply(getattr(self, '_rated', self.rating_aggregate.snapshot(self)), None)
+
+
+class AtomicCountersModel(models.Model):
+    """
+    Modèle abstrait dont des colonnes (`atomic_fields` : compteur de places,
+    agrégats de notes) sont tenues par des UPDATE atomiques. Un
+    enregistrement ordinaire ne les réécrit pas avec une valeur chargée
+    avant ces UPDATE ; elles sont relues après l'enregistrement.
+    """
+    atomic_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+            return super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.atomic_fields and field.attname not in deferred
+        ]
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=[name for name in self.atomic_fields if name not in deferred])
+
+
+class SeatHoldingModel(models.Model):
+    """
+    Modèle abstrait d'inscription occupant une place chez son parent (voir
+    core/capacity.py) : la place est réservée atomiquement lorsque le statut
+    devient occupant et libérée lorsqu'il ne l'est plus ou à la suppression.
+    Les sous-classes déclarent `seat_capacity = SeatCapacity(...)`.
+    """
+    seat_capacity = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # État chargé : les transitions sont détectées sans relire la base
+        parent_attname = cls.seat_capacity.parent_attname
+        if 'status' in instance.__dict__ and parent_attname in instance.__dict__:
+            instance._held_seat = (instance.__dict__[parent_attname], instance.holds_seat())
+        return instance
+
+    def holds_seat(self):
+        return self.seat_capacity.holds_seat(self.status)
+
+    def _stored_seat(self):
+        """(parent, place occupée) enregistrés en base pour cette inscription"""
+        if self._state.adding:
+            return None, False
+        if hasattr(self, '_held_seat'):
+            return self._held_seat
+        capacity = self.seat_capacity
+        stored = type(self)._default_manager.filter(pk=self.pk).values_list(
+            capacity.parent_attname, 'status'
+        ).first()
+        if stored is None:
+            return None, False
+        return stored[0], capacity.holds_seat(stored[1])
+
+    def clean(self):
+        """Refuse (pour les formulaires) une inscription occupante sur un parent déjà complet"""
+        super().clean()
+        capacity = self.seat_capacity
+        parent_id = getattr(self, capacity.parent_attname)
+        held_parent_id, held = self._stored_seat()
+        if parent_id and self.holds_seat() and not (held and held_parent_id == parent_id):
+            parent = capacity.parent_model._default_manager.filter(pk=parent_id).values(
+                capacity.count_field, capacity.capacity_field
+            ).first()
+            if parent and parent[capacity.count_field] >= parent[capacity.capacity_field]:
+                raise ValidationError("Plus aucune place disponible.")
+
+    def save(self, *args, **kwargs):
+        capacity = self.seat_capacity
+        parent_id = getattr(self, capacity.parent_attname)
+        held_parent_id, held = self._stored_seat()
+        holds = self.holds_seat()
+        moved = held and holds and held_parent_id != parent_id
+
+        with transaction.atomic(using=kwargs.get('using')):
+            if (holds and not held) or moved:
+                if not capacity.reserve(parent_id):
+                    raise CapacityError("Plus aucune place disponible.")
+            super().save(*args, **kwargs)
+            if (held and not holds) or moved:
+                capacity.release(held_parent_id)
+        self._held_seat = (parent_id, holds)
+
+    def release_seat(self):
+        """Libère la place d'une inscription supprimée (appelé par le signal post_delete)"""
+        held_parent_id, held = getattr(self, '_held_seat', (getattr(self, self.seat_capacity.parent_attname), self.holds_seat()))
+        if held:
+            self.seat_capacity.release(held_parent_id)
@@ -0,0 +1,228 @@
+"""
+Pagination des listes et recherches de l'API.
+
+Par défaut, la pagination reste numérotée (`?page=3`). Le mode curseur
+(`?pagination=cursor`, puis le lien `next`) pagine par position (keyset) :
+la page suivante est lue par une condition sur les colonnes du tri de
+l'endpoint (par exemple `(start_date, id)` ou `(-published_at, id)`), sans
+COUNT(*) ni OFFSET. Une page profonde coûte autant que la première.
+
+L'identifiant complète toujours le tri pour le rendre total ; les valeurs
+nulles sont placées en fin de tri dans les deux sens. Le nombre de résultats
+n'est calculé que sur demande (`?count=exact`, ou `?count=estimate` pour
+l'estimation du planificateur PostgreSQL).
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def is_nullable(model, name):
+    """Indique si une colonne de tri peut être nulle (annotations comprises)"""
+    if name == 'pk':
+        return False
+    for part in name.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return True
+        if field.null or not field.concrete:
+            return True
+        model = field.related_model
+    return False
+
+
+def keyset_ordering(queryset):
+    """
+    Retourne le tri d'un queryset sous forme [(colonne, décroissant, nullable)],
+    complété par l'identifiant ; None si le tri n'est pas paginable par
+    position (ordre aléatoire, expression, colonne extra()).
+    """
+    query = queryset.query
+    if query.order_by:
+        items = query.order_by
+    elif query.default_ordering:
+        items = query.get_meta().ordering
+    else:
+        items = ()
+    ordering = []
+    for item in items:
+        if isinstance(item, OrderBy) and isinstance(item.expression, F):
+            name, descending = item.expression.name, item.descending
+        elif isinstance(item, str) and item != '?' and '.' not in item:
+            name, descending = item.lstrip('-'), item.startswith('-')
+        else:
+            return None
+        name = 'pk' if name == 'id' else name
+        if name in query.extra_select:
+            # Colonne calculée par extra() : non filtrable
+            return None
+        ordering.append((name, descending, is_nullable(queryset.model, name)))
+    if not any(name == 'pk' for name, _, _ in ordering):
+        ordering.append(('pk', False, False))
+    return ordering
+
+
+def ordering_expressions(ordering):
+    """Expressions de tri (valeurs nulles en fin de tri dans les deux sens)"""
+    expressions = []
+    for name, descending, nullable in ordering:
+        # Sans valeur nulle possible, le tri reste celui des index
+        nulls_last = True if nullable else None
+        expressions.append(F(name).desc(nulls_last=nulls_last) if descending else F(name).asc(nulls_last=nulls_last))
+    return expressions
+
+
+def after_condition(ordering, values):
+    """Condition des lignes situées après la position `values` dans l'ordre `ordering`"""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (name, descending, nullable), value in zip(ordering, values):
+        if value is None:
+            # Seules les valeurs nulles suivent une valeur nulle
+            after, same = Q(pk__in=[]), Q(**{f'{name}__isnull': True})
+        else:
+            after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if nullable:
+                after |= Q(**{f'{name}__isnull': True})
+            same = Q(**{name: value})
+        condition |= equal & after
+        equal &= same
+    return condition
+
+
+def position_of(obj, ordering):
+    """Valeurs des colonnes de tri d'un objet"""
+    values = []
+    for name, _, _ in ordering:
+        *path, last = name.split('__')
+        value = obj
+        for part in path:
+            value = getattr(value, part, None) if value is not None else None
+        if value is None or last == 'pk':
+            values.append(value.pk if value is not None else None)
+            continue
+        try:
+            field = value._meta.get_field(last)
+        except FieldDoesNotExist:
+            field = None
+        # Relation : la valeur comparée est la clé étrangère
+        values.append(getattr(value, field.attname if field is not None and field.concrete else last, None))
+    return values
+
+
+def ordering_signature(ordering):
+    return [f"{'-' if descending else ''}{name}" for name, descending, _ in ordering]
+
+
+def encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(ordering, values):
+    """Curseur opaque d'une position dans un tri"""
+    payload = json.dumps([ordering_signature(ordering), [encode_value(value) for value in values]],
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering):
+    """Position d'un curseur ; None s'il est illisible ou s'il a été émis pour un autre tri"""
+    try:
+        names, values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if names != ordering_signature(ordering) or not isinstance(values, list) or len(values) != len(names):
+        return None
+    return values
+
+
+def estimate_count(queryset):
+    """Nombre de lignes estimé par le planificateur (PostgreSQL), exact ailleurs"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(PageNumberPagination):
+    """Pagination numérotée, ou par curseur (keyset) sur demande"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Curseur invalide.'
+
+    def wants_cursor(self, request):
+        return (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = False
+        ordering = keyset_ordering(queryset) if self.wants_cursor(request) else None
+        if ordering is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.cursor_mode = True
+        self.request = request
+        self.ordering = ordering
+
+        self.count = None
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+
+        rows = queryset.order_by(*ordering_expressions(ordering))
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position = decode_cursor(cursor, ordering)
+            if position is None:
+                raise NotFound(self.invalid_cursor_message)
+            rows = rows.filter(after_condition(ordering, position))
+        rows = list(rows[:page_size + 1])
+        self.next_cursor = encode_cursor(ordering, position_of(rows[page_size - 1], ordering)) \
+            if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_paginated_response(data)
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
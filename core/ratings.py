@@ -0,0 +1,179 @@
+"""
+Agrégats de notes (somme, nombre d'avis, histogramme) par objet noté.
+
+Chaque critère noté d'un modèle d'avis (la note d'un avis d'événement, les
+quatre notes d'un avis d'artiste) a une ligne `RatingSummary` par objet noté.
+Les créations, modifications et suppressions d'avis y appliquent des deltas
+(UPDATE ... SET total = total + n) dans la transaction de l'avis, puis la
+moyenne et le nombre d'avis du critère principal sont recopiés dans des
+colonnes de l'objet noté : les listes les lisent comme de simples champs.
+
+Les transitions sont appliquées par `RatedReviewModel` (core/models.py) ; la
+commande `rebuild_ratings` recalcule tout à partir des avis.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+RATING_SCALE = range(1, 6)
+
+# Agrégats déclarés, par modèle d'avis (pour la reconstruction)
+rating_aggregates = {}
+
+
+def star_field(value):
+    """Colonne d'histogramme d'une note"""
+    return f'stars_{value}'
+
+
+def rebuild_summaries(summary_model, review_model, scope, parent_attname, criteria):
+    """
+    Recalcule (une requête agrégée par critère) les lignes d'agrégat d'un
+    modèle d'avis. Les modèles sont passés explicitement pour servir aussi
+    aux migrations.
+    """
+    summaries = []
+    for criterion in criteria:
+        rows = review_model._default_manager.order_by().values(parent_attname).annotate(
+            ratings_count=Count('pk'),
+            ratings_sum=Sum(criterion),
+            **{star_field(value): Count('pk', filter=Q(**{criterion: value})) for value in RATING_SCALE},
+        )
+        for row in rows:
+            object_id = row.pop(parent_attname)
+            summaries.append(summary_model(scope=scope, object_id=object_id, criterion=criterion, **row))
+    with transaction.atomic():
+        summary_model._default_manager.filter(scope=scope).delete()
+        summary_model._default_manager.bulk_create(summaries, batch_size=500)
+    return len(summaries)
+
+
+def refresh_rated_columns(summary_model, parent_queryset, scope, criterion, average_field, count_field):
+    """Recopie la moyenne et le nombre d'avis d'un critère dans les colonnes des objets notés"""
+    summary = summary_model._default_manager.filter(scope=scope, criterion=criterion, object_id=OuterRef('pk'))
+    average = Cast(F('ratings_sum'), FloatField()) / NullIf(F('ratings_count'), 0)
+    parent_queryset.update(**{
+        average_field: Coalesce(
+            Subquery(summary.values(rounded=Cast(average, DecimalField(max_digits=3, decimal_places=2)))[:1]),
+            Value(0), output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        count_field: Coalesce(
+            Subquery(summary.values('ratings_count')[:1], output_field=IntegerField()), Value(0)
+        ),
+    })
+
+
+class RatingAggregate:
+    """
+    Agrégats des notes d'un modèle d'avis sur son objet noté.
+
+    S'attache au modèle d'avis comme attribut de classe
+    (`rating_aggregate = RatingAggregate('event')`). Le premier critère est
+    le critère principal, recopié dans `average_field` et `count_field`.
+    """
+
+    def __init__(self, parent_field, criteria=('rating',), average_field='average_rating',
+                 count_field='reviews_count'):
+        self.parent_field = parent_field
+        self.criteria = tuple(criteria)
+        self.average_field = average_field
+        self.count_field = count_field
+        self.model = None
+
+    def contribute_to_class(self, cls, name):
+        self.model = cls
+        setattr(cls, name, self)
+        if not cls._meta.abstract:
+            rating_aggregates[cls._meta.label] = self
+
+    @property
+    def scope(self):
+        return self.model._meta.label_lower
+
+    @property
+    def parent_model(self):
+        return self.model._meta.get_field(self.parent_field).related_model
+
+    @property
+    def parent_attname(self):
+        return self.model._meta.get_field(self.parent_field).attname
+
+    @property
+    def summary_model(self):
+        return apps.get_model('core', 'RatingSummary')
+
+    def snapshot(self, review):
+        """(objet noté, notes) d'un avis"""
+        return getattr(review, self.parent_attname), tuple(getattr(review, criterion) for criterion in self.criteria)
+
+    def apply(self, old, new):
+        """
+        Applique le passage d'un avis de l'état `old` à l'état `new`
+        (snapshots, None pour un avis créé ou supprimé) aux agrégats.
+        """
+        deltas = {}
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            object_id, ratings = state
+            for criterion, value in zip(self.criteria, ratings):
+                delta = deltas.setdefault((object_id, criterion), {'ratings_count': 0, 'ratings_sum': 0})
+                delta['ratings_count'] += sign
+                delta['ratings_sum'] += sign * (value or 0)
+                if value in RATING_SCALE:
+                    delta[star_field(value)] = delta.get(star_field(value), 0) + sign
+        deltas = {key: {field: n for field, n in delta.items() if n}
+                  for key, delta in deltas.items()}
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        manager = self.summary_model._default_manager
+        with transaction.atomic():
+            manager.bulk_create([
+                self.summary_model(scope=self.scope, object_id=object_id, criterion=criterion)
+                for object_id, criterion in deltas
+            ], ignore_conflicts=True)
+            for (object_id, criterion), delta in deltas.items():
+                manager.filter(scope=self.scope, object_id=object_id, criterion=criterion).update(
+                    **{field: F(field) + n for field, n in delta.items()}
+                )
+            self.refresh({object_id for object_id, _ in deltas})
+
+    def refresh(self, object_ids=None):
+        """Recopie les agrégats du critère principal dans les colonnes des objets notés"""
+        queryset = self.parent_model._default_manager.all()
+        if object_ids is not None:
+            queryset = queryset.filter(pk__in=list(object_ids))
+        refresh_rated_columns(
+            self.summary_model, queryset, self.scope, self.criteria[0], self.average_field, self.count_field
+        )
+
+    def summaries(self, parent):
+        """Retourne {critère: {count, average, histogram}} d'un objet noté (une requête)"""
+        rows = {summary.criterion: summary for summary in self.summary_model._default_manager.filter(
+            scope=self.scope, object_id=parent.pk
+        )}
+        summaries = {}
+        for criterion in self.criteria:
+            summary = rows.get(criterion) or self.summary_model()
+            summaries[criterion] = {
+                'count': summary.ratings_count,
+                'average': summary.average,
+                'histogram': summary.get_histogram(),
+            }
+        return summaries
+
+    def forget_deleted(self, sender, instance, **kwargs):
+        """Supprime les agrégats d'un objet noté supprimé (signal post_delete)"""
+        self.summary_model._default_manager.filter(scope=self.scope, object_id=instance.pk).delete()
+
+    def rebuild(self):
+        """Recalcule les agrégats et les colonnes de tous les objets notés ; retourne le nombre de lignes"""
+        with transaction.atomic():
+            rebuilt = rebuild_summaries(
+                self.summary_model, self.model, self.scope, self.parent_attname, self.criteria
+            )
+            self.refresh()
+        return rebuilt
@@ -0,0 +1,120 @@
+"""
+Statistiques globales pré-agrégées (rollups).
+
+Un rollup est un dictionnaire de statistiques (totaux, répartitions) calculé
+par quelques requêtes agrégées et stocké dans `StatsSnapshot` (une ligne par
+rollup). Les actions `stats` le lisent dans le cache, ou dans sa ligne à
+défaut, au lieu de recompter les tables à chaque appel.
+
+L'enregistrement ou la suppression d'un objet d'un modèle dont dépend un
+rollup le marque périmé : un recalcul est programmé après la validation de la
+transaction, regroupant les modifications de la fenêtre `STATS_ROLLUP_DELAY`.
+Les valeurs qui changent sans signal (l'heure courante pour « à venir », les
+compteurs de vues écrits par UPDATE) sont rafraîchies dès que le rollup
+dépasse `STATS_ROLLUP_MAX_AGE` ; la commande `refresh_stats` (tâche
+périodique) recalcule tous les rollups.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rollups déclarés, par nom (pour la commande refresh_stats)
+stats_rollups = {}
+
+
+class StatsRollup:
+    """
+    Statistiques `compute()` (dictionnaire sérialisable en JSON) recalculées
+    lorsque les modèles `depends_on` ("app_label.Model") changent.
+    """
+
+    def __init__(self, name, compute, depends_on=()):
+        self.name = name
+        self.compute = compute
+        self.depends_on = tuple(depends_on)
+        self._lock = threading.Lock()
+        self._timer = None
+        stats_rollups[name] = self
+        for label in self.depends_on:
+            for signal in (post_save, post_delete):
+                signal.connect(self.mark_stale, sender=label, weak=False,
+                               dispatch_uid=f'stats_{name}_{signal is post_save}_{label}')
+
+    @property
+    def cache_key(self):
+        return f'stats:{self.name}'
+
+    @property
+    def asynchronous(self):
+        return getattr(settings, 'STATS_ROLLUP_ASYNC', True)
+
+    def get_delay(self):
+        return getattr(settings, 'STATS_ROLLUP_DELAY', 30)
+
+    def get_max_age(self):
+        return timedelta(seconds=getattr(settings, 'STATS_ROLLUP_MAX_AGE', 300))
+
+    def get_cache_timeout(self):
+        return getattr(settings, 'STATS_ROLLUP_CACHE_TIMEOUT', 60)
+
+    def get(self):
+        """Retourne les statistiques (lecture du cache ou d'une ligne ; calcul au premier appel)"""
+        from .models import StatsSnapshot
+
+        entry = cache.get(self.cache_key)
+        if entry is None:
+            entry = StatsSnapshot.objects.filter(name=self.name).values('data', 'computed_at').first()
+            if entry is None:
+                return self.refresh()
+            cache.set(self.cache_key, entry, self.get_cache_timeout())
+        if entry['computed_at'] < timezone.now() - self.get_max_age():
+            # Valeur servie telle quelle pendant le recalcul
+            self.schedule_refresh()
+        return entry['data']
+
+    def refresh(self):
+        """Recalcule et enregistre les statistiques ; retourne les nouvelles valeurs"""
+        from .models import StatsSnapshot
+
+        data = self.compute()
+        snapshot, _ = StatsSnapshot.objects.update_or_create(name=self.name, defaults={'data': data})
+        cache.set(self.cache_key, {'data': data, 'computed_at': snapshot.computed_at}, self.get_cache_timeout())
+        return data
+
+    def refresh_safely(self):
+        """Recalcul programmé, hors requête"""
+        with self._lock:
+            # Les modifications validées pendant le calcul en programment un nouveau
+            self._timer = None
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Échec du recalcul des statistiques %s", self.name)
+        finally:
+            connection.close()
+
+    def schedule_refresh(self):
+        """Programme un recalcul si aucun n'est en attente dans ce processus"""
+        if not self.asynchronous:
+            self.refresh()
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.get_delay(), self.refresh_safely)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def mark_stale(self, sender, raw=False, **kwargs):
+        """Marque le rollup périmé après une modification (signaux post_save et post_delete)"""
+        if raw:
+            return
+        transaction.on_commit(self.schedule_refresh)
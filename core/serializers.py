@@ -0,0 +1,140 @@
+"""
+Représentations compactes partagées entre applications.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+# Colonnes lues pour une carte de contenu (cours, festival, événement...)
+CONTENT_CARD_FIELDS = ('id', 'title', 'slug', 'start_date', 'city', 'main_image')
+
+
+class ContentCardSerializer(serializers.Serializer):
+    """Carte légère d'un contenu lié : identifiant, titre, slug, date, ville, image"""
+    id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(read_only=True)
+    slug = serializers.SlugField(read_only=True)
+    date = serializers.DateTimeField(source='start_date', read_only=True)
+    city = serializers.CharField(read_only=True)
+    image = serializers.ImageField(source='main_image', read_only=True)
+
+
+def content_card_prefetch(lookup, model_label):
+    """Prefetch d'une relation vers des contenus réduits aux colonnes de la carte"""
+    model = apps.get_model(model_label)
+    return Prefetch(lookup, queryset=model._default_manager.only(*CONTENT_CARD_FIELDS))
+
+
+class DistanceField(serializers.ReadOnlyField):
+    """Distance (km) au point d'une recherche « autour de moi », nulle hors de ces recherches"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        distance = getattr(instance, 'distance', None)
+        return None if distance is None else round(distance, 2)
+
+
+class BufferedCountField(serializers.ReadOnlyField):
+    """
+    Compteur différé (voir core/counters.py), incréments non encore écrits
+    compris ; dans une liste, les deltas de tous les objets sont lus en une fois.
+    """
+
+    def __init__(self, counter, **kwargs):
+        self.counter = counter
+        self._objects = self._deltas = None
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def __deepcopy__(self, memo):
+        # Le compteur (verrous, minuterie) est partagé, pas copié
+        return type(self)(self.counter, **self._kwargs)
+
+    def to_representation(self, instance):
+        parent = getattr(self.parent, 'parent', None)
+        if not isinstance(parent, serializers.ListSerializer) or parent.instance is None:
+            return self.counter.current_value(instance)
+        if self._objects is not parent.instance:
+            self._objects = parent.instance
+            self._deltas = self.counter.pending_many(type(instance), [obj.pk for obj in parent.instance])
+        return getattr(instance, self.counter.field_name) + self._deltas.get(instance.pk, 0)
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    """Paramètres d'une recherche par rayon : point (lat, lng) et rayon en km"""
+    lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    radius = serializers.FloatField(required=False, min_value=0.1)
+
+    def validate(self, data):
+        if (data.get('lat') is None) != (data.get('lng') is None):
+            raise serializers.ValidationError("La latitude et la longitude doivent être fournies ensemble.")
+        max_radius = getattr(settings, 'GEO_MAX_RADIUS_KM', 500)
+        if data.get('radius') is not None and data['radius'] > max_radius:
+            raise serializers.ValidationError(f"Le rayon ne peut pas dépasser {max_radius} km.")
+        if data.get('lat') is not None and data.get('radius') is None:
+            data['radius'] = getattr(settings, 'GEO_DEFAULT_RADIUS_KM', 25)
+        return data
+
+
+class AgendaItemSerializer(ContentCardSerializer):
+    """Entrée de l'agenda unifié : carte de contenu, type, fin et lieu"""
+    type = serializers.CharField(source='agenda_kind', read_only=True)
+    end_date = serializers.DateTimeField(read_only=True)
+    location = serializers.CharField(read_only=True)
+
+
+class AgendaQuerySerializer(serializers.Serializer):
+    """Paramètres de l'agenda unifié : types, période, ville, curseur et taille de page"""
+    types = serializers.CharField(required=False, allow_blank=True)
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    city = serializers.CharField(required=False, allow_blank=True)
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    page_size = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_types(self, value):
+        from .agenda import AGENDA_KINDS
+
+        kinds = [kind.strip() for kind in value.split(',') if kind.strip()]
+        unknown = sorted(set(kinds) - set(AGENDA_KINDS))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Type(s) inconnu(s) : {', '.join(unknown)} (attendus : {', '.join(AGENDA_KINDS)})."
+            )
+        return kinds
+
+    def validate_page_size(self, value):
+        return min(value, getattr(settings, 'AGENDA_MAX_PAGE_SIZE', 100))
+
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] >= data['date_to']:
+            raise serializers.ValidationError("La date de début doit précéder la date de fin.")
+        return data
+
+
+class TagSerializer(serializers.Serializer):
+    """Tag normalisé et nombre de contenus qui le portent"""
+    name = serializers.CharField(source='tag__name', read_only=True)
+    slug = serializers.CharField(source='tag__slug', read_only=True)
+    count = serializers.IntegerField(source='total', read_only=True)
+
+
+class TagQuerySerializer(serializers.Serializer):
+    """Paramètres de recherche de tags : préfixe, type de contenu et nombre de résultats"""
+    q = serializers.CharField(required=False, allow_blank=True)
+    scope = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100)
+
+    def validate_scope(self, value):
+        from .tags import tag_indexes
+
+        if value not in tag_indexes:
+            raise serializers.ValidationError(
+                f"Type de contenu inconnu : {value} (disponibles : {', '.join(sorted(tag_indexes))})."
+            )
+        return value
@@ -0,0 +1,222 @@
+"""
+Recommandations « contenus similaires » par vecteurs TF-IDF.
+
+Chaque document est réduit à des termes pondérés (mots racinisés du titre et
+du texte, termes de catégorie et de niveau) projetés par hachage dans un
+espace de dimension fixe : un vecteur se calcule seul, sans vocabulaire
+global, et se met à jour à l'enregistrement d'un objet sans reconstruction.
+
+Les fréquences de termes sont stockées dans `SimilarityVector` sous forme de
+tableaux NumPy compacts (indices uint32, poids float32). Les IDF sont
+recalculées au chargement de l'index à partir des vecteurs eux-mêmes, puis la
+similarité cosinus et le top-k sont calculés en une passe vectorisée.
+"""
+import math
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.apps import apps
+from django.db import transaction
+
+from .text import analyze
+
+# Index déclarés, par nom (pour la commande rebuild_similarity_index)
+similarity_indexes = {}
+
+# Dimension de l'espace haché (2^18 : collisions négligeables pour un vocabulaire d'articles)
+HASH_BITS = 18
+HASH_DIMENSION = 1 << HASH_BITS
+
+SIMILAR_LIMIT = 6
+
+
+def text_terms(text, weight=1.0):
+    """Retourne les termes analysés d'un texte, pondérés"""
+    terms = Counter()
+    for token in analyze(text or ''):
+        terms[token] += weight
+    return terms
+
+
+def hash_term(term):
+    """Position stable (indépendante du processus) d'un terme dans l'espace haché"""
+    return zlib.crc32(term.encode('utf-8')) & (HASH_DIMENSION - 1)
+
+
+def vectorize(terms):
+    """Retourne (indices, poids) triés d'un ensemble de termes, en TF logarithmique"""
+    hashed = Counter()
+    for term, count in terms.items():
+        if count > 0:
+            hashed[hash_term(term)] += count
+    if not hashed:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(sorted(hashed), dtype=np.uint32, count=len(hashed))
+    weights = np.array([1.0 + math.log(hashed[index]) if hashed[index] >= 1 else hashed[index]
+                        for index in indices.tolist()], dtype=np.float32)
+    return indices, weights
+
+
+class SimilarityMatrix:
+    """Vecteurs d'un index chargés en mémoire, pondérés par les IDF du corpus"""
+
+    def __init__(self, rows):
+        self.object_ids = np.array([object_id for object_id, _, _ in rows], dtype=np.int64)
+        self.positions = {object_id: position for position, (object_id, _, _) in enumerate(rows)}
+        count = len(rows)
+        indices = [np.frombuffer(bytes(data), dtype=np.uint32) for _, data, _ in rows]
+        weights = [np.frombuffer(bytes(data), dtype=np.float32) for _, _, data in rows]
+        lengths = np.array([len(row) for row in indices], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.indices = np.concatenate(indices) if count else np.empty(0, dtype=np.uint32)
+        self.rows = np.repeat(np.arange(count), lengths)
+
+        # IDF lissée calculée sur les vecteurs présents
+        document_frequency = np.bincount(self.indices, minlength=HASH_DIMENSION)
+        idf = np.log((1.0 + count) / (1.0 + document_frequency)).astype(np.float32) + 1.0
+        self.weights = (np.concatenate(weights) if count else np.empty(0, dtype=np.float32)) * idf[self.indices]
+        self.norms = np.sqrt(np.bincount(self.rows, weights=self.weights ** 2, minlength=count))
+
+    def __len__(self):
+        return len(self.object_ids)
+
+    def similar(self, object_id, limit):
+        """Retourne [(id, score)] des `limit` vecteurs les plus proches (cosinus)"""
+        position = self.positions.get(object_id)
+        if position is None or not self.norms[position]:
+            return []
+        start, end = self.offsets[position], self.offsets[position + 1]
+        query_indices, query_weights = self.indices[start:end], self.weights[start:end]
+
+        # Produit scalaire creux : contributions des termes communs avec la requête
+        slots = np.minimum(np.searchsorted(query_indices, self.indices), len(query_indices) - 1)
+        matches = query_indices[slots] == self.indices
+        scores = np.bincount(
+            self.rows[matches],
+            weights=self.weights[matches] * query_weights[slots[matches]],
+            minlength=len(self),
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.nan_to_num(scores / (self.norms * self.norms[position]))
+        scores[position] = 0.0
+
+        limit = min(limit, len(self) - 1)
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(self.object_ids[row]), float(scores[row])) for row in top if scores[row] > 0]
+
+
+class SimilarityIndex:
+    """
+    Index de similarité d'un modèle : `terms(instance)` retourne les termes
+    pondérés d'un objet, `is_indexed(instance)` indique s'il est recommandable.
+    """
+
+    def __init__(self, name, model_label, terms, is_indexed=None, select_related=()):
+        self.name = name
+        self.model_label = model_label
+        self.terms = terms
+        self.is_indexed = is_indexed or (lambda instance: True)
+        self.select_related = select_related
+        self._matrix = None
+        self._matrix_version = None
+        self._lock = threading.Lock()
+        similarity_indexes[name] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def version_label(self):
+        # Version partagée par tous les processus (table ModelVersion, voir core/conditional.py)
+        return f'core.SimilarityVector:{self.name}'
+
+    def update(self, instances):
+        """Met à jour les vecteurs des objets donnés (retire ceux qui ne sont plus indexés)"""
+        from .models import SimilarityVector
+
+        vectors, removed = [], []
+        for instance in instances:
+            if not self.is_indexed(instance):
+                removed.append(instance.pk)
+                continue
+            indices, weights = vectorize(self.terms(instance))
+            vectors.append(SimilarityVector(
+                index=self.name, object_id=instance.pk,
+                indices=indices.tobytes(), weights=weights.tobytes(),
+            ))
+        with transaction.atomic():
+            if vectors:
+                SimilarityVector.objects.bulk_create(
+                    vectors, batch_size=500, update_conflicts=True,
+                    unique_fields=['index', 'object_id'], update_fields=['indices', 'weights', 'updated_at'],
+                )
+            if removed:
+                SimilarityVector.objects.filter(index=self.name, object_id__in=removed).delete()
+        self.invalidate()
+        return len(vectors)
+
+    def remove(self, object_ids):
+        """Retire des objets de l'index"""
+        from .models import SimilarityVector
+
+        SimilarityVector.objects.filter(index=self.name, object_id__in=list(object_ids)).delete()
+        self.invalidate()
+
+    def rebuild(self, batch_size=500):
+        """Recalcule tous les vecteurs ; retourne le nombre d'objets indexés"""
+        from .models import SimilarityVector
+
+        queryset = self.model._default_manager.select_related(*self.select_related).order_by('pk')
+        SimilarityVector.objects.filter(index=self.name).exclude(
+            object_id__in=queryset.values('pk')
+        ).delete()
+        indexed, batch = 0, []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                indexed += self.update(batch)
+                batch = []
+        if batch:
+            indexed += self.update(batch)
+        self.invalidate()
+        return indexed
+
+    def invalidate(self):
+        """Signale aux processus que la matrice en mémoire est périmée (après la validation de la transaction)"""
+        from .conditional import versions_changed
+
+        versions_changed(self.version_label)
+
+    def get_matrix(self):
+        """Matrice en mémoire, rechargée (une requête) lorsque l'index a changé"""
+        from .conditional import get_versions
+        from .models import SimilarityVector
+
+        version = get_versions([self.version_label]).get(self.version_label)
+        with self._lock:
+            if self._matrix is None or version != self._matrix_version:
+                rows = list(SimilarityVector.objects.filter(index=self.name).order_by('object_id')
+                            .values_list('object_id', 'indices', 'weights'))
+                self._matrix = SimilarityMatrix(rows)
+                self._matrix_version = version
+            return self._matrix
+
+    def similar(self, instance, limit=SIMILAR_LIMIT):
+        """Retourne [(id, score)] des objets les plus similaires à `instance`"""
+        return self.get_matrix().similar(instance.pk, limit)
+
+    def similar_objects(self, instance, queryset, limit=SIMILAR_LIMIT):
+        """Retourne les objets de `queryset` les plus similaires, par score décroissant"""
+        # Marge pour les objets que le queryset exclurait (droits, filtres)
+        scores = dict(self.get_matrix().similar(instance.pk, limit * 2))
+        objects = list(queryset.filter(pk__in=list(scores)))
+        objects.sort(key=lambda obj: -scores[obj.pk])
+        for obj in objects:
+            obj.similarity = round(scores[obj.pk], 4)
+        return objects[:limit]
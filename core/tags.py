@@ -0,0 +1,201 @@
+"""
+Index normalisé des tags des contenus.
+
+Les tags restent saisis dans les listes JSON des contenus (`tags`, ou
+`benefits` pour les soins) ; chaque liste est indexée dans une table de liens
+par type de contenu (`CourseTag`, `FestivalTag`…) vers une table commune de
+tags normalisés (`Tag`, identifiés par leur slug : casse et accents ignorés).
+Le filtrage par tag devient une jointure indexée (`tag_id, content_id`) au lieu
+d'un `__contains` sur du JSON.
+
+Les liens sont mis à jour dans la transaction de chaque enregistrement d'un
+contenu (signal post_save), et le nombre de contenus par tag et par type est
+tenu à jour par deltas dans `TagCount` : les nuages de tags lisent des valeurs
+pré-comptées. La commande `rebuild_tags` reconstruit l'index.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils.text import slugify
+
+TAG_MAX_LENGTH = 100
+
+# Index déclarés, par type de contenu (`?scope=`)
+tag_indexes = {}
+
+
+def normalize_tag(name):
+    """Slug d'un tag : minuscules, sans accents ni ponctuation"""
+    return slugify(str(name))[:TAG_MAX_LENGTH]
+
+
+def collect_tags(instance, source_fields):
+    """Retourne {slug: nom} des tags d'un contenu (premier nom rencontré par slug)"""
+    tags = {}
+    for field in source_fields:
+        for name in getattr(instance, field, None) or ():
+            if not isinstance(name, str) or not name.strip():
+                continue
+            slug = normalize_tag(name)
+            if slug:
+                tags.setdefault(slug, name.strip()[:TAG_MAX_LENGTH])
+    return tags
+
+
+def ensure_tags(tag_model, tags):
+    """Crée les tags manquants ; retourne {slug: id} des tags {slug: nom}"""
+    if not tags:
+        return {}
+    manager = tag_model._default_manager
+    manager.bulk_create([tag_model(slug=slug, name=name) for slug, name in tags.items()], ignore_conflicts=True)
+    return dict(manager.filter(slug__in=list(tags)).values_list('slug', 'pk'))
+
+
+def adjust_counts(count_model, scope, tag_ids, delta):
+    """Ajoute `delta` au nombre de contenus de chaque tag pour un type de contenu"""
+    if not tag_ids:
+        return
+    manager = count_model._default_manager
+    manager.bulk_create([count_model(scope=scope, tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True)
+    manager.filter(scope=scope, tag_id__in=list(tag_ids)).update(count=F('count') + delta)
+
+
+def rebuild_tag_links(tag_model, count_model, link_model, content_queryset, scope, source_fields):
+    """
+    Reconstruit les liens et les comptes d'un type de contenu à partir des
+    listes de tags (les migrations en gardent une copie figée) ; retourne le
+    nombre de liens.
+    """
+    rows = [(obj.pk, collect_tags(obj, source_fields))
+            for obj in content_queryset.only('pk', *source_fields).iterator()]
+    all_tags = {}
+    for _, tags in rows:
+        for slug, name in tags.items():
+            all_tags.setdefault(slug, name)
+    with transaction.atomic():
+        tag_ids = ensure_tags(tag_model, all_tags)
+        link_model._default_manager.all().delete()
+        link_model._default_manager.bulk_create([
+            link_model(content_id=pk, tag_id=tag_ids[slug]) for pk, tags in rows for slug in tags
+        ], batch_size=500)
+        counts = link_model._default_manager.order_by().values('tag_id').annotate(total=Count('pk'))
+        count_model._default_manager.filter(scope=scope).delete()
+        count_model._default_manager.bulk_create([
+            count_model(scope=scope, tag_id=row['tag_id'], count=row['total']) for row in counts
+        ], batch_size=500)
+    return sum(len(tags) for _, tags in rows)
+
+
+class TagIndex:
+    """
+    Index des tags d'un type de contenu.
+
+    S'attache au modèle de liens comme attribut de classe
+    (`tag_index = TagIndex('course')`) ; les tags sont lus dans les champs
+    `source_fields` du contenu (clé `content` du modèle de liens).
+    """
+
+    def __init__(self, scope, source_fields=('tags',)):
+        self.scope = scope
+        self.source_fields = tuple(source_fields)
+        self.model = None
+
+    def contribute_to_class(self, cls, name):
+        self.model = cls
+        setattr(cls, name, self)
+        if not cls._meta.abstract:
+            tag_indexes[self.scope] = self
+
+    @property
+    def content_model(self):
+        return self.model._meta.get_field('content').related_model
+
+    @property
+    def tag_model(self):
+        return apps.get_model('core', 'Tag')
+
+    @property
+    def count_model(self):
+        return apps.get_model('core', 'TagCount')
+
+    def sync(self, instance):
+        """Met les liens d'un contenu en accord avec ses listes de tags"""
+        wanted = collect_tags(instance, self.source_fields)
+        links = self.model._default_manager.filter(content_id=instance.pk)
+        with transaction.atomic():
+            current = dict(links.values_list('tag__slug', 'tag_id'))
+            removed = [tag_id for slug, tag_id in current.items() if slug not in wanted]
+            if removed:
+                links.filter(tag_id__in=removed).delete()
+                adjust_counts(self.count_model, self.scope, removed, -1)
+            added = {slug: name for slug, name in wanted.items() if slug not in current}
+            if added:
+                tag_ids = list(ensure_tags(self.tag_model, added).values())
+                self.model._default_manager.bulk_create(
+                    [self.model(content_id=instance.pk, tag_id=tag_id) for tag_id in tag_ids]
+                )
+                adjust_counts(self.count_model, self.scope, tag_ids, 1)
+
+    def after_save(self, sender, instance, raw=False, update_fields=None, **kwargs):
+        """Réindexe un contenu enregistré (signal post_save)"""
+        if raw:
+            return
+        if update_fields is not None and not set(update_fields) & set(self.source_fields):
+            return
+        self.sync(instance)
+
+    def before_delete(self, sender, instance, **kwargs):
+        """Décompte les tags d'un contenu supprimé, avant la suppression de ses liens (signal pre_delete)"""
+        tag_ids = list(self.model._default_manager.filter(content_id=instance.pk).values_list('tag_id', flat=True))
+        adjust_counts(self.count_model, self.scope, tag_ids, -1)
+
+    def filter_q(self, tags):
+        """Condition des contenus portant tous les tags donnés (noms ou slugs)"""
+        condition = Q()
+        for name in tags:
+            links = self.model._default_manager.filter(tag__slug=normalize_tag(name))
+            condition &= Q(pk__in=links.values('content_id'))
+        return condition
+
+    def search_q(self, query):
+        """Condition des contenus portant le tag recherché (slug exact du texte normalisé)"""
+        slug = normalize_tag(query)
+        if not slug:
+            return Q(pk__in=[])
+        return Q(pk__in=self.model._default_manager.filter(tag__slug=slug).values('content_id'))
+
+    def top(self, limit):
+        """Tags les plus utilisés de ce type de contenu (comptes pré-calculés)"""
+        return list(
+            self.count_model._default_manager.filter(scope=self.scope, count__gt=0)
+            .order_by('-count', 'tag__slug').values('tag__name', 'tag__slug', total=F('count'))[:limit]
+        )
+
+    def rebuild(self):
+        """Reconstruit les liens et les comptes ; retourne le nombre de liens"""
+        return rebuild_tag_links(
+            self.tag_model, self.count_model, self.model,
+            self.content_model._default_manager.all(), self.scope, self.source_fields,
+        )
+
+
+def index_for_model(model):
+    """Index des tags d'un modèle de contenu, ou None"""
+    for index in tag_indexes.values():
+        if index.content_model is model:
+            return index
+    return None
+
+
+def lookup_tags(prefix, scope=None, limit=20):
+    """Tags dont le slug commence par `prefix`, avec leur nombre de contenus (d'un type, ou de tous)"""
+    counts = apps.get_model('core', 'TagCount')._default_manager.filter(count__gt=0)
+    slug = normalize_tag(prefix)
+    if slug:
+        counts = counts.filter(tag__slug__startswith=slug)
+    if scope is not None:
+        counts = counts.filter(scope=scope)
+    return list(
+        counts.order_by().values('tag__name', 'tag__slug')
+        .annotate(total=Sum('count')).order_by('-total', 'tag__slug')[:limit]
+    )
@@ -0,0 +1,400 @@
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from competitions.models import Competition
+from courses.models import Course
+from festivals.models import Festival, FestivalTag
+from festivals.views import festival_facets
+from theory.models import Article
+from theory.serializers import ArticleListSerializer, ArticleSerializer
+
+from .agenda import AGENDA_KINDS, agenda_page
+from .counters import BufferedCounter, view_counter
+from .facets import price_ranges
+from .models import Tag, TagCount
+from .tags import adjust_counts
+from .geo import filter_nearby
+from .pagination import KeysetPagination
+
+User = get_user_model()
+
+
+@override_settings(BUFFERED_COUNTERS_ENABLED=True, BUFFERED_COUNTERS_FLUSH_INTERVAL=3600)
+class BufferedCounterTests(TestCase):
+    """Compteurs différés : incréments en attente, écriture par lots et lecture"""
+
+    def setUp(self):
+        author = User.objects.create_user(username='auteur', email='auteur@example.com', password='x')
+        self.articles = [
+            Article.objects.create(title=f'Article {number}', slug=f'article-{number}', content='<p>Texte</p>',
+                                   author=author, published_date=timezone.now())
+            for number in range(2)
+        ]
+        self.article = self.articles[0]
+        self.addCleanup(view_counter.flush)
+
+    def stored(self, article):
+        return Article.objects.values_list('views_count', flat=True).get(pk=article.pk)
+
+    def test_increment_keeps_stored_value_on_instance(self):
+        self.article.increment_views()
+        self.article.increment_views()
+
+        self.assertEqual(self.article.views_count, 0)
+        self.assertEqual(view_counter.pending(self.article), 2)
+        self.assertEqual(view_counter.current_value(self.article), 2)
+        self.assertEqual(self.stored(self.article), 0)
+
+    def test_flush_writes_pending_deltas(self):
+        self.article.increment_views()
+        self.article.increment_views()
+        self.articles[1].increment_views()
+
+        self.assertEqual(view_counter.flush(), 2)
+
+        self.assertEqual(self.stored(self.article), 2)
+        self.assertEqual(self.stored(self.articles[1]), 1)
+        self.assertEqual(view_counter.pending(self.article), 0)
+        self.article.refresh_from_db()
+        self.assertEqual(view_counter.current_value(self.article), 2)
+
+    def test_serializers_include_pending_deltas(self):
+        view_counter.flush()
+        Article.objects.filter(pk=self.article.pk).update(views_count=5)
+        article = Article.objects.get(pk=self.article.pk)
+        article.increment_views()
+        self.articles[1].increment_views()
+        request = APIRequestFactory().get('/')
+
+        detail = ArticleSerializer(article, context={'request': request}).data
+        listing = ArticleListSerializer(Article.objects.order_by('pk'), many=True, context={'request': request}).data
+
+        self.assertEqual(detail['views_count'], 6)
+        self.assertEqual([row['views_count'] for row in listing], [6, 1])
+
+    def test_threshold_flushes_outside_request_thread(self):
+        counter = BufferedCounter('views_count', max_pending=1)
+        with mock.patch('core.counters.threading.Thread') as thread:
+            counter.increment(self.article)
+
+        thread.assert_called_once_with(target=counter.flush_safely, daemon=True)
+        thread.return_value.start.assert_called_once_with()
+        self.assertEqual(self.stored(self.article), 0)
+        counter.flush()
+        self.assertEqual(self.stored(self.article), 1)
+
+
+class KeysetPaginationTests(TestCase):
+    """Pagination par curseur : parcours complet sans ligne sautée ni répétée"""
+
+    def setUp(self):
+        self.creators = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('carla', 'alba', 'bruno')
+        ]
+        start = timezone.now() + timedelta(days=30)
+        # Dates, coordonnées et créateurs répétés : égalités à chaque frontière de page
+        for number in range(13):
+            Festival.objects.create(
+                title=f'Festival {number}', description='Festival', creator=self.creators[number % 3],
+                start_date=start + timedelta(days=number % 4), end_date=start + timedelta(days=number % 4 + 2),
+                registration_deadline=start, location='Salle', city='Paris', base_price=Decimal('50'),
+                latitude=None if number % 3 == 0 else 48.85 + (number % 2) / 100, longitude=2.35,
+            )
+
+    def request(self, **params):
+        return Request(APIRequestFactory().get('/', params))
+
+    def walk(self, queryset, page_size=2):
+        """Identifiants de toutes les pages, en suivant le curseur de chaque page"""
+        paginator = KeysetPagination()
+        params = {'pagination': 'cursor', 'page_size': page_size}
+        pks = []
+        while True:
+            page = paginator.paginate_queryset(queryset, self.request(**params))
+            self.assertLessEqual(len(page), page_size)
+            pks.extend(obj.pk for obj in page)
+            if paginator.next_cursor is None:
+                return pks
+            params = {'cursor': paginator.next_cursor, 'page_size': page_size}
+
+    def expected(self, key):
+        return [festival.pk for festival in sorted(Festival.objects.select_related('creator'), key=key)]
+
+    def test_default_ordering(self):
+        self.assertEqual(self.walk(Festival.objects.all()),
+                         self.expected(lambda festival: (-festival.start_date.timestamp(), festival.pk)))
+
+    def test_descending_nullable_column_nulls_last(self):
+        def key(festival):
+            return (festival.latitude is None, -(festival.latitude or 0), festival.pk)
+
+        for page_size in (1, 2, 5):
+            self.assertEqual(self.walk(Festival.objects.order_by('-latitude'), page_size), self.expected(key))
+        self.assertEqual(
+            self.walk(Festival.objects.order_by(F('latitude').asc())),
+            self.expected(lambda festival: (festival.latitude is None, festival.latitude or 0, festival.pk)),
+        )
+
+    def test_related_field_ordering(self):
+        self.assertEqual(
+            self.walk(Festival.objects.order_by('creator__username', '-start_date')),
+            self.expected(lambda festival: (festival.creator.username, -festival.start_date.timestamp(), festival.pk)),
+        )
+
+    def test_annotation_ordering(self):
+        queryset = filter_nearby(Festival.objects.all(), 48.85, 2.35, 10)
+        pks = self.walk(queryset)
+
+        self.assertEqual(pks, list(queryset.values_list('pk', flat=True)))
+        self.assertEqual(len(pks), Festival.objects.filter(latitude__isnull=False).count())
+        distances = list(queryset.values_list('distance', flat=True))
+        self.assertEqual(distances, sorted(distances))
+
+    def test_api_walk_around_me(self):
+        client = APIClient()
+        url = '/api/festivals/festivals/?lat=48.85&lng=2.35&radius=10&pagination=cursor&page_size=3'
+        pks = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pks.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(len(pks), len(set(pks)))
+        self.assertEqual(set(pks), set(Festival.objects.filter(latitude__isnull=False).values_list('pk', flat=True)))
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        paginator = KeysetPagination()
+        paginator.paginate_queryset(Festival.objects.all(), self.request(pagination='cursor', page_size=2))
+        cursor = paginator.next_cursor
+
+        with self.assertRaises(NotFound):
+            paginator.paginate_queryset(Festival.objects.order_by('start_date'), self.request(cursor=cursor))
+
+        response = APIClient().get('/api/festivals/festivals/', {'cursor': cursor, 'ordering': 'start_date'})
+        self.assertEqual(response.status_code, 404)
+
+
+class AgendaPageTests(TestCase):
+    """Agenda unifié : fusion des sources et curseur (start_date, type, id)"""
+
+    def setUp(self):
+        creator = User.objects.create_user(username='orga', email='orga@example.com', password='x')
+        base = timezone.now().replace(microsecond=0) + timedelta(days=10)
+        # Plusieurs types (et plusieurs objets d'un même type) à chaque date de début
+        sources = [
+            (Course, {'status': 'approved', 'price': Decimal('20')}),
+            (Festival, {'status': 'approved', 'base_price': Decimal('80'), 'registration_deadline': base}),
+            (Competition, {'status': 'registration_open', 'registration_deadline': base}),
+        ]
+        for number in range(14):
+            model, values = sources[number % 3]
+            start_date = base + timedelta(days=number // 3 % 2)
+            model.objects.create(
+                title=f'{model.__name__} {number}', description='Agenda', creator=creator,
+                start_date=start_date, end_date=start_date + timedelta(hours=4),
+                location='Salle', city='Lyon', **values,
+            )
+        Course.objects.create(
+            title='Cours brouillon', description='Agenda', creator=creator, status='pending', price=Decimal('20'),
+            start_date=base, end_date=base + timedelta(hours=4), location='Salle', city='Lyon',
+        )
+
+    def expected(self):
+        rows = [
+            (obj.start_date, AGENDA_KINDS.index(kind), obj.pk, kind)
+            for kind, model, status in (
+                ('course', Course, 'approved'), ('festival', Festival, 'approved'),
+                ('competition', Competition, 'registration_open'),
+            )
+            for obj in model.objects.filter(status=status)
+        ]
+        return [(kind, pk) for _, _, pk, kind in sorted(rows)]
+
+    def walk(self, page_size, **filters):
+        pages, cursor = [], None
+        while True:
+            objects, cursor = agenda_page(page_size, cursor=cursor, **filters)
+            pages.append([(obj.agenda_kind, obj.pk) for obj in objects])
+            if cursor is None:
+                return pages
+            # Un curseur qui ne progresse pas reservirait les mêmes lignes indéfiniment
+            self.assertLessEqual(len(pages) * page_size, 14)
+
+    def test_pages_follow_global_order_across_ties(self):
+        expected = self.expected()
+        self.assertEqual(len(expected), 14)
+        for page_size in range(1, 7):
+            pages = self.walk(page_size)
+            # Pages complètes sauf la dernière, dans l'ordre, sans doublon ni trou
+            self.assertTrue(all(len(page) == page_size for page in pages[:-1]), page_size)
+            self.assertLessEqual(len(pages[-1]), page_size)
+            self.assertEqual([item for page in pages for item in page], expected, page_size)
+
+    def test_kinds_filter(self):
+        pages = self.walk(2, kinds=['festival', 'competition'])
+
+        self.assertEqual([item for page in pages for item in page],
+                         [item for item in self.expected() if item[0] != 'course'])
+
+
+class FacetSetTests(TestCase):
+    """Comptes de facettes : chaque facette ignore son propre filtre et applique les autres"""
+
+    def setUp(self):
+        creator = User.objects.create_user(username='orga', email='orga@example.com', password='x')
+        start = timezone.now() + timedelta(days=30)
+        cities = [('Paris', 'France'), ('Lyon', 'France'), ('Barcelone', 'Espagne')]
+        prices = [Decimal('0'), Decimal('15'), Decimal('35'), Decimal('75'), Decimal('120')]
+        for number in range(30):
+            city, country = cities[number % 3]
+            price = prices[number % 5]
+            Festival.objects.create(
+                title=f'Festival {number}', description='Festival', creator=creator,
+                start_date=start, end_date=start + timedelta(days=2), registration_deadline=start,
+                location='Salle', city=city, country=country, base_price=price, is_free=not price and number % 2 == 0,
+            )
+
+    def values_of(self, festival):
+        """Valeur de chaque facette pour un festival"""
+        price_range = next(
+            value for value in reversed(price_ranges())
+            if festival.base_price >= Decimal(value.rstrip('+').split('-')[0])
+        )
+        return {'city': festival.city, 'country': festival.country, 'price_range': price_range,
+                'is_free': festival.is_free}
+
+    def matches(self, values, name, selected):
+        if name in ('city', 'country'):
+            return selected.lower() in values[name].lower()
+        return values[name] == selected
+
+    def expected(self, params):
+        rows = [self.values_of(festival) for festival in Festival.objects.all()]
+        return {
+            name: Counter(
+                values[name] for values in rows
+                if all(self.matches(values, other, value) for other, value in params.items() if other != name)
+            )
+            for name in ('city', 'country', 'price_range', 'is_free')
+        }
+
+    def test_each_facet_ignores_only_its_own_filter(self):
+        for params in [
+            {},
+            {'city': 'Paris'},
+            {'city': 'Paris', 'price_range': '20-50'},
+            {'country': 'France', 'is_free': True},
+            {'city': 'lyon', 'country': 'France', 'price_range': '0-20', 'is_free': False},
+        ]:
+            facets = festival_facets.compute(Festival.objects.all(), params)
+            computed = {
+                name: {entry['value']: entry['count'] for entry in entries if entry['count']}
+                for name, entries in facets.items()
+            }
+            self.assertEqual(computed, self.expected(params), params)
+
+    def test_selected_value_keeps_other_values(self):
+        facets = festival_facets.compute(Festival.objects.all(), {'city': 'Paris', 'price_range': '100+'})
+
+        cities = {entry['value']: entry['count'] for entry in facets['city']}
+        self.assertEqual(cities, {'Paris': 2, 'Lyon': 2, 'Barcelone': 2})
+        # Tranches : toutes listées, comptes limités à Paris
+        self.assertEqual([entry['value'] for entry in facets['price_range']], price_ranges())
+        self.assertEqual({entry['value']: entry['count'] for entry in facets['price_range']},
+                         {'0-20': 4, '20-50': 2, '50-100': 2, '100+': 2})
+
+
+class TagIndexTests(TestCase):
+    """Index des tags : liens et comptes par deltas, comparés à une reconstruction"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='orga', email='orga@example.com', password='x')
+        self.start = timezone.now() + timedelta(days=30)
+        self.index = FestivalTag.tag_index
+
+    def festival(self, number, tags):
+        return Festival.objects.create(
+            title=f'Festival {number}', description='Festival', creator=self.creator,
+            start_date=self.start, end_date=self.start + timedelta(days=2), registration_deadline=self.start,
+            location='Salle', city='Paris', base_price=Decimal('50'), tags=tags,
+        )
+
+    def counts(self):
+        return dict(TagCount.objects.filter(scope='festival', count__gt=0).values_list('tag__slug', 'count'))
+
+    def links(self, festival):
+        return sorted(FestivalTag.objects.filter(content=festival).values_list('tag__slug', flat=True))
+
+    def assertCountsMatchRebuild(self, expected):
+        self.assertEqual(self.counts(), expected)
+        self.index.rebuild()
+        self.assertEqual(self.counts(), expected)
+
+    def test_add_and_remove(self):
+        first = self.festival(1, ['Bachata', 'Sensual', 'bachata'])
+        second = self.festival(2, ['Bachata', 'Kizomba'])
+        self.assertEqual(self.links(first), ['bachata', 'sensual'])
+        self.assertEqual(self.counts(), {'bachata': 2, 'sensual': 1, 'kizomba': 1})
+
+        first.tags = ['Bachata', 'Dominicaine']
+        first.save()
+        second.tags = []
+        second.save()
+
+        self.assertEqual(self.links(first), ['bachata', 'dominicaine'])
+        self.assertEqual(self.links(second), [])
+        self.assertCountsMatchRebuild({'bachata': 1, 'dominicaine': 1})
+
+    def test_rename_with_same_slug(self):
+        festival = self.festival(1, ['Bachata Sensual', 'Zouk'])
+        link_ids = set(FestivalTag.objects.filter(content=festival).values_list('pk', flat=True))
+
+        festival.tags = ['bachata sensual', 'ZOUK']
+        festival.save()
+
+        # Même slug : liens conservés, comptes inchangés, nom d'origine gardé
+        self.assertEqual(set(FestivalTag.objects.filter(content=festival).values_list('pk', flat=True)), link_ids)
+        self.assertEqual(Tag.objects.get(slug='bachata-sensual').name, 'Bachata Sensual')
+        self.assertCountsMatchRebuild({'bachata-sensual': 1, 'zouk': 1})
+
+    def test_save_without_tag_fields_skips_sync(self):
+        festival = self.festival(1, ['Bachata'])
+        festival.tags = ['Salsa']
+        festival.save(update_fields=['title'])
+
+        self.assertEqual(self.links(festival), ['bachata'])
+        self.assertEqual(self.counts(), {'bachata': 1})
+
+    def test_content_deletion(self):
+        festivals = [self.festival(number, ['Bachata', f'Ville {number % 2}']) for number in range(4)]
+
+        festivals[0].delete()
+        self.assertEqual(self.counts(), {'bachata': 3, 'ville-0': 1, 'ville-1': 2})
+        Festival.objects.filter(pk__in=[festivals[1].pk, festivals[2].pk]).delete()
+
+        deleted = [festival.pk for festival in festivals[:3]]
+        self.assertFalse(FestivalTag.objects.filter(content_id__in=deleted).exists())
+        self.assertCountsMatchRebuild({'bachata': 1, 'ville-1': 1})
+
+    def test_adjust_counts_creates_missing_rows(self):
+        tag = Tag.objects.create(name='Bachata', slug='bachata')
+
+        adjust_counts(TagCount, 'festival', [tag.pk], 1)
+        adjust_counts(TagCount, 'festival', [tag.pk], 1)
+        adjust_counts(TagCount, 'festival', [tag.pk], -1)
+        adjust_counts(TagCount, 'festival', [], 1)
+
+        self.assertEqual(TagCount.objects.get(scope='festival', tag=tag).count, 1)
+        self.assertFalse(TagCount.objects.filter(scope='course').exists())
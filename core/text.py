@@ -0,0 +1,111 @@
+"""
+Outils d'analyse de texte partagés (HTML → texte, normalisation, racinisation).
+
+La racinisation est un « light stemmer » français : elle retire les suffixes
+flexionnels et dérivationnels les plus courants après suppression des accents,
+ce qui suffit à rapprocher « danse », « danses », « danseur » et « danseuse ».
+"""
+import html
+import re
+import unicodedata
+
+TAG_RE = re.compile(r'<[^>]+>')
+BLOCK_TAG_RE = re.compile(r'</?(p|div|br|li|ul|ol|h[1-6]|blockquote|tr|table|section|article)\b[^>]*>', re.IGNORECASE)
+SCRIPT_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+FRENCH_STOP_WORDS = frozenset("""
+a ai au aux avec c ce ces cet cette d dans de des du elle elles en est et eu
+il ils j je l la le les leur leurs lui m ma mais me mes moi mon n ne nos notre
+nous on ou par pour qu que qui s sa se ses son sont sur t ta te tes toi ton tu
+un une vos votre vous y
+""".split())
+
+# Suffixes testés du plus long au plus court (texte déjà sans accents)
+FRENCH_SUFFIXES = (
+    'issements', 'issement', 'atrices', 'ateurs', 'ations', 'ements',
+    'atrice', 'ateur', 'ation', 'ement', 'ances', 'ences', 'euses', 'ismes',
+    'istes', 'iques', 'ables', 'ance', 'ence', 'euse', 'isme', 'iste', 'ique',
+    'able', 'ites', 'eurs', 'ite', 'eur', 'ees', 'ee', 'es', 'er', 'ez', 'e',
+    's', 'x',
+)
+MIN_STEM_LENGTH = 3
+
+
+def strip_html(value):
+    """Convertit un contenu HTML en texte brut (blocs séparés par des espaces)"""
+    if not value:
+        return ''
+    text = SCRIPT_RE.sub(' ', value)
+    text = BLOCK_TAG_RE.sub(' ', text)
+    text = TAG_RE.sub('', text)
+    return WHITESPACE_RE.sub(' ', html.unescape(text)).strip()
+
+
+def fold_accents(value):
+    """Supprime les accents et met en minuscules (« Élégance » → « elegance »)"""
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def stem_french(word):
+    """Réduit un mot (minuscule, sans accents) à sa racine approximative"""
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return word
+    if word.endswith('aux') and len(word) > 4:
+        return word[:-3] + 'al'
+    for suffix in FRENCH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(value):
+    """Découpe un texte brut en mots normalisés (sans accents, en minuscules)"""
+    return WORD_RE.findall(fold_accents(value))
+
+
+def analyze(value):
+    """Retourne les racines des mots significatifs d'un texte brut"""
+    return [stem_french(token) for token in tokenize(value) if token not in FRENCH_STOP_WORDS]
+
+
+def highlight(text, terms, max_length=240, tag='mark', prefix=None):
+    """
+    Retourne un extrait du texte centré sur la première occurrence d'un des
+    termes (racines, ou mots commençant par `prefix`), les occurrences étant
+    entourées de la balise `tag`.
+    """
+    terms = set(terms)
+
+    def matches_term(word):
+        folded = fold_accents(word)
+        return stem_french(folded) in terms or bool(prefix and folded.startswith(prefix))
+
+    matches = [match for match in WORD_RE.finditer(text) if matches_term(match.group())]
+    if not matches:
+        snippet = text[:max_length]
+        return html.escape(snippet) + ('…' if len(text) > max_length else '')
+
+    start = max(0, matches[0].start() - max_length // 4)
+    if start:
+        # Commence l'extrait sur un début de mot
+        space = text.rfind(' ', 0, start)
+        start = space + 1 if space != -1 else 0
+    end = min(len(text), start + max_length)
+
+    parts = ['…'] if start else []
+    position = start
+    for match in matches:
+        if match.start() < start:
+            continue
+        if match.end() > end:
+            break
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f'<{tag}>{html.escape(match.group())}</{tag}>')
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    if end < len(text):
+        parts.append('…')
+    return ''.join(parts)
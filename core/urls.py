@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('agenda/', views.agenda_view, name='agenda'),
+    path('home/', views.home_view, name='home'),
+    path('tags/', views.tags_view, name='tags'),
+    path('tags/top/', views.top_tags_view, name='top-tags'),
+]
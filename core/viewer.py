@@ -0,0 +1,125 @@
+"""
+Contexte de l'utilisateur courant (« viewer ») pour les sérialiseurs et permissions.
+
+Les informations propres à l'utilisateur (favoris, progression, inscriptions…)
+sont chargées en une requête par relation pour tous les objets d'une page, puis
+partagées par les sérialiseurs et les classes de permission via la requête.
+"""
+from django.apps import apps
+from rest_framework import serializers
+
+VIEWER_CONTEXT_ATTR = '_viewer_context'
+
+
+class ViewerRelation:
+    """
+    Relation entre l'utilisateur courant et un objet, portée par un modèle
+    intermédiaire (ex. FormationFavorite entre User et FormationArticle).
+    """
+
+    def __init__(self, model, object_field, user_field='user', filters=None, select_related=()):
+        self.model_label = model
+        self.object_field = object_field
+        self.user_field = user_field
+        self.filters = filters or {}
+        self.select_related = tuple(select_related)
+
+    def __repr__(self):
+        return f"<ViewerRelation {self.model_label}.{self.object_field}>"
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def fetch(self, user, object_ids):
+        """Retourne {id de l'objet: ligne} pour l'utilisateur et les objets donnés"""
+        queryset = self.model.objects.filter(
+            **{self.user_field: user, f'{self.object_field}_id__in': object_ids},
+            **self.filters
+        ).select_related(*self.select_related).order_by('pk')
+        return {getattr(row, f'{self.object_field}_id'): row for row in queryset}
+
+
+class ViewerContext:
+    """Cache, pour une requête, des lignes liant l'utilisateur courant aux objets affichés"""
+
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self._rows = {}
+
+    def preload(self, relation, object_ids):
+        """Charge en une requête les lignes des objets pas encore connus"""
+        rows = self._rows.setdefault(relation, {})
+        missing = {object_id for object_id in object_ids if object_id not in rows}
+        if not missing:
+            return
+        if self.user is None:
+            found = {}
+        else:
+            found = relation.fetch(self.user, missing)
+        for object_id in missing:
+            rows[object_id] = found.get(object_id)
+
+    def get(self, relation, object_id):
+        """Retourne la ligne liant l'utilisateur à l'objet, ou None"""
+        if self.user is None:
+            return None
+        self.preload(relation, [object_id])
+        return self._rows[relation][object_id]
+
+    def has(self, relation, object_id):
+        """Indique si l'utilisateur est lié à l'objet par la relation"""
+        return self.get(relation, object_id) is not None
+
+    def forget(self, relation, object_id):
+        """Invalide une ligne après une écriture pendant la requête"""
+        self._rows.get(relation, {}).pop(object_id, None)
+
+
+def get_viewer_context(request):
+    """Retourne le contexte viewer de la requête, en le créant au besoin"""
+    if request is None:
+        return ViewerContext(None)
+    context = getattr(request, VIEWER_CONTEXT_ATTR, None)
+    if context is None:
+        context = ViewerContext(getattr(request, 'user', None))
+        setattr(request, VIEWER_CONTEXT_ATTR, context)
+    return context
+
+
+class ViewerContextListSerializer(serializers.ListSerializer):
+    """ListSerializer qui précharge le contexte viewer de toute la page avant la sérialisation"""
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, 'all') else data
+        instances = list(iterable)
+        preload = getattr(self.child, 'preload_viewer_context', None)
+        if preload is not None:
+            preload(instances)
+        return super().to_representation(instances)
+
+
+class ViewerContextMixin:
+    """
+    Mixin de sérialiseur : déclare les relations viewer utilisées et donne
+    accès au contexte partagé. Les sérialiseurs concernés doivent définir
+    `list_serializer_class = ViewerContextListSerializer` dans leur Meta.
+    """
+    viewer_relations = ()
+
+    @property
+    def viewer_context(self):
+        return get_viewer_context(self.context.get('request'))
+
+    def preload_viewer_context(self, instances):
+        """Charge les relations viewer pour les instances d'une page"""
+        context = self.viewer_context
+        if context.user is None:
+            return
+        object_ids = [instance.pk for instance in instances]
+        for relation in self.viewer_relations:
+            context.preload(relation, object_ids)
+
+    def viewer_row(self, relation, obj):
+        """Retourne la ligne liant l'utilisateur courant à l'objet, ou None"""
+        return self.viewer_context.get(relation, obj.pk)
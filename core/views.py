@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .agenda import InvalidCursor, agenda_page
+from .home import home_page, home_sections
+from .serializers import AgendaItemSerializer, AgendaQuerySerializer, TagQuerySerializer, TagSerializer
+from .tags import lookup_tags, tag_indexes
+
+TAG_LIMIT = 20
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def agenda_view(request):
+    """
+    Agenda unifié (événements, cours, festivals, compétitions, trainings) par
+    ordre chronologique, paginé par curseur : `?types=event,course`,
+    `?date_from=...&date_to=...` (à venir par défaut), `?city=...`
+    """
+    serializer = AgendaQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    page_size = params.get('page_size') or getattr(settings, 'AGENDA_PAGE_SIZE', 20)
+
+    try:
+        objects, next_cursor = agenda_page(
+            page_size,
+            cursor=params.get('cursor') or None,
+            kinds=params.get('types') or None,
+            date_from=params.get('date_from') or timezone.now(),
+            date_to=params.get('date_to'),
+            city=params.get('city'),
+        )
+    except InvalidCursor:
+        return Response({'error': 'Curseur invalide'}, status=status.HTTP_400_BAD_REQUEST)
+
+    next_url = None
+    if next_cursor:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+    return Response({
+        'next': next_url,
+        'results': AgendaItemSerializer(objects, many=True, context={'request': request}).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def home_view(request):
+    """
+    Sections de la page d'accueil en une réponse (statistiques, contenus à
+    venir et en vedette), servies depuis le cache : `?sections=stats,upcoming`
+    """
+    names = [name for name in request.query_params.get('sections', '').split(',') if name]
+    unknown = [name for name in names if name not in home_sections]
+    if unknown:
+        return Response({'error': f"Sections inconnues : {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(home_page(request, names))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def tags_view(request):
+    """
+    Recherche de tags par préfixe (autocomplétion), avec le nombre de contenus
+    qui les portent : `?q=sens&scope=course&limit=10`
+    """
+    serializer = TagQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    tags = lookup_tags(params.get('q', ''), scope=params.get('scope'), limit=params.get('limit') or TAG_LIMIT)
+    return Response(TagSerializer(tags, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def top_tags_view(request):
+    """Nuage de tags : tags les plus utilisés, d'un type de contenu (`?scope=`) ou de tous"""
+    serializer = TagQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    limit = params.get('limit') or TAG_LIMIT
+    if params.get('scope'):
+        tags = tag_indexes[params['scope']].top(limit)
+    else:
+        tags = lookup_tags('', limit=limit)
+    return Response(TagSerializer(tags, many=True).data)
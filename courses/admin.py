@@ -57,7 +57,7 @@ class CourseAdmin(admin.ModelAdmin):
             'fields': ('max_participants', 'current_participants')
         }),
         ('Horaires et localisation', {
-            'fields': ('start_date', 'end_date', 'duration_minutes', 'location', 'address', 'city', 'postal_code')
+            'fields': ('start_date', 'end_date', 'duration_minutes', 'location', 'address', 'city', 'postal_code', 'latitude', 'longitude')
         }),
         ('Prix et inscriptions', {
             'fields': ('price', 'currency', 'is_free')
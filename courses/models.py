@@ -3,6 +3,10 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from core.calendar import CalendarFeed
+from core.capacity import SeatCapacity
+from core.models import AtomicCountersModel, GeoLocatedModel, SeatHoldingModel, TagLinkModel
+from core.tags import TagIndex
 
 User = get_user_model()
 
@@ -21,8 +25,12 @@ class CourseCategory(models.Model):
     def __str__(self):
         return self.name
 
-class Course(models.Model):
+class Course(GeoLocatedModel, AtomicCountersModel):
     """Modèle pour les cours de bachata"""
+    # Compteur tenu par les réservations atomiques (voir core/capacity.py)
+    atomic_fields = ('current_participants',)
+    calendar_feed = CalendarFeed('course')
+    
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('pending', 'En attente de validation'),
@@ -170,8 +178,21 @@ class Course(models.Model):
         now = timezone.now()
         return self.start_date <= now <= self.end_date
 
-class CourseEnrollment(models.Model):
+class CourseTag(TagLinkModel):
+    """Lien entre un cours et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Cours'))
+    tag_index = TagIndex('course')
+
+    class Meta:
+        verbose_name = _("Tag de cours")
+        verbose_name_plural = _("Tags de cours")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
+
+class CourseEnrollment(SeatHoldingModel):
     """Inscription à un cours"""
+    seat_capacity = SeatCapacity('course')
+    
     STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('confirmed', 'Confirmé'),
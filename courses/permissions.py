@@ -1,5 +1,10 @@
 from rest_framework import permissions
 
+from core.viewer import ViewerRelation, get_viewer_context
+
+# Inscription de l'utilisateur courant à un cours, partagée avec le contexte viewer
+ENROLLMENT_RELATION = ViewerRelation('courses.CourseEnrollment', 'course', user_field='participant')
+
 class IsCreatorOrReadOnly(permissions.BasePermission):
     """
     Permission personnalisée permettant aux créateurs de modifier leurs cours
@@ -65,12 +70,8 @@ class IsEnrolledParticipant(permissions.BasePermission):
         
         # Les participants inscrits peuvent voir les détails
         if request.user.is_authenticated:
-            from .models import CourseEnrollment
-            return CourseEnrollment.objects.filter(
-                course=obj,
-                participant=request.user,
-                status__in=['confirmed', 'pending']
-            ).exists()
+            enrollment = get_viewer_context(request).get(ENROLLMENT_RELATION, obj.pk)
+            return enrollment is not None and enrollment.status in ['confirmed', 'pending']
         
         return False
 
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import Course, CourseCategory, CourseEnrollment
 from accounts.serializers import UserSerializer
+from core.capacity import CapacityError
+from core.facets import price_ranges
+from core.serializers import DistanceField, NearbyQuerySerializer
 
 class CourseCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,6 +18,7 @@ class CourseSerializer(serializers.ModelSerializer):
     is_ongoing = serializers.ReadOnlyField()
     is_full = serializers.ReadOnlyField()
     available_spots = serializers.ReadOnlyField()
+    distance = DistanceField()
     
     class Meta:
         model = Course
@@ -23,7 +27,7 @@ class CourseSerializer(serializers.ModelSerializer):
             'creator', 'category', 'category_id', 'status', 'difficulty',
             'max_participants', 'current_participants', 'start_date', 'end_date',
             'duration_minutes', 'location', 'address', 'city', 'postal_code',
-            'price', 'currency', 'is_free', 'content', 'prerequisites',
+            'latitude', 'longitude', 'distance', 'price', 'currency', 'is_free', 'content', 'prerequisites',
             'materials_needed', 'main_image', 'gallery', 'tags',
             'is_upcoming', 'is_ongoing', 'is_full', 'available_spots',
             'created_at', 'updated_at'
@@ -115,12 +119,11 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
         # Définir le participant automatiquement
         validated_data['participant'] = self.context['request'].user
         
-        # Mettre à jour le nombre de participants du cours
-        course = Course.objects.get(id=validated_data['course_id'])
-        course.current_participants += 1
-        course.save()
-        
-        return super().create(validated_data)
+        # La place est réservée atomiquement à l'enregistrement de l'inscription
+        try:
+            return super().create(validated_data)
+        except CapacityError:
+            raise serializers.ValidationError("Ce cours est complet.")
 
 class CourseEnrollmentUpdateSerializer(serializers.ModelSerializer):
     """Sérialiseur pour mettre à jour une inscription"""
@@ -136,8 +139,15 @@ class CourseEnrollmentUpdateSerializer(serializers.ModelSerializer):
                 "Impossible de modifier une inscription terminée."
             )
         return value
+    
+    def update(self, instance, validated_data):
+        # Réactiver une inscription annulée reprend une place, si elle est libre
+        try:
+            return super().update(instance, validated_data)
+        except CapacityError:
+            raise serializers.ValidationError("Ce cours est complet.")
 
-class CourseSearchSerializer(serializers.Serializer):
+class CourseSearchSerializer(NearbyQuerySerializer):
     """Sérialiseur pour la recherche de cours"""
     query = serializers.CharField(required=False, allow_blank=True)
     category = serializers.IntegerField(required=False)
@@ -148,9 +158,13 @@ class CourseSearchSerializer(serializers.Serializer):
     price_min = serializers.DecimalField(required=False, max_digits=8, decimal_places=2)
     price_max = serializers.DecimalField(required=False, max_digits=8, decimal_places=2)
     is_free = serializers.BooleanField(required=False)
+    price_range = serializers.ChoiceField(choices=price_ranges(), required=False)
     status = serializers.CharField(required=False, default='approved')
+    facets = serializers.BooleanField(required=False, default=False)
     
     def validate(self, data):
+        data = super().validate(data)
+        
         # Vérifier que la date de fin est après la date de début
         if data.get('start_date') and data.get('end_date'):
             if data['start_date'] >= data['end_date']:
@@ -0,0 +1,29 @@
+"""
+Statistiques globales de la page d'accueil (rollup lu par `CourseViewSet.stats`)
+"""
+from django.db.models import Count
+
+from artists.models import ArtistProfile
+from core.rollups import StatsRollup
+
+from .models import Course, CourseEnrollment
+
+
+def compute_home_stats():
+    """Calcule les chiffres clés : cours, participants, artistes, villes"""
+    courses = Course.objects.filter(status='approved').order_by().aggregate(
+        total=Count('pk'), cities=Count('city', distinct=True)
+    )
+    return {
+        'courses_count': courses['total'],
+        'total_participants': CourseEnrollment.objects.filter(course__status='approved').count(),
+        'artists_count': ArtistProfile.objects.filter(is_verified=True).count(),
+        'cities_count': courses['cities'],
+    }
+
+
+home_stats = StatsRollup(
+    'home',
+    compute_home_stats,
+    depends_on=('courses.Course', 'courses.CourseEnrollment', 'artists.ArtistProfile'),
+)
@@ -1,5 +1,6 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
@@ -7,16 +8,32 @@ from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from .models import Course, CourseCategory, CourseEnrollment
+from .models import Course, CourseCategory, CourseEnrollment, CourseTag
 from .serializers import (
     CourseSerializer, CourseDetailSerializer, CourseCategorySerializer,
     CourseEnrollmentSerializer, CourseEnrollmentUpdateSerializer,
     CourseSearchSerializer
 )
 from .permissions import IsCreatorOrReadOnly, IsAdminOrReadOnly
+from .stats import home_stats
+from core.calendar import ICalendarRenderer, calendar_response, upcoming
+from core.capacity import CapacityError
+from core.conditional import ConditionalMixin
+from core.facets import Facet, FacetSet, free_facet, price_facet, with_facets
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import NearbyFilterBackend, TagFilterBackend, apply_nearby
 from festivals.serializers import FestivalSerializer
 
-class CourseCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Facettes de la recherche de cours (voir core/facets.py)
+course_facets = FacetSet('courses', [
+    Facet('city', 'city', lookup='icontains'),
+    Facet('difficulty', 'difficulty', choices=Course.DIFFICULTY_CHOICES),
+    Facet('category', 'category_id', label_field='category__name'),
+    price_facet('price'),
+    free_facet(Q(is_free=True)),
+], models=('courses.Course', 'courses.CourseCategory'))
+
+class CourseCategoryViewSet(ConditionalMixin, viewsets.ReadOnlyModelViewSet):
     """Vue pour les catégories de cours (lecture seule)"""
     queryset = CourseCategory.objects.all()
     serializer_class = CourseCategorySerializer
@@ -25,17 +42,22 @@ class CourseCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    conditional_models = ('courses.CourseCategory',)
+    cache_control = {'list': {'max_age': 300}, 'retrieve': {'max_age': 300}}
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """Vue pour les cours"""
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsCreatorOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, NearbyFilterBackend, TagFilterBackend]
     filterset_fields = ['status', 'difficulty', 'category', 'city', 'is_free']
     search_fields = ['title', 'description', 'location', 'city']
     ordering_fields = ['start_date', 'price', 'created_at', 'current_participants']
     ordering = ['-start_date']
+    conditional_models = ('courses.Course', 'courses.CourseCategory', 'courses.CourseEnrollment', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'upcoming', 'featured')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = Course.objects.select_related('creator', 'category', 'approved_by')
@@ -80,31 +102,25 @@ class CourseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if course.is_full:
+        if course.status != 'approved':
             return Response(
-                {"error": "Ce cours est complet."},
+                {"error": "Ce cours n'est pas encore approuvé."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Créer l'inscription
-        enrollment_data = {
-            'course_id': course.id,
-            'status': 'pending'
-        }
-        
-        serializer = CourseEnrollmentSerializer(
-            data=enrollment_data,
-            context={'request': request}
-        )
-        
-        if serializer.is_valid():
-            enrollment = serializer.save()
+        # Réservation atomique de la place ; une requête rejouée renvoie l'inscription existante
+        try:
+            enrollment, created = CourseEnrollment.seat_capacity.enroll(course, user, status='pending')
+        except CapacityError:
             return Response(
-                CourseEnrollmentSerializer(enrollment, context={'request': request}).data,
-                status=status.HTTP_201_CREATED
+                {"error": "Ce cours est complet."},
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            CourseEnrollmentSerializer(enrollment, context={'request': request}).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def unenroll(self, request, pk=None):
@@ -118,10 +134,7 @@ class CourseViewSet(viewsets.ModelViewSet):
                 participant=user
             )
             
-            # Mettre à jour le nombre de participants
-            course.current_participants = max(0, course.current_participants - 1)
-            course.save()
-            
+            # La place est libérée à la suppression de l'inscription
             enrollment.delete()
             return Response({"message": "Désinscription réussie"}, status=status.HTTP_200_OK)
             
@@ -182,7 +195,7 @@ class CourseViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def search(self, request):
-        """Recherche avancée de cours"""
+        """Recherche avancée de cours (`facets: true` : comptes par facette, voir core/facets.py)"""
         serializer = CourseSearchSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -194,15 +207,6 @@ class CourseViewSet(viewsets.ModelViewSet):
         if data.get('status'):
             queryset = queryset.filter(status=data['status'])
         
-        if data.get('category'):
-            queryset = queryset.filter(category_id=data['category'])
-        
-        if data.get('difficulty'):
-            queryset = queryset.filter(difficulty=data['difficulty'])
-        
-        if data.get('city'):
-            queryset = queryset.filter(city__icontains=data['city'])
-        
         if data.get('start_date'):
             queryset = queryset.filter(start_date__gte=data['start_date'])
         
@@ -215,9 +219,6 @@ class CourseViewSet(viewsets.ModelViewSet):
         if data.get('price_max') is not None:
             queryset = queryset.filter(price__lte=data['price_max'])
         
-        if data.get('is_free') is not None:
-            queryset = queryset.filter(is_free=data['is_free'])
-        
         # Recherche textuelle
         if data.get('query'):
             query = data['query']
@@ -226,52 +227,37 @@ class CourseViewSet(viewsets.ModelViewSet):
                 Q(description__icontains=query) |
                 Q(location__icontains=query) |
                 Q(city__icontains=query) |
-                Q(tags__contains=[query])
+                CourseTag.tag_index.search_q(query)
             )
         
-        # Tri par défaut
-        queryset = queryset.order_by('start_date')
+        # Filtres à facettes : ville, niveau, catégorie, tranche de prix, gratuité
+        results = course_facets.apply(queryset, data)
         
-        page = self.paginate_queryset(queryset)
+        # Tri par défaut (par distance pour une recherche autour d'un point)
+        results = apply_nearby(results.order_by('start_date'), data)
+        
+        page = self.paginate_queryset(results)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(results, many=True).data)
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        if data['facets']:
+            # Comptes calculés hors filtres de facettes (chaque facette ignore son propre filtre)
+            counts = course_facets.counts(apply_nearby(queryset, data, order=False), data, vary=[request.user.pk])
+            with_facets(response, counts)
+        return response
 
+    @action(detail=False, methods=['get'], renderer_classes=[ICalendarRenderer, JSONRenderer])
+    def calendar(self, request, format=None):
+        """Flux iCalendar des cours (mêmes filtres que la liste : ville, catégorie, rayon...)"""
+        queryset = upcoming(self.filter_queryset(self.get_queryset()))
+        return calendar_response(request, "Cours", [(queryset, Course.calendar_feed)], 'cours.ics')
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Statistiques globales pour la page d'accueil"""
-        from django.db.models import Count
-        from django.contrib.auth import get_user_model
-        from festivals.models import Festival
-        from artists.models import ArtistProfile
-        
-        User = get_user_model()
-        
-        # Compter les cours disponibles
-        courses_count = Course.objects.filter(status='approved').count()
-        
-        # Compter le total des participants (somme de tous les participants inscrits)
-        total_participants = CourseEnrollment.objects.filter(
-            course__status='approved'
-        ).count()
-        
-        # Compter les artistes
-        artists_count = ArtistProfile.objects.filter(is_verified=True).count()
-        
-        # Compter les villes uniques où il y a des cours
-        cities_count = Course.objects.filter(
-            status='approved'
-        ).values('city').distinct().count()
-        
-        return Response({
-            'courses_count': courses_count,
-            'total_participants': total_participants,
-            'artists_count': artists_count,
-            'cities_count': cities_count
-        })
+        """Statistiques globales pour la page d'accueil (pré-agrégées, voir courses/stats.py)"""
+        return Response(home_stats.get())
 
     @action(detail=False, methods=['get'])
     def upcoming_events(self, request):
@@ -301,7 +287,7 @@ class CourseViewSet(viewsets.ModelViewSet):
             'festivals': festivals_serializer.data
         })
 
-class CourseEnrollmentViewSet(viewsets.ModelViewSet):
+class CourseEnrollmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """Vue pour les inscriptions aux cours"""
     queryset = CourseEnrollment.objects.all()
     serializer_class = CourseEnrollmentSerializer
@@ -371,14 +357,8 @@ class CourseEnrollmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Mettre à jour le statut
-        enrollment.status = 'cancelled'
-        enrollment.save()
-        
-        # Mettre à jour le nombre de participants du cours
-        course = enrollment.course
-        course.current_participants = max(0, course.current_participants - 1)
-        course.save()
+        # Mettre à jour le statut (la place n'est libérée qu'une fois)
+        CourseEnrollment.seat_capacity.cancel(enrollment)
         
         return Response({"message": "Inscription annulée"})
 
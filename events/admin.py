@@ -3,6 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import EventCategory, Event, EventEnrollment, EventReview, EventWaitlist
+from .waitlist import promote_waitlist
 
 
 @admin.register(EventCategory)
@@ -66,7 +67,8 @@ class EventAdmin(admin.ModelAdmin):
     ]
     prepopulated_fields = {'slug': ('title',)}
     readonly_fields = [
-        'created_at', 'updated_at', 'views_count', 'available_spots',
+        'created_at', 'updated_at', 'views_count', 'current_participants', 'available_spots',
+        'average_rating', 'reviews_count',
         'enrollment_rate', 'is_upcoming', 'is_registration_open'
     ]
     date_hierarchy = 'start_date'
@@ -80,10 +82,10 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('start_date', 'end_date', 'registration_deadline')
         }),
         ('Lieu', {
-            'fields': ('location', 'address', 'city', 'postal_code', 'country')
+            'fields': ('location', 'address', 'city', 'postal_code', 'country', 'latitude', 'longitude')
         }),
         ('Capacité et participants', {
-            'fields': ('capacity', 'min_participants')
+            'fields': ('capacity', 'current_participants', 'min_participants')
         }),
         ('Prix et paiement', {
             'fields': ('price', 'currency', 'early_bird_price', 'early_bird_deadline')
@@ -104,7 +106,7 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('website', 'instagram', 'facebook')
         }),
         ('Métadonnées', {
-            'fields': ('created_at', 'updated_at', 'views_count'),
+            'fields': ('created_at', 'updated_at', 'views_count', 'average_rating', 'reviews_count'),
             'classes': ('collapse',)
         })
     )
@@ -113,8 +115,7 @@ class EventAdmin(admin.ModelAdmin):
     
     def enrollment_count(self, obj):
         """Afficher le nombre d'inscriptions"""
-        count = obj.enrollments.count()
-        return format_html('<span style="color: #2563eb;">{}</span>', count)
+        return format_html('<span style="color: #2563eb;">{}</span>', obj.current_participants)
     enrollment_count.short_description = 'Inscriptions'
     
     def available_spots(self, obj):
@@ -141,7 +142,7 @@ class EventAdmin(admin.ModelAdmin):
             'category', 'organizer'
         ).prefetch_related('enrollments', 'reviews', 'waitlist')
     
-    actions = ['mark_as_featured', 'mark_as_published', 'mark_as_cancelled']
+    actions = ['mark_as_featured', 'mark_as_published', 'mark_as_cancelled', 'promote_waitlists']
     
     def mark_as_featured(self, request, queryset):
         """Marquer les événements comme étant en vedette"""
@@ -160,6 +161,12 @@ class EventAdmin(admin.ModelAdmin):
         updated = queryset.update(status='cancelled')
         self.message_user(request, f'{updated} événement(s) annulé(s).')
     mark_as_cancelled.short_description = 'Annuler les événements'
+    
+    def promote_waitlists(self, request, queryset):
+        """Attribuer les places libres aux listes d'attente"""
+        promoted = sum(len(promote_waitlist(event_id)) for event_id in queryset.values_list('pk', flat=True))
+        self.message_user(request, f'{promoted} inscription(s) promue(s) depuis les listes d\'attente.')
+    promote_waitlists.short_description = "Promouvoir les listes d'attente"
 
 
 @admin.register(EventEnrollment)
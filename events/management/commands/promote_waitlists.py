@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from events.models import Event
+from events.waitlist import promote_waitlist
+
+
+class Command(BaseCommand):
+    help = "Attribue les places libres des événements aux premières entrées de leur liste d'attente"
+
+    def handle(self, *args, **options):
+        event_ids = Event.objects.filter(
+            waitlist__notified=False, current_participants__lt=F('capacity')
+        ).order_by('pk').values_list('pk', flat=True).distinct()
+        promoted = sum(len(promote_waitlist(event_id)) for event_id in event_ids)
+        self.stdout.write(self.style.SUCCESS(f"{promoted} inscription(s) promue(s) depuis les listes d'attente"))
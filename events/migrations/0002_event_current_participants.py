@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:27
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_participants(apps, schema_editor):
+    """Initialise le compteur avec les inscriptions en attente ou confirmées"""
+    Event = apps.get_model("events", "Event")
+    EventEnrollment = apps.get_model("events", "EventEnrollment")
+    held = (
+        EventEnrollment.objects.filter(event=OuterRef("pk"), status__in=["pending", "confirmed"])
+        .order_by()
+        .values("event_id")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Event.objects.update(
+        current_participants=Coalesce(Subquery(held, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="current_participants",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Participants actuels"
+            ),
+        ),
+        migrations.RunPython(count_participants, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,11 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from core.calendar import CalendarFeed
+from core.capacity import SeatCapacity
+from core.counters import view_counter
+from core.models import AtomicCountersModel, GeoLocatedModel, RatedReviewModel, SeatHoldingModel
+from core.ratings import RatingAggregate
 
 User = get_user_model()
 
@@ -21,9 +26,14 @@ class EventCategory(models.Model):
     def __str__(self):
         return self.name
 
-class Event(models.Model):
+class Event(GeoLocatedModel, AtomicCountersModel):
     """Modèle principal pour les événements/classes"""
     
+    # Compteur de places et agrégats des avis, tenus par des UPDATE atomiques (core/capacity.py, core/ratings.py)
+    atomic_fields = ('current_participants', 'average_rating', 'reviews_count')
+    
+    calendar_feed = CalendarFeed('event', description_field='description')
+    
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('published', 'Publié'),
@@ -63,6 +73,7 @@ class Event(models.Model):
     
     # Capacité et participants
     capacity = models.PositiveIntegerField(verbose_name="Capacité maximale")
+    current_participants = models.PositiveIntegerField(default=0, verbose_name="Participants actuels")
     min_participants = models.PositiveIntegerField(default=1, verbose_name="Participants minimum")
     
     # Prix et paiement
@@ -98,6 +109,9 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
     views_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de vues")
+    # Agrégats des avis (tenus à jour par EventReview.rating_aggregate)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0, verbose_name="Note moyenne")
+    reviews_count = models.PositiveIntegerField(default=0, verbose_name="Nombre d'avis")
     
     class Meta:
         verbose_name = "Événement"
@@ -133,24 +147,24 @@ class Event(models.Model):
     @property
     def available_spots(self):
         """Calcule le nombre de places disponibles"""
-        enrolled_count = self.enrollments.filter(status='confirmed').count()
-        return max(0, self.capacity - enrolled_count)
+        return max(0, self.capacity - self.current_participants)
     
     @property
     def enrollment_rate(self):
         """Calcule le taux d'inscription en pourcentage"""
         if self.capacity == 0:
             return 0
-        enrolled_count = self.enrollments.filter(status='confirmed').count()
-        return (enrolled_count / self.capacity) * 100
+        return (self.current_participants / self.capacity) * 100
     
     def increment_views(self):
-        """Incrémente le compteur de vues"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """Incrémente le compteur de vues (écriture différée)"""
+        view_counter.increment(self)
 
-class EventEnrollment(models.Model):
+class EventEnrollment(SeatHoldingModel):
     """Inscription d'un utilisateur à un événement"""
+    # Les inscriptions en attente de confirmation occupent déjà une place
+    seat_capacity = SeatCapacity('event', user_field='user', holding_statuses=('pending', 'confirmed'),
+                                 capacity_field='capacity')
     
     STATUS_CHOICES = [
         ('pending', 'En attente'),
@@ -213,9 +227,11 @@ class EventEnrollment(models.Model):
             self.price_paid = self.event.current_price
         super().save(*args, **kwargs)
 
-class EventReview(models.Model):
+class EventReview(RatedReviewModel):
     """Avis d'un utilisateur sur un événement"""
     
+    rating_aggregate = RatingAggregate('event')
+    
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='reviews', verbose_name="Événement")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_reviews', verbose_name="Utilisateur")
     
@@ -1,6 +1,14 @@
 from rest_framework import serializers
-from .models import Event, EventCategory, EventEnrollment, EventReview, EventWaitlist
+from .models import Event, EventCategory, EventEnrollment, EventReview
 from accounts.serializers import UserProfileSerializer
+from core.capacity import CapacityError
+from core.facets import price_ranges
+from core.serializers import DistanceField, NearbyQuerySerializer
+from core.viewer import ViewerContextListSerializer, ViewerContextMixin, ViewerRelation
+from .waitlist import join_waitlist, leave_waitlist
+
+# Inscription de l'utilisateur courant, préchargée pour tous les événements d'une page
+ENROLLMENT_RELATION = ViewerRelation('events.EventEnrollment', 'event', select_related=('user', 'event'))
 
 class EventCategorySerializer(serializers.ModelSerializer):
     """Serializer pour les catégories d'événements"""
@@ -46,15 +54,17 @@ class EventSerializer(serializers.ModelSerializer):
     is_registration_open = serializers.BooleanField(read_only=True)
     is_upcoming = serializers.BooleanField(read_only=True)
     current_price = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
-    reviews_count = serializers.SerializerMethodField()
-    average_rating = serializers.SerializerMethodField()
+    reviews_count = serializers.IntegerField(read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    distance = DistanceField()
     
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'slug', 'description', 'long_description', 'category',
             'status', 'featured', 'start_date', 'end_date', 'registration_deadline',
-            'location', 'address', 'city', 'postal_code', 'country', 'capacity',
+            'location', 'address', 'city', 'postal_code', 'country', 'latitude',
+            'longitude', 'distance', 'capacity',
             'min_participants', 'price', 'currency', 'early_bird_price',
             'early_bird_deadline', 'difficulty', 'prerequisites', 'organizer',
             'organizer_name', 'instructor', 'instructor_bio', 'main_image',
@@ -64,38 +74,38 @@ class EventSerializer(serializers.ModelSerializer):
             'reviews_count', 'average_rating', 'created_at', 'updated_at'
         ]
         read_only_fields = ['organizer', 'created_at', 'updated_at', 'views_count']
-    
-    def get_reviews_count(self, obj):
-        return obj.reviews.count()
-    
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if not reviews:
-            return 0
-        total = sum(review.rating for review in reviews)
-        return round(total / len(reviews), 1)
+        # Profil `?profile=card` (listes, agendas)
+        card_fields = [
+            'id', 'title', 'slug', 'category', 'status', 'start_date', 'end_date', 'city',
+            'distance', 'main_image', 'price', 'current_price', 'currency', 'available_spots',
+            'average_rating', 'reviews_count'
+        ]
+
 
-class EventDetailSerializer(EventSerializer):
+class EventDetailSerializer(ViewerContextMixin, EventSerializer):
     """Serializer détaillé pour un événement spécifique"""
     
     enrollments = EventEnrollmentSerializer(many=True, read_only=True)
     reviews = EventReviewSerializer(many=True, read_only=True)
     user_enrollment = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
     
     class Meta(EventSerializer.Meta):
         fields = EventSerializer.Meta.fields + [
-            'enrollments', 'reviews', 'user_enrollment'
+            'enrollments', 'reviews', 'user_enrollment', 'rating_histogram'
         ]
+        list_serializer_class = ViewerContextListSerializer
+    
+    viewer_relations = (ENROLLMENT_RELATION,)
     
     def get_user_enrollment(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                enrollment = obj.enrollments.get(user=request.user)
-                return EventEnrollmentSerializer(enrollment).data
-            except EventEnrollment.DoesNotExist:
-                return None
-        return None
+        enrollment = self.viewer_row(ENROLLMENT_RELATION, obj)
+        if enrollment is None:
+            return None
+        return EventEnrollmentSerializer(enrollment).data
+    
+    def get_rating_histogram(self, obj):
+        return EventReview.rating_aggregate.summaries(obj)['rating']['histogram']
 
 class EventCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer pour créer/modifier un événement"""
@@ -105,7 +115,8 @@ class EventCreateUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'title', 'slug', 'description', 'long_description', 'category',
             'status', 'featured', 'start_date', 'end_date', 'registration_deadline',
-            'location', 'address', 'city', 'postal_code', 'country', 'capacity',
+            'location', 'address', 'city', 'postal_code', 'country', 'latitude',
+            'longitude', 'capacity',
             'min_participants', 'price', 'currency', 'early_bird_price',
             'early_bird_deadline', 'difficulty', 'prerequisites', 'instructor',
             'instructor_bio', 'main_image', 'gallery', 'highlights', 'schedule',
@@ -159,7 +170,6 @@ class EventEnrollmentCreateSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """Validation personnalisée"""
         event = data['event']
-        user = self.context['request'].user
         
         # Vérifier que l'événement est publié
         if event.status != 'published':
@@ -173,38 +183,32 @@ class EventEnrollmentCreateSerializer(serializers.ModelSerializer):
                 "Les inscriptions sont fermées pour cet événement."
             )
         
-        # Vérifier qu'il y a des places disponibles
-        if event.available_spots <= 0:
-            raise serializers.ValidationError(
-                "Aucune place disponible pour cet événement."
-            )
-        
-        # Vérifier que l'utilisateur n'est pas déjà inscrit
-        if EventEnrollment.objects.filter(event=event, user=user).exists():
-            raise serializers.ValidationError(
-                "Vous êtes déjà inscrit à cet événement."
-            )
-        
         return data
     
     def create(self, validated_data):
-        """Override create pour définir automatiquement l'utilisateur et le prix"""
-        validated_data['user'] = self.context['request'].user
-        validated_data['price_paid'] = validated_data['event'].current_price
-        validated_data['currency'] = validated_data['event'].currency
+        """
+        Inscription par la gestion commune des places : une inscription
+        annulée (ou en liste d'attente) est réutilisée plutôt que refusée
+        """
+        event = validated_data.pop('event')
+        user = self.context['request'].user
+        validated_data['price_paid'] = event.current_price
+        validated_data['currency'] = event.currency
         
-        # Vérifier s'il y a des places disponibles
-        event = validated_data['event']
-        if event.available_spots <= 0:
-            # Mettre en liste d'attente
-            validated_data['status'] = 'waitlist'
-            EventWaitlist.objects.create(event=event, user=validated_data['user'])
+        # La place est réservée atomiquement ; si l'événement est complet, liste d'attente
+        # (promue automatiquement lorsqu'une place se libère, voir events/waitlist.py)
+        try:
+            enrollment, _ = EventEnrollment.seat_capacity.enroll(event, user, status='pending', **validated_data)
+        except CapacityError:
+            enrollment, _ = EventEnrollment.objects.update_or_create(
+                event=event, user=user, defaults={**validated_data, 'status': 'waitlist'}
+            )
+            join_waitlist(event, user)
         else:
-            validated_data['status'] = 'pending'
-        
-        return super().create(validated_data)
+            leave_waitlist(event, user)
+        return enrollment
 
-class EventSearchSerializer(serializers.Serializer):
+class EventSearchSerializer(NearbyQuerySerializer):
     """Serializer pour la recherche d'événements"""
     
     query = serializers.CharField(required=False, allow_blank=True)
@@ -215,8 +219,12 @@ class EventSearchSerializer(serializers.Serializer):
     price_max = serializers.DecimalField(max_digits=8, decimal_places=2, required=False)
     date_from = serializers.DateTimeField(required=False)
     date_to = serializers.DateTimeField(required=False)
-    featured = serializers.BooleanField(required=False)
+    # default=None : absents des paramètres d'URL, ces booléens ne filtrent pas (au lieu de valoir False)
+    featured = serializers.BooleanField(required=False, allow_null=True, default=None)
     available_spots = serializers.BooleanField(required=False)
+    price_range = serializers.ChoiceField(choices=price_ranges(), required=False)
+    is_free = serializers.BooleanField(required=False, allow_null=True, default=None)
+    facets = serializers.BooleanField(required=False, default=False)
 
 class EventStatsSerializer(serializers.Serializer):
     """Serializer pour les statistiques des événements"""
@@ -0,0 +1,47 @@
+"""
+Statistiques globales des événements (rollup lu par `EventViewSet.stats`)
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.models import RatingSummary
+from core.rollups import StatsRollup
+
+from .models import Event, EventEnrollment, EventReview
+
+
+def compute_event_stats():
+    """Calcule les statistiques des événements publiés"""
+    events = Event.objects.filter(status='published').order_by()
+    totals = events.aggregate(
+        total=Count('pk'),
+        upcoming=Count('pk', filter=Q(start_date__gt=timezone.now())),
+    )
+    enrollments = EventEnrollment.objects.filter(status='confirmed').aggregate(
+        total=Count('pk'),
+        revenue=Sum('price_paid', filter=Q(payment_status='paid')),
+    )
+    by_category = events.values_list('category__name').annotate(count=Count('pk'))
+    by_city = events.exclude(city='').values_list('city').annotate(count=Count('pk'))
+
+    # Moyenne de tous les avis, à partir des agrégats par événement
+    ratings = RatingSummary.objects.filter(
+        scope=EventReview.rating_aggregate.scope, criterion='rating'
+    ).aggregate(total=Sum('ratings_sum'), count=Sum('ratings_count'))
+
+    return {
+        'total_events': totals['total'],
+        'upcoming_events': totals['upcoming'],
+        'total_enrollments': enrollments['total'],
+        'total_revenue': float(enrollments['revenue'] or 0),
+        'events_by_category': dict(sorted(by_category)),
+        'events_by_city': dict(sorted(by_city)),
+        'average_rating': round(ratings['total'] / ratings['count'], 1) if ratings['count'] else 0,
+    }
+
+
+event_stats = StatsRollup(
+    'events',
+    compute_event_stats,
+    depends_on=('events.Event', 'events.EventCategory', 'events.EventEnrollment', 'events.EventReview'),
+)
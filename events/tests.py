@@ -1,3 +1,138 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from .models import Event, EventCategory, EventEnrollment, EventReview, EventWaitlist
+from .serializers import EventEnrollmentCreateSerializer
+from .waitlist import leave_waitlist
+
+User = get_user_model()
+
+
+@override_settings(WAITLIST_PROMOTION_ASYNC=False, WAITLIST_NOTIFICATIONS_ASYNC=False)
+class EventTestCase(TestCase):
+    """Événement publié d'une place et utilisateurs"""
+
+    def setUp(self):
+        self.organizer = User.objects.create_user(username='organisateur', email='orga@example.com', password='x')
+        self.dancer = User.objects.create_user(username='danseur', email='danseur@example.com', password='x')
+        self.other = User.objects.create_user(username='danseuse', email='danseuse@example.com', password='x')
+        category = EventCategory.objects.create(name='Soirée', slug='soiree')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='Soirée bachata', slug='soiree-bachata', description='Soirée', long_description='Soirée',
+            category=category, status='published', organizer=self.organizer,
+            start_date=now + timedelta(days=7), end_date=now + timedelta(days=7, hours=4),
+            registration_deadline=now + timedelta(days=6),
+            location='Salle', address='1 rue de la Danse', city='Paris', postal_code='75001',
+            capacity=1, price=10, main_image='events/main_images/soiree.jpg',
+        )
+
+    def enroll(self, user):
+        request = APIRequestFactory().post('/')
+        request.user = user
+        serializer = EventEnrollmentCreateSerializer(data={'event': self.event.pk}, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+
+class EventEnrollmentTests(EventTestCase):
+    """Inscriptions aux événements : places atomiques et réinscription"""
+
+    def test_reenroll_after_cancel_reuses_enrollment(self):
+        enrollment = self.enroll(self.dancer)
+        EventEnrollment.seat_capacity.cancel(enrollment)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.current_participants, 0)
+
+        again = self.enroll(self.dancer)
+
+        self.assertEqual(again.pk, enrollment.pk)
+        self.assertEqual(again.status, 'pending')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.current_participants, 1)
+
+    def test_enroll_twice_keeps_one_seat(self):
+        first = self.enroll(self.dancer)
+        second = self.enroll(self.dancer)
+
+        self.assertEqual(first.pk, second.pk)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.current_participants, 1)
+
+    def test_stale_event_save_keeps_seat_counter(self):
+        stale = Event.objects.get(pk=self.event.pk)
+        EventEnrollment.seat_capacity.enroll(self.event, self.dancer)
+
+        stale.title = 'Soirée bachata sensuelle'
+        stale.save()
+
+        self.assertEqual(stale.current_participants, 1)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.title, 'Soirée bachata sensuelle')
+        self.assertEqual(self.event.current_participants, 1)
+
+
+class EventWaitlistTests(EventTestCase):
+    """Liste d'attente : les entrées quittées ou promues sont réutilisées"""
+
+    def unenroll(self, user):
+        EventEnrollment.seat_capacity.cancel(EventEnrollment.objects.get(event=self.event, user=user))
+        leave_waitlist(self.event, user)
+
+    def test_rejoin_waitlist_after_leaving(self):
+        self.enroll(self.other)
+        self.assertEqual(self.enroll(self.dancer).status, 'waitlist')
+        self.unenroll(self.dancer)
+        self.assertFalse(EventWaitlist.objects.filter(event=self.event, user=self.dancer).exists())
+
+        enrollment = self.enroll(self.dancer)
+
+        self.assertEqual(enrollment.status, 'waitlist')
+        self.assertTrue(EventWaitlist.objects.filter(event=self.event, user=self.dancer, notified=False).exists())
+
+    def test_enroll_again_after_promotion_and_cancel(self):
+        self.enroll(self.other)
+        self.enroll(self.dancer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unenroll(self.other)
+        self.assertEqual(EventEnrollment.objects.get(event=self.event, user=self.dancer).status, 'pending')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unenroll(self.dancer)
+
+        enrollment = self.enroll(self.dancer)
+
+        self.assertEqual(enrollment.status, 'pending')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.current_participants, 1)
+
+    def test_waitlisted_user_keeps_rank(self):
+        third = User.objects.create_user(username='troisieme', email='trois@example.com', password='x')
+        self.enroll(self.other)
+        self.enroll(self.dancer)
+        self.enroll(third)
+
+        self.enroll(self.dancer)
+
+        queue = list(EventWaitlist.objects.filter(event=self.event).order_by('joined_at', 'pk')
+                     .values_list('user_id', flat=True))
+        self.assertEqual(queue, [self.dancer.pk, third.pk])
+
+
+class EventReviewTests(EventTestCase):
+    """Agrégats des avis recopiés dans l'événement"""
+
+    def test_stale_event_save_keeps_rating_aggregates(self):
+        stale = Event.objects.get(pk=self.event.pk)
+        EventReview.objects.create(event=self.event, user=self.dancer, rating=4, comment='Super soirée')
+
+        stale.title = 'Soirée bachata sensuelle'
+        stale.save()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reviews_count, 1)
+        self.assertEqual(self.event.average_rating, 4)
+        self.assertEqual(stale.reviews_count, 1)
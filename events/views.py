@@ -1,11 +1,17 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count, Avg, Sum
+from django.db.models import F, Q
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from core.calendar import ICalendarRenderer, calendar_response, upcoming
+from core.conditional import ConditionalMixin
+from core.facets import Facet, FacetSet, free_facet, price_facet, with_facets
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import NearbyFilterBackend, apply_nearby
 
 from .models import Event, EventCategory, EventEnrollment, EventReview, EventWaitlist
 from .serializers import (
@@ -14,13 +20,30 @@ from .serializers import (
     EventReviewSerializer, EventSearchSerializer, EventStatsSerializer
 )
 from .permissions import IsEventOrganizerOrReadOnly
+from .stats import event_stats
+from .waitlist import leave_waitlist
 
-class EventCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Modèles dont dépendent les réponses en lecture des événements
+EVENT_MODELS = ('events.Event', 'events.EventCategory', 'events.EventEnrollment', 'events.EventReview', 'accounts.User')
+
+# Facettes de la recherche d'événements (voir core/facets.py)
+event_facets = FacetSet('events', [
+    Facet('city', 'city', lookup='icontains'),
+    Facet('difficulty', 'difficulty', choices=Event.DIFFICULTY_CHOICES),
+    Facet('category', 'category__slug', label_field='category__name'),
+    price_facet('price'),
+    free_facet(Q(price=0)),
+], models=('events.Event', 'events.EventCategory'))
+
+class EventCategoryViewSet(ConditionalMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet pour les catégories d'événements"""
     
     queryset = EventCategory.objects.all()
     serializer_class = EventCategorySerializer
     lookup_field = 'slug'
+    conditional_models = EVENT_MODELS
+    conditional_actions = ('list', 'retrieve', 'events')
+    cache_control = {'list': {'max_age': 300}, 'retrieve': {'max_age': 300}}
     
     @action(detail=True, methods=['get'])
     def events(self, request, slug=None):
@@ -39,18 +62,22 @@ class EventCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = EventSerializer(events, many=True, context={'request': request})
         return Response(serializer.data)
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet principal pour les événements"""
     
     queryset = Event.objects.filter(status='published').order_by('start_date')
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsEventOrganizerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, NearbyFilterBackend]
     filterset_fields = ['category', 'city', 'difficulty', 'featured', 'status']
     search_fields = ['title', 'description', 'location', 'instructor']
     ordering_fields = ['start_date', 'price', 'created_at', 'views_count']
     ordering = ['start_date']
     lookup_field = 'slug'
+    conditional_models = EVENT_MODELS
+    # Le détail compte les vues : il n'est pas conditionnel
+    conditional_actions = ('list', 'featured', 'upcoming', 'search')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         """Override queryset pour inclure les événements publiés et les événements de l'utilisateur"""
@@ -100,48 +127,38 @@ class EventViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Recherche avancée d'événements"""
+        """Recherche avancée d'événements (`?facets=true` : comptes par facette, voir core/facets.py)"""
         serializer = EventSearchSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
         
         queryset = self.get_queryset()
         
         # Filtres de base
-        if serializer.validated_data.get('category'):
-            queryset = queryset.filter(category__slug=serializer.validated_data['category'])
-        
-        if serializer.validated_data.get('city'):
-            queryset = queryset.filter(city__icontains=serializer.validated_data['city'])
-        
-        if serializer.validated_data.get('difficulty'):
-            queryset = queryset.filter(difficulty=serializer.validated_data['difficulty'])
-        
-        if serializer.validated_data.get('featured') is not None:
-            queryset = queryset.filter(featured=serializer.validated_data['featured'])
+        if data.get('featured') is not None:
+            queryset = queryset.filter(featured=data['featured'])
         
         # Filtres de prix
-        if serializer.validated_data.get('price_min'):
-            queryset = queryset.filter(price__gte=serializer.validated_data['price_min'])
+        if data.get('price_min'):
+            queryset = queryset.filter(price__gte=data['price_min'])
         
-        if serializer.validated_data.get('price_max'):
-            queryset = queryset.filter(price__lte=serializer.validated_data['price_max'])
+        if data.get('price_max'):
+            queryset = queryset.filter(price__lte=data['price_max'])
         
         # Filtres de date
-        if serializer.validated_data.get('date_from'):
-            queryset = queryset.filter(start_date__gte=serializer.validated_data['date_from'])
+        if data.get('date_from'):
+            queryset = queryset.filter(start_date__gte=data['date_from'])
         
-        if serializer.validated_data.get('date_to'):
-            queryset = queryset.filter(start_date__lte=serializer.validated_data['date_to'])
+        if data.get('date_to'):
+            queryset = queryset.filter(start_date__lte=data['date_to'])
         
         # Filtre de places disponibles
-        if serializer.validated_data.get('available_spots'):
-            queryset = queryset.filter(
-                capacity__gt=Count('enrollments', filter=Q(enrollments__status='confirmed'))
-            )
+        if data.get('available_spots'):
+            queryset = queryset.filter(current_participants__lt=F('capacity'))
         
         # Recherche textuelle
-        if serializer.validated_data.get('query'):
-            query = serializer.validated_data['query']
+        if data.get('query'):
+            query = data['query']
             queryset = queryset.filter(
                 Q(title__icontains=query) |
                 Q(description__icontains=query) |
@@ -149,56 +166,45 @@ class EventViewSet(viewsets.ModelViewSet):
                 Q(instructor__icontains=query)
             )
         
-        page = self.paginate_queryset(queryset)
+        # Filtres à facettes : ville, niveau, catégorie, tranche de prix, gratuité
+        results = event_facets.apply(queryset, data)
+        
+        # Recherche autour d'un point, triée par distance
+        results = apply_nearby(results, data)
+        
+        page = self.paginate_queryset(results)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(results, many=True).data)
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        if data['facets']:
+            # Comptes calculés hors filtres de facettes (chaque facette ignore son propre filtre)
+            counts = event_facets.counts(apply_nearby(queryset, data, order=False), data, vary=[request.user.pk])
+            with_facets(response, counts)
+        return response
+    
+    @action(detail=False, methods=['get'], renderer_classes=[ICalendarRenderer, JSONRenderer])
+    def calendar(self, request, format=None):
+        """Flux iCalendar des événements (mêmes filtres que la liste : ville, catégorie, rayon...)"""
+        queryset = upcoming(self.filter_queryset(self.get_queryset()))
+        return calendar_response(request, "Événements", [(queryset, Event.calendar_feed)], 'evenements.ics')
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Statistiques des événements"""
-        events = Event.objects.filter(status='published')
-        
-        stats = {
-            'total_events': events.count(),
-            'upcoming_events': events.filter(start_date__gt=timezone.now()).count(),
-            'total_enrollments': EventEnrollment.objects.filter(status='confirmed').count(),
-            'total_revenue': EventEnrollment.objects.filter(
-                status='confirmed',
-                payment_status='paid'
-            ).aggregate(total=Sum('price_paid'))['total'] or 0,
-            'events_by_category': {},
-            'events_by_city': {},
-            'average_rating': 0
-        }
-        
-        # Événements par catégorie
-        categories = EventCategory.objects.annotate(
-            event_count=Count('event', filter=Q(event__status='published'))
-        )
-        stats['events_by_category'] = {
-            cat.name: cat.event_count for cat in categories if cat.event_count > 0
-        }
-        
-        # Événements par ville
-        cities = events.values('city').annotate(count=Count('id'))
-        stats['events_by_city'] = {
-            city['city']: city['count'] for city in cities if city['city']
-        }
-        
-        # Note moyenne
-        avg_rating = EventReview.objects.aggregate(avg=Avg('rating'))['avg']
-        stats['average_rating'] = round(avg_rating, 1) if avg_rating else 0
-        
-        return Response(stats)
+        """Statistiques des événements (pré-agrégées, voir events/stats.py)"""
+        return Response(event_stats.get())
     
     @action(detail=True, methods=['post'])
     def enroll(self, request, slug=None):
         """S'inscrire à un événement"""
         event = self.get_object()
+        # Requête rejouée : l'inscription active existante est renvoyée telle quelle
+        if request.user.is_authenticated:
+            enrollment = event.enrollments.filter(user=request.user).first()
+            if enrollment is not None and enrollment.holds_seat():
+                return Response(EventEnrollmentSerializer(enrollment).data, status=status.HTTP_200_OK)
+        
         serializer = EventEnrollmentCreateSerializer(
             data={'event': event.id, **request.data},
             context={'request': request}
@@ -219,8 +225,9 @@ class EventViewSet(viewsets.ModelViewSet):
         event = self.get_object()
         try:
             enrollment = event.enrollments.get(user=request.user)
-            enrollment.status = 'cancelled'
-            enrollment.save()
+            EventEnrollment.seat_capacity.cancel(enrollment)
+            # La place libérée est attribuée à la liste d'attente (voir events/waitlist.py)
+            leave_waitlist(event, request.user)
             return Response({'message': 'Désinscription réussie'})
         except EventEnrollment.DoesNotExist:
             return Response(
@@ -263,7 +270,7 @@ class EventViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class EventEnrollmentViewSet(viewsets.ModelViewSet):
+class EventEnrollmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet pour les inscriptions aux événements"""
     
     serializer_class = EventEnrollmentSerializer
@@ -302,7 +309,7 @@ class EventEnrollmentViewSet(viewsets.ModelViewSet):
             'created_events': created_events
         })
 
-class EventReviewViewSet(viewsets.ModelViewSet):
+class EventReviewViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet pour les avis d'événements"""
     
     queryset = EventReview.objects.all()
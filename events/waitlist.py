@@ -0,0 +1,210 @@
+"""
+Promotion automatique des listes d'attente des événements.
+
+Une place libérée (annulation ou suppression d'une inscription, capacité
+augmentée) programme la promotion de l'événement après la validation de la
+transaction. Les événements à traiter sont regroupés pendant
+`WAITLIST_PROMOTION_DELAY` secondes puis traités en une passe : une vague
+d'annulations ne déclenche qu'une promotion par événement.
+
+Pour chaque événement, les premières entrées non notifiées de la liste (ordre
+d'arrivée) reçoivent les places libres dans une transaction : réservation
+groupée du compteur de places, passage des inscriptions en attente de
+confirmation, entrées marquées notifiées. Les courriels sont ensuite confiés
+à un pool de fils de travail.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mass_mail
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.capacity import seats_released
+from core.conditional import versions_changed
+from core.media import BackgroundPool
+
+from .models import Event, EventEnrollment, EventWaitlist
+
+logger = logging.getLogger(__name__)
+
+PROMOTED_STATUS = 'pending'
+WAITLIST_STATUS = 'waitlist'
+
+
+class NotificationPool(BackgroundPool):
+    """Pool d'envoi des courriels de promotion"""
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'WAITLIST_NOTIFICATIONS_ASYNC', True)
+
+    def get_max_workers(self):
+        return 1
+
+
+notification_pool = NotificationPool('waitlist-mail')
+
+
+def promote_waitlist(event_id):
+    """
+    Attribue les places libres d'un événement aux premières entrées de sa
+    liste d'attente ; retourne les identifiants des utilisateurs promus.
+    """
+    capacity = EventEnrollment.seat_capacity
+    promoted = []
+    with transaction.atomic():
+        # Verrou de l'événement : une seule promotion à la fois par événement
+        event = Event.objects.select_for_update().filter(pk=event_id).first()
+        if event is None:
+            return promoted
+        free = event.capacity - event.current_participants
+        while free > 0:
+            entries = list(EventWaitlist.objects.filter(event_id=event_id, notified=False)
+                           .order_by('joined_at', 'pk').values_list('pk', 'user_id')[:free])
+            if not entries:
+                break
+            statuses = dict(EventEnrollment.objects.select_for_update().filter(
+                event_id=event_id, user_id__in=[user_id for _, user_id in entries]
+            ).values_list('user_id', 'status'))
+            # Les entrées dont l'inscription a été annulée ou confirmée entre-temps sont retirées
+            eligible = [(pk, user_id) for pk, user_id in entries
+                        if statuses.get(user_id, WAITLIST_STATUS) == WAITLIST_STATUS]
+            stale = [pk for pk, user_id in entries if (pk, user_id) not in eligible]
+            if stale:
+                EventWaitlist.objects.filter(pk__in=stale).delete()
+            if not eligible:
+                continue
+            if not capacity.reserve(event_id, seats=len(eligible)):
+                break
+
+            user_ids = [user_id for _, user_id in eligible]
+            EventEnrollment.objects.filter(
+                event_id=event_id, user_id__in=user_ids, status=WAITLIST_STATUS
+            ).update(status=PROMOTED_STATUS, updated_at=timezone.now())
+            # Entrées ajoutées sans inscription (administration) : l'inscription est créée
+            EventEnrollment.objects.bulk_create([
+                EventEnrollment(event_id=event_id, user_id=user_id, status=PROMOTED_STATUS,
+                                price_paid=event.current_price, currency=event.currency)
+                for user_id in user_ids if user_id not in statuses
+            ])
+            EventWaitlist.objects.filter(pk__in=[pk for pk, _ in eligible]).update(notified=True)
+            promoted.extend(user_ids)
+            free -= len(eligible)
+
+        if promoted:
+            # Écritures groupées, sans signal
+            versions_changed('events.Event', 'events.EventEnrollment', 'events.EventWaitlist')
+            transaction.on_commit(lambda: notification_pool.submit(notify_promoted, event_id, promoted))
+    return promoted
+
+
+def notify_promoted(event_id, user_ids):
+    """Prévient par courriel les utilisateurs promus"""
+    event = Event.objects.only('title', 'start_date', 'city').get(pk=event_id)
+    recipients = get_user_model()._default_manager.filter(pk__in=user_ids).exclude(email='')
+    subject = f"Une place s'est libérée : {event.title}"
+    start = timezone.localtime(event.start_date).strftime('%d/%m/%Y à %H:%M')
+    messages = [
+        (
+            subject,
+            f"Bonjour {user.first_name or user.username},\n\n"
+            f"Une place s'est libérée pour « {event.title} » ({event.city}, le {start}). "
+            f"Votre inscription est en attente de confirmation.\n",
+            settings.DEFAULT_FROM_EMAIL,
+            [user.email],
+        )
+        for user in recipients
+    ]
+    send_mass_mail(messages, fail_silently=False)
+
+
+class PromotionQueue:
+    """Événements ayant des places libérées, promus ensemble après un court délai"""
+
+    def __init__(self, delay=None):
+        self.delay = delay
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'WAITLIST_PROMOTION_ASYNC', True)
+
+    def get_delay(self):
+        if self.delay is not None:
+            return self.delay
+        return getattr(settings, 'WAITLIST_PROMOTION_DELAY', 2)
+
+    def add(self, event_id):
+        """Programme la promotion de la liste d'attente d'un événement"""
+        if not self.enabled:
+            promote_waitlist(event_id)
+            return
+        with self._lock:
+            self._pending.add(event_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.get_delay(), self.flush_safely)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Promeut les listes d'attente des événements en file ; retourne le nombre de promotions"""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return sum(len(promote_waitlist(event_id)) for event_id in sorted(pending))
+
+    def flush_safely(self):
+        """Promotion programmée, hors requête"""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Échec de la promotion des listes d'attente")
+        finally:
+            connection.close()
+
+
+promotion_queue = PromotionQueue()
+
+
+def join_waitlist(event, user):
+    """
+    Place un utilisateur en fin de liste d'attente d'un événement ; une
+    entrée en attente garde son rang, une entrée déjà promue repart en fin de file
+    """
+    entry, created = EventWaitlist.objects.get_or_create(event=event, user=user)
+    if not created and entry.notified:
+        entry.notified = False
+        entry.joined_at = timezone.now()
+        entry.save(update_fields=['notified', 'joined_at'])
+
+
+def leave_waitlist(event, user):
+    """Retire un utilisateur de la liste d'attente d'un événement"""
+    EventWaitlist.objects.filter(event=event, user=user).delete()
+
+
+@receiver(seats_released, sender=EventEnrollment)
+def promote_after_release(sender, parent_id, **kwargs):
+    """Programme la promotion lorsqu'une place se libère"""
+    transaction.on_commit(lambda: promotion_queue.add(parent_id))
+
+
+@receiver(post_save, sender=Event)
+def promote_after_capacity_change(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Programme la promotion lorsqu'une capacité augmentée laisse des places libres"""
+    if raw or created:
+        return
+    if update_fields is not None and 'capacity' not in update_fields:
+        return
+    if instance.capacity > instance.current_participants:
+        event_id = instance.pk
+        transaction.on_commit(lambda: promotion_queue.add(event_id))
@@ -12,7 +12,7 @@ class FestivalAdmin(admin.ModelAdmin):
         'status', 'city', 'start_date', 'end_date', 'is_free', 'created_at'
     ]
     search_fields = ['title', 'description', 'location', 'city']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['current_participants', 'created_at', 'updated_at']
     date_hierarchy = 'start_date'
     
     fieldsets = (
@@ -20,7 +20,7 @@ class FestivalAdmin(admin.ModelAdmin):
             'fields': ('title', 'description', 'short_description', 'status')
         }),
         ('Localisation', {
-            'fields': ('location', 'address', 'city', 'postal_code', 'country')
+            'fields': ('location', 'address', 'city', 'postal_code', 'country', 'latitude', 'longitude')
         }),
         ('Dates et horaires', {
             'fields': ('start_date', 'end_date', 'registration_deadline')
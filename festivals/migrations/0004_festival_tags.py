@@ -0,0 +1,119 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:02
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.text import slugify
+import django.db.models.deletion
+
+
+# Logique de core/tags.py (normalize_tag, collect_tags, ensure_tags, rebuild_tag_links) figée à la date de la migration
+TAG_MAX_LENGTH = 100
+
+
+def normalize_tag(name):
+    """Slug d'un tag : minuscules, sans accents ni ponctuation"""
+    return slugify(str(name))[:TAG_MAX_LENGTH]
+
+
+def collect_tags(instance, source_fields):
+    """Retourne {slug: nom} des tags d'un contenu (premier nom rencontré par slug)"""
+    tags = {}
+    for field in source_fields:
+        for name in getattr(instance, field, None) or ():
+            if not isinstance(name, str) or not name.strip():
+                continue
+            slug = normalize_tag(name)
+            if slug:
+                tags.setdefault(slug, name.strip()[:TAG_MAX_LENGTH])
+    return tags
+
+
+def ensure_tags(Tag, tags):
+    """Crée les tags manquants ; retourne {slug: id} des tags {slug: nom}"""
+    if not tags:
+        return {}
+    Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in tags.items()], ignore_conflicts=True)
+    return dict(Tag.objects.filter(slug__in=list(tags)).values_list("slug", "pk"))
+
+
+def rebuild_tag_links(Tag, TagCount, TagLink, content_queryset, scope, source_fields):
+    """Reconstruit les liens et les comptes d'un type de contenu à partir des listes de tags"""
+    rows = [(obj.pk, collect_tags(obj, source_fields))
+            for obj in content_queryset.only("pk", *source_fields).iterator()]
+    all_tags = {}
+    for _, tags in rows:
+        for slug, name in tags.items():
+            all_tags.setdefault(slug, name)
+    tag_ids = ensure_tags(Tag, all_tags)
+    TagLink.objects.all().delete()
+    TagLink.objects.bulk_create([
+        TagLink(content_id=pk, tag_id=tag_ids[slug]) for pk, tags in rows for slug in tags
+    ], batch_size=500)
+    counts = TagLink.objects.order_by().values("tag_id").annotate(total=Count("pk"))
+    TagCount.objects.filter(scope=scope).delete()
+    TagCount.objects.bulk_create([
+        TagCount(scope=scope, tag_id=row["tag_id"], count=row["total"]) for row in counts
+    ], batch_size=500)
+
+
+def index_tags(apps, schema_editor):
+    """Indexe les tags des contenus existants"""
+    Tag = apps.get_model("core", "Tag")
+    TagCount = apps.get_model("core", "TagCount")
+    Festival = apps.get_model("festivals", "Festival")
+    FestivalTag = apps.get_model("festivals", "FestivalTag")
+    rebuild_tag_links(Tag, TagCount, FestivalTag, Festival.objects.all(), "festival", ("tags",))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_tags"),
+        ("festivals", "0003_festival_coordinates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FestivalTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_links",
+                        to="festivals.festival",
+                        verbose_name="Festival",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.tag",
+                        verbose_name="Tag",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tag de festival",
+                "verbose_name_plural": "Tags de festivals",
+                "indexes": [
+                    models.Index(
+                        fields=["tag", "content"], name="festivals_f_tag_id_fba781_idx"
+                    )
+                ],
+                "unique_together": {("content", "tag")},
+            },
+        ),
+        migrations.RunPython(index_tags, migrations.RunPython.noop),
+    ]
@@ -3,11 +3,19 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from core.calendar import CalendarFeed
+from core.capacity import SeatCapacity
+from core.models import AtomicCountersModel, GeoLocatedModel, SeatHoldingModel, TagLinkModel
+from core.tags import TagIndex
 
 User = get_user_model()
 
-class Festival(models.Model):
+class Festival(GeoLocatedModel, AtomicCountersModel):
     """Modèle pour les festivals de bachata"""
+    # Compteur tenu par les réservations atomiques (voir core/capacity.py)
+    atomic_fields = ('current_participants',)
+    calendar_feed = CalendarFeed('festival')
+    
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('pending', 'En attente de validation'),
@@ -160,8 +168,21 @@ class Festival(models.Model):
     def duration_days(self):
         return (self.end_date - self.start_date).days + 1
 
-class FestivalEnrollment(models.Model):
+class FestivalTag(TagLinkModel):
+    """Lien entre un festival et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(Festival, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Festival'))
+    tag_index = TagIndex('festival')
+
+    class Meta:
+        verbose_name = _("Tag de festival")
+        verbose_name_plural = _("Tags de festivals")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
+
+class FestivalEnrollment(SeatHoldingModel):
     """Inscription à un festival"""
+    seat_capacity = SeatCapacity('festival')
+    
     STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('confirmed', 'Confirmé'),
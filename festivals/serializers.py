@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import Festival, FestivalEnrollment
 from django.contrib.auth import get_user_model
+from core.capacity import CapacityError
+from core.facets import price_ranges
+from core.serializers import DistanceField
 
 User = get_user_model()
 
@@ -23,6 +26,7 @@ class FestivalSerializer(serializers.ModelSerializer):
     is_upcoming = serializers.ReadOnlyField()
     is_ongoing = serializers.ReadOnlyField()
     duration_days = serializers.ReadOnlyField()
+    distance = DistanceField()
     
     class Meta:
         model = Festival
@@ -31,7 +35,7 @@ class FestivalSerializer(serializers.ModelSerializer):
             'creator', 'status', 'approved_by', 'approved_at',
             'start_date', 'end_date', 'registration_deadline',
             'location', 'address', 'city', 'postal_code', 'country',
-            'max_participants', 'current_participants',
+            'latitude', 'longitude', 'distance', 'max_participants', 'current_participants',
             'base_price', 'currency', 'is_free',
             'schedule', 'workshops', 'performances', 'social_dances',
             'artists', 'instructors',
@@ -89,7 +93,10 @@ class FestivalEnrollmentSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Assigner l'utilisateur connecté comme participant
         validated_data['participant'] = self.context['request'].user
-        return super().create(validated_data)
+        try:
+            return super().create(validated_data)
+        except CapacityError:
+            raise serializers.ValidationError("Ce festival est complet.")
     
     def validate(self, data):
         # Vérifier que le festival n'est pas complet
@@ -126,3 +133,12 @@ class FestivalListSerializer(serializers.ModelSerializer):
 
 
 
+
+class FestivalFacetQuerySerializer(serializers.Serializer):
+    """Filtres à facettes de la liste des festivals (voir core/facets.py)"""
+    city = serializers.CharField(required=False, allow_blank=True)
+    country = serializers.CharField(required=False, allow_blank=True)
+    price_range = serializers.ChoiceField(choices=price_ranges(), required=False)
+    # default=None : absent des paramètres d'URL, `is_free` ne filtre pas (au lieu de valoir False)
+    is_free = serializers.BooleanField(required=False, allow_null=True, default=None)
+    facets = serializers.BooleanField(required=False, default=False)
@@ -1,24 +1,43 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import models
 from django.utils import timezone
-from .models import Festival, FestivalEnrollment
-from .serializers import FestivalSerializer, FestivalEnrollmentSerializer
+from core.calendar import ICalendarRenderer, calendar_response, upcoming
+from core.capacity import CapacityError
+from core.conditional import ConditionalMixin
+from core.facets import Facet, FacetSet, free_facet, price_facet, with_facets
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import NearbyFilterBackend, TagFilterBackend
+from .models import Festival, FestivalEnrollment, FestivalTag
+from .serializers import FestivalSerializer, FestivalEnrollmentSerializer, FestivalFacetQuerySerializer
 
-class FestivalViewSet(viewsets.ModelViewSet):
+# Facettes de la liste des festivals (voir core/facets.py)
+festival_facets = FacetSet('festivals', [
+    Facet('city', 'city', lookup='icontains'),
+    Facet('country', 'country', lookup='icontains'),
+    price_facet('base_price'),
+    free_facet(models.Q(is_free=True)),
+], models=('festivals.Festival',))
+
+class FestivalViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les festivals de bachata
     """
     queryset = Festival.objects.all()
     serializer_class = FestivalSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'city', 'country', 'is_free']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, NearbyFilterBackend, TagFilterBackend]
+    filterset_fields = ['status']
     search_fields = ['title', 'description', 'location', 'city']
     ordering_fields = ['start_date', 'end_date', 'price', 'created_at']
     ordering = ['-start_date']
+    conditional_models = ('festivals.Festival', 'festivals.FestivalEnrollment', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'upcoming', 'featured', 'search')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = Festival.objects.all()
@@ -34,20 +53,22 @@ class FestivalViewSet(viewsets.ModelViewSet):
             elif status_filter == 'completed':
                 queryset = queryset.filter(end_date__lt=timezone.now())
         
-        # Filtrage par ville
-        city = self.request.query_params.get('city', None)
-        if city:
-            queryset = queryset.filter(city__icontains=city)
-        
-        # Filtrage par pays
-        country = self.request.query_params.get('country', None)
-        if country:
-            queryset = queryset.filter(country__icontains=country)
+        # Ville et pays : filtres à facettes dans la liste et le calendrier (voir filter_facets)
+        if self.action not in ('list', 'calendar'):
+            # Filtrage par ville
+            city = self.request.query_params.get('city', None)
+            if city:
+                queryset = queryset.filter(city__icontains=city)
+            
+            # Filtrage par pays
+            country = self.request.query_params.get('country', None)
+            if country:
+                queryset = queryset.filter(country__icontains=country)
         
         # Filtrage par prix
         max_price = self.request.query_params.get('max_price', None)
         if max_price:
-            queryset = queryset.filter(price__lte=max_price)
+            queryset = queryset.filter(base_price__lte=max_price)
         
         # Filtrage par capacité
         has_spots = self.request.query_params.get('has_spots', None)
@@ -56,6 +77,33 @@ class FestivalViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def get_facet_params(self):
+        """Paramètres de la requête, filtres à facettes validés (400 si invalides)"""
+        serializer = FestivalFacetQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return {**self.request.query_params.dict(), **serializer.validated_data}
+    
+    def filter_facets(self, queryset, params):
+        """Applique les filtres à facettes : ville, pays, tranche de prix, gratuité"""
+        return festival_facets.apply(queryset, params)
+    
+    def list(self, request, *args, **kwargs):
+        """Liste des festivals (`?facets=true` : comptes par facette, voir core/facets.py)"""
+        params = self.get_facet_params()
+        unfaceted = self.filter_queryset(self.get_queryset())
+        queryset = self.filter_facets(unfaceted, params)
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        
+        if params['facets']:
+            # Comptes calculés hors filtres de facettes (chaque facette ignore son propre filtre)
+            with_facets(response, festival_facets.counts(unfaceted, params))
+        return response
+    
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Récupère les festivals à venir"""
@@ -89,12 +137,24 @@ class FestivalViewSet(viewsets.ModelViewSet):
             models.Q(description__icontains=query) |
             models.Q(location__icontains=query) |
             models.Q(city__icontains=query) |
-            models.Q(tags__contains=[query])
+            FestivalTag.tag_index.search_q(query)
         )
+        festivals = NearbyFilterBackend().filter_queryset(request, festivals, self)
+        
+        page = self.paginate_queryset(festivals)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(festivals, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], renderer_classes=[ICalendarRenderer, JSONRenderer])
+    def calendar(self, request, format=None):
+        """Flux iCalendar des festivals (mêmes filtres que la liste : ville, pays, rayon...)"""
+        queryset = self.filter_facets(self.filter_queryset(self.get_queryset()), self.get_facet_params())
+        return calendar_response(request, "Festivals", [(upcoming(queryset), Festival.calendar_feed)], 'festivals.ics')
+    
     @action(detail=False, methods=['get'])
     def my_festivals(self, request):
         """Festivals de l'utilisateur connecté"""
@@ -129,28 +189,18 @@ class FestivalViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Response({'error': 'Authentification requise'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Vérifier si l'utilisateur est déjà inscrit
-        if FestivalEnrollment.objects.filter(festival=festival, participant=user).exists():
-            return Response({'error': 'Déjà inscrit à ce festival'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Vérifier si le festival est complet
-        if festival.current_participants >= festival.max_participants:
+        # Réservation atomique de la place ; une requête rejouée renvoie l'inscription existante
+        try:
+            enrollment, created = FestivalEnrollment.seat_capacity.enroll(
+                festival, user,
+                status='pending',
+                price_paid=festival.base_price  # Ajouter le prix payé
+            )
+        except CapacityError:
             return Response({'error': 'Festival complet'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Créer l'inscription
-        enrollment = FestivalEnrollment.objects.create(
-            festival=festival,
-            participant=user,
-            status='pending',
-            price_paid=festival.base_price  # Ajouter le prix payé
-        )
-        
-        # Incrémenter le nombre de participants
-        festival.current_participants += 1
-        festival.save()
-        
         serializer = FestivalEnrollmentSerializer(enrollment)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
     def unenroll(self, request, pk=None):
@@ -163,17 +213,14 @@ class FestivalViewSet(viewsets.ModelViewSet):
         
         try:
             enrollment = FestivalEnrollment.objects.get(festival=festival, participant=user)
+            # La place est libérée à la suppression de l'inscription
             enrollment.delete()
             
-            # Décrémenter le nombre de participants
-            festival.current_participants = max(0, festival.current_participants - 1)
-            festival.save()
-            
             return Response({'message': 'Désinscription réussie'}, status=status.HTTP_200_OK)
         except FestivalEnrollment.DoesNotExist:
             return Response({'error': 'Inscription non trouvée'}, status=status.HTTP_404_NOT_FOUND)
 
-class FestivalEnrollmentViewSet(viewsets.ModelViewSet):
+class FestivalEnrollmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les inscriptions aux festivals
     """
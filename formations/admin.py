@@ -4,8 +4,12 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
     FormationCategory, FormationArticle, FormationFavorite, 
-    FormationComment, FormationProgress, FormationMedia, FormationSearchLog
+    FormationComment, FormationProgress, FormationMedia, FormationSearchLog,
+    FormationArticleRevision, FormationSearchQueryStat, FormationSearchFilterStat
 )
+from django.db.models import Sum
+from .media import schedule_media_processing
+from datetime import timedelta
 from django.utils import timezone
 
 
@@ -28,6 +32,10 @@ class FormationCategoryAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Annote le nombre d'articles de chaque sous-arbre en une requête"""
+        return super().get_queryset(request).select_related('parent').with_articles_count()
+    
     def articles_count(self, obj):
         """Affiche le nombre d'articles dans cette catégorie"""
         count = obj.get_articles_count()
@@ -36,6 +44,17 @@ class FormationCategoryAdmin(admin.ModelAdmin):
     articles_count.short_description = 'Nombre d\'articles'
 
 
+class FormationArticleRevisionInline(admin.TabularInline):
+    """Historique des révisions en ligne (lecture seule)"""
+    model = FormationArticleRevision
+    extra = 0
+    max_num = 0
+    fields = ['number', 'is_snapshot', 'size', 'author', 'created_at']
+    readonly_fields = fields
+    can_delete = False
+    ordering = ['-number']
+
+
 @admin.register(FormationArticle)
 class FormationArticleAdmin(admin.ModelAdmin):
     """Administration des articles de formation"""
@@ -45,6 +64,8 @@ class FormationArticleAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content', 'excerpt', 'author__username', 'category__name']
     list_editable = ['status', 'level']
     prepopulated_fields = {'slug': ('title',)}
+    readonly_fields = ['reading_time', 'word_count', 'version']
+    inlines = [FormationArticleRevisionInline]
     ordering = ['-created_at']
     date_hierarchy = 'created_at'
     
@@ -53,7 +74,7 @@ class FormationArticleAdmin(admin.ModelAdmin):
             'fields': ('title', 'slug', 'content', 'excerpt', 'featured_image')
         }),
         ('Métadonnées', {
-            'fields': ('author', 'category', 'level', 'status', 'reading_time')
+            'fields': ('author', 'category', 'level', 'status', 'reading_time', 'word_count')
         }),
         ('SEO', {
             'fields': ('meta_description',)
@@ -67,7 +88,7 @@ class FormationArticleAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Versioning', {
-            'fields': ('version', 'previous_version'),
+            'fields': ('version',),
             'classes': ('collapse',)
         }),
     )
@@ -78,6 +99,7 @@ class FormationArticleAdmin(admin.ModelAdmin):
         """Sauvegarde personnalisée pour gérer la publication"""
         if obj.status == 'published' and not obj.published_at:
             obj.published_at = timezone.now()
+        obj.revision_author = request.user
         super().save_model(request, obj, form, change)
     
     def get_queryset(self, request):
@@ -125,11 +147,17 @@ class FormationCommentAdmin(admin.ModelAdmin):
     
     def replies_count(self, obj):
         """Affiche le nombre de réponses"""
-        count = obj.get_replies_count()
+        count = obj.replies_count
         return format_html('<span style="color: {};">{}</span>', 
                          'blue' if count > 0 else 'gray', count)
     replies_count.short_description = 'Réponses'
     
+    def get_readonly_fields(self, request, obj=None):
+        """L'article et le parent sont figés une fois le commentaire placé dans son fil"""
+        if obj is not None:
+            return ['article', 'parent']
+        return []
+    
     def save_model(self, request, obj, form, change):
         """Sauvegarde personnalisée pour la modération"""
         if change and 'is_approved' in form.changed_data:
@@ -169,11 +197,14 @@ class FormationProgressAdmin(admin.ModelAdmin):
 class FormationMediaAdmin(admin.ModelAdmin):
     """Administration des médias de formation"""
     list_display = ['title', 'article', 'file_type', 'file_size_formatted', 
-                   'order', 'is_active', 'created_at']
-    list_filter = ['file_type', 'is_active', 'created_at']
-    search_fields = ['title', 'description', 'article__title']
+                   'processing_status', 'order', 'is_active', 'created_at']
+    list_filter = ['file_type', 'processing_status', 'is_active', 'created_at']
+    search_fields = ['title', 'description', 'article__title', 'content_hash']
     list_editable = ['order', 'is_active']
     ordering = ['order', 'created_at']
+    readonly_fields = ['file_size', 'duration', 'dimensions', 'content_hash', 'thumbnail',
+                       'processing_status', 'processed_at']
+    actions = ['reprocess_media']
     
     fieldsets = (
         ('Informations de base', {
@@ -183,7 +214,8 @@ class FormationMediaAdmin(admin.ModelAdmin):
             'fields': ('file', 'file_type')
         }),
         ('Métadonnées', {
-            'fields': ('duration', 'dimensions'),
+            'fields': ('file_size', 'duration', 'dimensions', 'content_hash', 'thumbnail',
+                       'processing_status', 'processed_at'),
             'classes': ('collapse',)
         }),
         ('Statut', {
@@ -195,15 +227,29 @@ class FormationMediaAdmin(admin.ModelAdmin):
         """Affiche la taille du fichier formatée"""
         return obj.get_file_size_formatted()
     file_size_formatted.short_description = 'Taille'
+    
+    def reprocess_media(self, request, queryset):
+        count = 0
+        for media in queryset:
+            schedule_media_processing(media)
+            count += 1
+        self.message_user(request, f"{count} média(s) en cours d'analyse.")
+    reprocess_media.short_description = "Réanalyser les médias sélectionnés"
 
 
 @admin.register(FormationSearchLog)
 class FormationSearchLogAdmin(admin.ModelAdmin):
-    """Administration des logs de recherche"""
+    """
+    Administration des logs de recherche : les statistiques affichées en tête
+    de liste proviennent des agrégats quotidiens, pas des logs bruts.
+    """
     list_display = ['query', 'user', 'results_count', 'ip_address', 'created_at']
-    list_filter = ['created_at', 'results_count']
     search_fields = ['query', 'user__username', 'ip_address']
     ordering = ['-created_at']
+    list_select_related = ['user']
+    show_full_result_count = False
+    stats_days = 7
+    stats_limit = 10
     readonly_fields = ['query', 'user', 'results_count', 'filters_applied', 
                       'ip_address', 'user_agent', 'created_at']
     
@@ -226,6 +272,58 @@ class FormationSearchLogAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Empêche la modification des logs"""
         return False
+    
+    def changelist_view(self, request, extra_context=None):
+        """Ajoute les requêtes fréquentes, sans résultat et l'usage des filtres (agrégats)"""
+        since = timezone.localdate() - timedelta(days=self.stats_days - 1)
+        query_stats = FormationSearchQueryStat.objects.filter(date__gte=since).values('query')
+        extra_context = extra_context or {}
+        extra_context.update({
+            'stats_days': self.stats_days,
+            'top_queries': query_stats.annotate(
+                total=Sum('searches_count')
+            ).order_by('-total')[:self.stats_limit],
+            'zero_result_queries': query_stats.annotate(
+                total=Sum('zero_results_count')
+            ).filter(total__gt=0).order_by('-total')[:self.stats_limit],
+            'filter_usage': FormationSearchFilterStat.objects.filter(date__gte=since).exclude(
+                filter_name='sort_by'
+            ).values('filter_name', 'filter_value').annotate(
+                total=Sum('searches_count')
+            ).order_by('-total')[:self.stats_limit],
+        })
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(FormationSearchQueryStat)
+class FormationSearchQueryStatAdmin(admin.ModelAdmin):
+    """Administration des agrégats quotidiens de requêtes"""
+    list_display = ['date', 'query', 'searches_count', 'zero_results_count', 'average_results', 'users_count']
+    list_filter = ['date']
+    search_fields = ['query']
+    date_hierarchy = 'date'
+    ordering = ['-date', '-searches_count']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FormationSearchFilterStat)
+class FormationSearchFilterStatAdmin(admin.ModelAdmin):
+    """Administration des agrégats quotidiens de filtres"""
+    list_display = ['date', 'filter_name', 'filter_value', 'searches_count']
+    list_filter = ['filter_name', 'date']
+    date_hierarchy = 'date'
+    ordering = ['-date', '-searches_count']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # Configuration de l'admin
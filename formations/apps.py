@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FormationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "formations"
+
+    def ready(self):
+        from . import signals, stats  # noqa: F401
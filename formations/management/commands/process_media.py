@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from formations.media import process_pending_media
+from formations.models import FormationMedia
+
+
+class Command(BaseCommand):
+    help = "Analyse les médias de formation en attente (dimensions, durée, taille, empreinte, vignette)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Réanalyse tous les médias, y compris déjà analysés")
+
+    def handle(self, *args, **options):
+        queryset = FormationMedia.objects.all() if options['all'] else None
+        count = process_pending_media(queryset)
+        self.stdout.write(self.style.SUCCESS(f"{count} média(s) analysé(s)"))
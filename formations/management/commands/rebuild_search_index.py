@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from formations.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des articles de formation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre d'articles indexés par lot")
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stderr.write(self.style.WARNING("Moteur de base de données sans index plein texte"))
+            return
+        indexed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{indexed} article(s) indexé(s)"))
@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from formations.search_logs import purge_search_logs, rollup_search_logs, search_log_writer
+
+
+class Command(BaseCommand):
+    help = "Agrège les logs de recherche par jour (requêtes, recherches sans résultat, filtres) et purge les anciens logs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Jour à agréger (AAAA-MM-JJ) ; par défaut hier et aujourd'hui")
+        parser.add_argument('--days', type=int, default=None, help="Agrège les N derniers jours")
+        parser.add_argument('--no-purge', action='store_true', help="Conserve les logs bruts")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['date']:
+            try:
+                days = [date.fromisoformat(options['date'])]
+            except ValueError:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ")
+        else:
+            count = options['days'] or 2
+            days = [today - timedelta(days=offset) for offset in reversed(range(count))]
+
+        # Les logs encore en file dans ce processus sont écrits avant l'agrégation
+        search_log_writer.flush()
+
+        for day in days:
+            total = rollup_search_logs(day)
+            self.stdout.write(f"{day} : {total} recherche(s) agrégée(s)")
+
+        if not options['no_purge']:
+            deleted = purge_search_logs()
+            self.stdout.write(f"{deleted} log(s) brut(s) supprimé(s)")
+        self.stdout.write(self.style.SUCCESS("Agrégation terminée"))
@@ -0,0 +1,71 @@
+"""
+Analyse des médias de formation après envoi.
+
+L'enregistrement d'un nouveau fichier remet ses métadonnées à zéro (statut
+`pending`) ; l'analyse est ensuite confiée au pool `core.media.media_pool`
+une fois la transaction validée, sans bloquer la requête d'envoi.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.media import inspect_media, media_pool
+
+from .models import FormationMedia
+
+logger = logging.getLogger(__name__)
+
+
+def process_media(media_id):
+    """Analyse le fichier d'un média et enregistre ses métadonnées et sa vignette"""
+    media = FormationMedia.objects.filter(pk=media_id).first()
+    if media is None or not media.file:
+        return
+    file_name = media.file.name
+    try:
+        metadata = inspect_media(media.file, media.file_type)
+    except Exception:
+        logger.exception("Analyse impossible du média %s", media_id)
+        FormationMedia.objects.filter(pk=media_id, file=file_name).update(
+            processing_status='failed', processed_at=timezone.now()
+        )
+        return
+
+    thumbnail = metadata.pop('thumbnail', None)
+    old_thumbnail = media.thumbnail.name
+    values = {
+        'file_size': metadata.get('file_size'),
+        'content_hash': metadata.get('content_hash', ''),
+        'duration': metadata.get('duration'),
+        'dimensions': metadata.get('dimensions', ''),
+        'processing_status': 'done',
+        'processed_at': timezone.now(),
+    }
+    if thumbnail is not None:
+        values['thumbnail'] = media.thumbnail.storage.save(
+            media.thumbnail.field.generate_filename(media, f"{media.pk}.jpg"), thumbnail
+        )
+    # Le fichier a pu être remplacé pendant l'analyse : seule la version analysée est mise à jour
+    updated = FormationMedia.objects.filter(pk=media_id, file=file_name).update(**values)
+    if thumbnail is not None:
+        stale = old_thumbnail if updated else values['thumbnail']
+        if stale:
+            media.thumbnail.storage.delete(stale)
+
+
+def schedule_media_processing(media):
+    """Programme l'analyse d'un média après validation de la transaction"""
+    media_id = media.pk
+    transaction.on_commit(lambda: media_pool.submit(process_media, media_id))
+
+
+def process_pending_media(queryset=None):
+    """Analyse immédiatement les médias en attente ou en échec ; retourne leur nombre"""
+    if queryset is None:
+        queryset = FormationMedia.objects.exclude(processing_status='done')
+    count = 0
+    for media_id in queryset.values_list('pk', flat=True).iterator():
+        process_media(media_id)
+        count += 1
+    return count
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:59
+
+from django.db import migrations, models
+
+
+def build_category_paths(apps, schema_editor):
+    """Calcule le chemin matérialisé des catégories existantes, parents d'abord"""
+    FormationCategory = apps.get_model("formations", "FormationCategory")
+    categories = {category.pk: category for category in FormationCategory.objects.all()}
+
+    def compute(category):
+        if category.path:
+            return category.path
+        parent = categories.get(category.parent_id)
+        parent_path = compute(parent) if parent else ""
+        category.path = f"{parent_path}{category.pk:06d}/"
+        category.depth = category.path.count("/") - 1
+        return category.path
+
+    for category in categories.values():
+        compute(category)
+    FormationCategory.objects.bulk_update(categories.values(), ["path", "depth"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("formations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formationcategory",
+            name="depth",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Profondeur"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationcategory",
+            name="path",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=255,
+                verbose_name="Chemin dans l'arborescence",
+            ),
+        ),
+        migrations.RunPython(build_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:12
+
+import html
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Logique de formations/search.py et core/text.py (index, document_for, strip_html, analyze)
+# figée à la date de la migration
+SQLITE_TABLE = "formations_article_fts"
+POSTGRES_TABLE = "formations_article_search"
+
+TAG_RE = re.compile(r"<[^>]+>")
+BLOCK_TAG_RE = re.compile(r"</?(p|div|br|li|ul|ol|h[1-6]|blockquote|tr|table|section|article)\b[^>]*>", re.IGNORECASE)
+SCRIPT_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+WHITESPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+FRENCH_STOP_WORDS = frozenset("""
+a ai au aux avec c ce ces cet cette d dans de des du elle elles en est et eu
+il ils j je l la le les leur leurs lui m ma mais me mes moi mon n ne nos notre
+nous on ou par pour qu que qui s sa se ses son sont sur t ta te tes toi ton tu
+un une vos votre vous y
+""".split())
+
+FRENCH_SUFFIXES = (
+    "issements", "issement", "atrices", "ateurs", "ations", "ements",
+    "atrice", "ateur", "ation", "ement", "ances", "ences", "euses", "ismes",
+    "istes", "iques", "ables", "ance", "ence", "euse", "isme", "iste", "ique",
+    "able", "ites", "eurs", "ite", "eur", "ees", "ee", "es", "er", "ez", "e",
+    "s", "x",
+)
+MIN_STEM_LENGTH = 3
+
+
+def strip_html(value):
+    """Convertit un contenu HTML en texte brut (blocs séparés par des espaces)"""
+    if not value:
+        return ""
+    text = SCRIPT_RE.sub(" ", value)
+    text = BLOCK_TAG_RE.sub(" ", text)
+    text = TAG_RE.sub("", text)
+    return WHITESPACE_RE.sub(" ", html.unescape(text)).strip()
+
+
+def stem_french(word):
+    """Réduit un mot (minuscule, sans accents) à sa racine approximative"""
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return word
+    if word.endswith("aux") and len(word) > 4:
+        return word[:-3] + "al"
+    for suffix in FRENCH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def analyze(value):
+    """Retourne les racines des mots significatifs d'un texte brut"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return [stem_french(token) for token in WORD_RE.findall(folded) if token not in FRENCH_STOP_WORDS]
+
+
+def document_for(article):
+    """Retourne la ligne d'index (id, titre, catégorie, contenu) d'un article"""
+    body = " ".join(filter(None, [strip_html(article.excerpt), strip_html(article.content)]))
+    return (
+        article.pk,
+        " ".join(analyze(article.title)),
+        " ".join(analyze(article.category.name)),
+        " ".join(analyze(body)),
+    )
+
+
+def create_sqlite_index(cursor, rows):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+        f"USING fts5(title, category, body, tokenize='unicode61')"
+    )
+    if not rows:
+        return
+    cursor.executemany(
+        f"INSERT INTO {SQLITE_TABLE} (rowid, title, category, body) VALUES (%s, %s, %s, %s)",
+        rows,
+    )
+
+
+def create_postgres_index(cursor, rows):
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+        f"article_id bigint PRIMARY KEY "
+        f"REFERENCES formations_formationarticle (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        f"document tsvector NOT NULL)"
+    )
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx "
+        f"ON {POSTGRES_TABLE} USING GIN (document)"
+    )
+    if not rows:
+        return
+    cursor.executemany(
+        f"INSERT INTO {POSTGRES_TABLE} (article_id, document) VALUES (%s, "
+        f"setweight(to_tsvector('simple', %s), 'A') || "
+        f"setweight(to_tsvector('simple', %s), 'B') || "
+        f"setweight(to_tsvector('simple', %s), 'C')) "
+        f"ON CONFLICT (article_id) DO UPDATE SET document = EXCLUDED.document",
+        rows,
+    )
+
+
+INDEX_CREATORS = {"sqlite": create_sqlite_index, "postgresql": create_postgres_index}
+INDEX_TABLES = {"sqlite": SQLITE_TABLE, "postgresql": POSTGRES_TABLE}
+
+
+def create_search_index(apps, schema_editor):
+    """Crée l'index plein texte du moteur courant et y indexe les articles publiés"""
+    create_index = INDEX_CREATORS.get(schema_editor.connection.vendor)
+    if create_index is None:
+        return
+    FormationArticle = apps.get_model("formations", "FormationArticle")
+    articles = FormationArticle.objects.using(schema_editor.connection.alias).filter(
+        status="published"
+    ).select_related("category")
+    with schema_editor.connection.cursor() as cursor:
+        create_index(cursor, [document_for(article) for article in articles.iterator()])
+
+
+def drop_search_index(apps, schema_editor):
+    table = INDEX_TABLES.get(schema_editor.connection.vendor)
+    if table is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("formations", "0002_formationcategory_depth_formationcategory_path"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
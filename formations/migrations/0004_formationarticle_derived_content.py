@@ -0,0 +1,138 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:09
+
+import html
+import math
+import re
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# Logique de core/content.py et core/text.py (derive_content, backfill_derived_content, strip_html)
+# figée à la date de la migration
+TAG_RE = re.compile(r"<[^>]+>")
+BLOCK_TAG_RE = re.compile(r"</?(p|div|br|li|ul|ol|h[1-6]|blockquote|tr|table|section|article)\b[^>]*>", re.IGNORECASE)
+SCRIPT_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+WHITESPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+HEADING_RE = re.compile(r"<h([1-6])\b([^>]*)>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+ID_ATTR_RE = re.compile(r"\bid\s*=\s*[\"']([^\"']+)[\"']", re.IGNORECASE)
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+DERIVED_FIELDS = ["plain_text", "generated_excerpt", "word_count", "table_of_contents", "reading_time"]
+
+
+def strip_html(value):
+    """Convertit un contenu HTML en texte brut (blocs séparés par des espaces)"""
+    if not value:
+        return ""
+    text = SCRIPT_RE.sub(" ", value)
+    text = BLOCK_TAG_RE.sub(" ", text)
+    text = TAG_RE.sub("", text)
+    return WHITESPACE_RE.sub(" ", html.unescape(text)).strip()
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Tronque un texte brut à `length` caractères, sans couper de mot"""
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(" ")
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,;:.") + "..."
+
+
+def extract_table_of_contents(content):
+    """Retourne les titres (h1 à h6) du contenu : niveau, texte et ancre"""
+    toc = []
+    used_anchors = set()
+    for match in HEADING_RE.finditer(content or ""):
+        level, attributes, inner = match.groups()
+        title = strip_html(inner)
+        if not title:
+            continue
+        id_match = ID_ATTR_RE.search(attributes)
+        anchor = id_match.group(1) if id_match else slugify(title) or "section"
+        base, suffix = anchor, 2
+        while anchor in used_anchors:
+            anchor = f"{base}-{suffix}"
+            suffix += 1
+        used_anchors.add(anchor)
+        toc.append({"level": int(level), "title": title, "anchor": anchor})
+    return toc
+
+
+def derive_content(content):
+    """Calcule les données dérivées d'un contenu HTML"""
+    plain_text = strip_html(content)
+    word_count = len(WORD_RE.findall(plain_text))
+    return {
+        "plain_text": plain_text,
+        "generated_excerpt": make_excerpt(plain_text),
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+        "table_of_contents": extract_table_of_contents(content),
+    }
+
+
+def backfill(queryset, batch_size=500):
+    """Recalcule par lots les données dérivées des lignes d'un queryset"""
+    batch = []
+    for instance in queryset.only("pk", "content").order_by("pk").iterator(chunk_size=batch_size):
+        for field, value in derive_content(instance.content).items():
+            setattr(instance, field, value)
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            queryset.model.objects.bulk_update(batch, DERIVED_FIELDS)
+            batch = []
+    if batch:
+        queryset.model.objects.bulk_update(batch, DERIVED_FIELDS)
+
+
+def backfill_derived_content(apps, schema_editor):
+    """Calcule les données dérivées du contenu des articles existants"""
+    FormationArticle = apps.get_model("formations", "FormationArticle")
+    backfill(FormationArticle.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("formations", "0003_article_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formationarticle",
+            name="generated_excerpt",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="Extrait généré"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationarticle",
+            name="plain_text",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="Texte brut"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationarticle",
+            name="table_of_contents",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                editable=False,
+                verbose_name="Table des matières",
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationarticle",
+            name="word_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Nombre de mots"
+            ),
+        ),
+        migrations.RunPython(backfill_derived_content, migrations.RunPython.noop),
+    ]
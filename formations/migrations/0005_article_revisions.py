@@ -0,0 +1,114 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:11
+
+import json
+import zlib
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Logique de formations/revisions.py (champs suivis, instantané compressé) figée à la date de la migration
+REVISION_FIELDS = ("title", "excerpt", "content")
+
+
+def build_snapshot_data(state):
+    """Retourne (données compressées, taille du texte complet) de l'instantané d'un état"""
+    payload = {field: state.get(field) or "" for field in REVISION_FIELDS}
+    data = zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    return data, sum(len(value) for value in payload.values())
+
+
+def create_initial_snapshots(apps, schema_editor):
+    """Enregistre l'état actuel de chaque article comme instantané de sa version"""
+    FormationArticle = apps.get_model("formations", "FormationArticle")
+    FormationArticleRevision = apps.get_model("formations", "FormationArticleRevision")
+    revisions = []
+    for article in FormationArticle.objects.only("pk", "version", "author", *REVISION_FIELDS).iterator():
+        state = {field: getattr(article, field) for field in REVISION_FIELDS}
+        data, size = build_snapshot_data(state)
+        revisions.append(
+            FormationArticleRevision(
+                article_id=article.pk,
+                number=article.version,
+                is_snapshot=True,
+                data=data,
+                size=size,
+                author_id=article.author_id,
+            )
+        )
+    FormationArticleRevision.objects.bulk_create(revisions, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("formations", "0004_formationarticle_derived_content"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="formationarticle",
+            name="previous_version",
+        ),
+        migrations.CreateModel(
+            name="FormationArticleRevision",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField(verbose_name="Numéro")),
+                (
+                    "is_snapshot",
+                    models.BooleanField(
+                        default=False, verbose_name="Instantané complet"
+                    ),
+                ),
+                ("data", models.BinaryField(verbose_name="Données compressées")),
+                (
+                    "size",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Taille du texte (caractères)"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Date de création"
+                    ),
+                ),
+                (
+                    "article",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="revisions",
+                        to="formations.formationarticle",
+                        verbose_name="Article",
+                    ),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Auteur",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Révision d'article",
+                "verbose_name_plural": "Révisions d'articles",
+                "ordering": ["article", "-number"],
+                "unique_together": {("article", "number")},
+            },
+        ),
+        migrations.RunPython(create_initial_snapshots, migrations.RunPython.noop),
+    ]
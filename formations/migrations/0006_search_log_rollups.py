@@ -0,0 +1,109 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("formations", "0005_article_revisions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormationSearchFilterStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                ("filter_name", models.CharField(max_length=50, verbose_name="Filtre")),
+                (
+                    "filter_value",
+                    models.CharField(max_length=100, verbose_name="Valeur"),
+                ),
+                (
+                    "searches_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Nombre de recherches"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Statistique quotidienne de filtre",
+                "verbose_name_plural": "Statistiques quotidiennes de filtres",
+                "ordering": ["-date", "-searches_count"],
+            },
+        ),
+        migrations.CreateModel(
+            name="FormationSearchQueryStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                ("query", models.CharField(max_length=500, verbose_name="Requête")),
+                (
+                    "searches_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Nombre de recherches"
+                    ),
+                ),
+                (
+                    "zero_results_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Recherches sans résultat"
+                    ),
+                ),
+                (
+                    "total_results",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Total des résultats"
+                    ),
+                ),
+                (
+                    "users_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Utilisateurs distincts"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Statistique quotidienne de requête",
+                "verbose_name_plural": "Statistiques quotidiennes de requêtes",
+                "ordering": ["-date", "-searches_count"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="formationsearchlog",
+            index=models.Index(
+                fields=["created_at"], name="formations__created_9d5d07_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="formationsearchquerystat",
+            index=models.Index(
+                fields=["date", "searches_count"], name="formations__date_dbe769_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="formationsearchquerystat",
+            unique_together={("date", "query")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="formationsearchfilterstat",
+            unique_together={("date", "filter_name", "filter_value")},
+        ),
+    ]
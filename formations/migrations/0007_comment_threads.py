@@ -0,0 +1,108 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_comment_threads(apps, schema_editor):
+    """Calcule chemins, fils et compteurs des commentaires existants"""
+    FormationArticle = apps.get_model("formations", "FormationArticle")
+    FormationComment = apps.get_model("formations", "FormationComment")
+    comments = {comment.pk: comment for comment in FormationComment.objects.all()}
+
+    def compute(comment):
+        chain = []
+        while comment is not None and not comment.path:
+            chain.append(comment)
+            comment = comments.get(comment.parent_id)
+        parent_path = comment.path if comment is not None else ""
+        for node in reversed(chain):
+            node.path = f"{parent_path}{node.pk:08d}/"
+            parent_path = node.path
+
+    for comment in comments.values():
+        compute(comment)
+
+    article_counts = {}
+    for comment in comments.values():
+        ids = [int(segment) for segment in comment.path.split("/") if segment]
+        comment.depth = len(ids) - 1
+        comment.thread_id = ids[0]
+        if not (comment.is_approved and comment.is_active):
+            continue
+        article_counts[comment.article_id] = article_counts.get(comment.article_id, 0) + 1
+        if comment.parent_id:
+            comments[comment.parent_id].replies_count += 1
+        for ancestor_id in ids[:-1]:
+            comments[ancestor_id].descendants_count += 1
+    FormationComment.objects.bulk_update(
+        comments.values(),
+        ["path", "depth", "thread", "replies_count", "descendants_count"],
+        batch_size=500,
+    )
+    FormationArticle.objects.update(comments_count=0)
+    for article_id, count in article_counts.items():
+        FormationArticle.objects.filter(pk=article_id).update(comments_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("formations", "0006_search_log_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formationcomment",
+            name="depth",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Profondeur"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationcomment",
+            name="descendants_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Réponses du fil"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationcomment",
+            name="path",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=900,
+                verbose_name="Chemin",
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationcomment",
+            name="replies_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Réponses directes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationcomment",
+            name="thread",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thread_comments",
+                to="formations.formationcomment",
+                verbose_name="Fil",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="formationcomment",
+            index=models.Index(
+                fields=["article", "depth", "created_at"],
+                name="formations__article_f809e7_idx",
+            ),
+        ),
+        migrations.RunPython(build_comment_threads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("formations", "0007_comment_threads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formationmedia",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=64,
+                verbose_name="Empreinte SHA-256",
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationmedia",
+            name="processed_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Date d'analyse"
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationmedia",
+            name="processing_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "En attente"),
+                    ("done", "Analysé"),
+                    ("failed", "Échec"),
+                ],
+                default="pending",
+                editable=False,
+                max_length=20,
+                verbose_name="Statut d'analyse",
+            ),
+        ),
+        migrations.AddField(
+            model_name="formationmedia",
+            name="thumbnail",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                upload_to="formations/media/thumbnails/",
+                verbose_name="Vignette",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="formationmedia",
+            name="file_size",
+            field=models.PositiveBigIntegerField(
+                blank=True, null=True, verbose_name="Taille du fichier (bytes)"
+            ),
+        ),
+    ]
@@ -1,10 +1,49 @@
 from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.conf import settings
+from django.db import connections, transaction
+from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 from django.utils import timezone
+from core.counters import view_counter
+from core.models import DerivedContentModel
+from .revisions import REVISION_FIELDS, build_revision_data, get_revision_states
+
+
+# Chemin matérialisé : identifiants zéro-paddés séparés par '/', ex. "000001/000004/"
+CATEGORY_PATH_SEPARATOR = '/'
+CATEGORY_PATH_SEGMENT_WIDTH = 6
+
+
+class FormationCategoryQuerySet(models.QuerySet):
+    """QuerySet des catégories exploitant le chemin matérialisé"""
+
+    def descendants_of(self, category, include_self=True):
+        """Retourne le sous-arbre d'une catégorie (requête indexée sur le préfixe du chemin)"""
+        queryset = self.filter(category.subtree_q())
+        if not include_self:
+            queryset = queryset.exclude(pk=category.pk)
+        return queryset
+
+    def with_articles_count(self):
+        """Annote le nombre d'articles publiés directs et du sous-arbre, en une seule requête"""
+        direct = FormationArticle.objects.filter(
+            status='published', category=OuterRef('pk')
+        ).order_by().values('category').annotate(total=Count('pk')).values('total')
+        subtree = FormationArticle.objects.filter(
+            status='published', category__path__startswith=OuterRef('path')
+        ).order_by().values('status').annotate(total=Count('pk')).values('total')
+        return self.annotate(direct_articles_count=Coalesce(Subquery(direct), 0)).annotate(
+            # Chemin vide (voir FormationCategory.subtree_q) : articles directs seulement
+            subtree_articles_count=Case(
+                When(path='', then=F('direct_articles_count')),
+                default=Coalesce(Subquery(subtree), 0),
+            ),
+        )
 
 
 class FormationCategory(models.Model):
@@ -19,6 +58,13 @@ class FormationCategory(models.Model):
     is_active = models.BooleanField(default=True, verbose_name="Active")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+    
+    # Arborescence matérialisée (maintenue automatiquement)
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False,
+                            verbose_name="Chemin dans l'arborescence")
+    depth = models.PositiveIntegerField(default=0, editable=False, verbose_name="Profondeur")
+
+    objects = FormationCategoryQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Catégorie de formation"
@@ -30,28 +76,125 @@ class FormationCategory(models.Model):
             return f"{self.parent.name} > {self.name}"
         return self.name
 
+    def clean(self):
+        current_path, parent_path = self._stored_paths()
+        if current_path and parent_path.startswith(current_path):
+            raise ValidationError({'parent': "Une catégorie ne peut pas être rattachée à l'une de ses sous-catégories."})
+
+    def save(self, *args, **kwargs):
+        current_path, parent_path = self._stored_paths()
+        if current_path and parent_path.startswith(current_path):
+            raise ValueError("Une catégorie ne peut pas être rattachée à l'une de ses sous-catégories.")
+        # L'instance peut être périmée si un ancêtre a été déplacé entre-temps
+        self.path = current_path
+        self.depth = max(current_path.count(CATEGORY_PATH_SEPARATOR) - 1, 0)
+        super().save(*args, **kwargs)
+        self._update_path(current_path, parent_path)
+
+    def _stored_paths(self):
+        """Relit en base le chemin actuel de la catégorie et celui de son parent (une requête)"""
+        pks = [pk for pk in (self.pk, self.parent_id) if pk]
+        if not pks:
+            return '', ''
+        paths = dict(FormationCategory.objects.filter(pk__in=pks).values_list('pk', 'path'))
+        return paths.get(self.pk, ''), paths.get(self.parent_id, '')
+
+    def _update_path(self, current_path, parent_path):
+        """Recalcule le chemin et réécrit le préfixe de tout le sous-arbre en cas de déplacement"""
+        new_path = f"{parent_path}{self.pk:0{CATEGORY_PATH_SEGMENT_WIDTH}d}{CATEGORY_PATH_SEPARATOR}"
+        new_depth = new_path.count(CATEGORY_PATH_SEPARATOR) - 1
+        if new_path != current_path:
+            if current_path:
+                old_depth = current_path.count(CATEGORY_PATH_SEPARATOR) - 1
+                FormationCategory.objects.filter(path__startswith=current_path).update(
+                    path=Concat(Value(new_path), Substr('path', len(current_path) + 1)),
+                    depth=F('depth') + new_depth - old_depth,
+                )
+            else:
+                FormationCategory.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        self.path = new_path
+        self.depth = new_depth
+
+    def subtree_q(self, prefix=''):
+        """
+        Condition du sous-arbre de la catégorie (`prefix` : 'category__' pour
+        filtrer des articles). Une catégorie sans chemin (chargée sans save(),
+        par loaddata par exemple) ne couvre qu'elle-même : le préfixe vide
+        couvrirait toutes les catégories.
+        """
+        if not self.path:
+            return Q(**{f'{prefix}pk': self.pk})
+        return Q(**{f'{prefix}path__startswith': self.path})
+
+    def get_ancestor_ids(self):
+        """Retourne les identifiants de la racine jusqu'à cette catégorie incluse"""
+        return [int(segment) for segment in self.path.split(CATEGORY_PATH_SEPARATOR) if segment]
+
     def get_absolute_url(self):
         # URL temporaire pour éviter l'erreur NoReverseMatch
         return f"/formations/categories/{self.slug}/"
 
     def get_breadcrumbs(self):
         """Retourne le fil d'Ariane pour cette catégorie"""
-        breadcrumbs = []
-        current = self
-        while current:
-            breadcrumbs.insert(0, current)
-            current = current.parent
+        ancestor_ids = self.get_ancestor_ids()[:-1]
+        ancestors = FormationCategory.objects.in_bulk(ancestor_ids)
+        breadcrumbs = [ancestors[pk] for pk in ancestor_ids if pk in ancestors]
+        breadcrumbs.append(self)
         return breadcrumbs
 
     def get_articles_count(self):
         """Retourne le nombre d'articles dans cette catégorie et ses sous-catégories"""
-        count = self.formationarticle_set.filter(status='published').count()
-        for child in self.children.all():
-            count += child.get_articles_count()
-        return count
-
-
-class FormationArticle(models.Model):
+        if hasattr(self, 'subtree_articles_count'):
+            return self.subtree_articles_count
+        return FormationArticle.objects.filter(self.subtree_q('category__'), status='published').count()
+
+
+def build_category_tree(categories):
+    """
+    Rattache en mémoire chaque catégorie à son parent (attribut `tree_children`)
+    et retourne les racines de la liste, dans l'ordre reçu.
+    """
+    by_pk = {category.pk: category for category in categories}
+    roots = []
+    for category in categories:
+        category.tree_children = []
+    for category in categories:
+        parent = by_pk.get(category.parent_id)
+        if parent is not None:
+            category.parent = parent
+            parent.tree_children.append(category)
+        elif category.parent_id is None:
+            roots.append(category)
+    return roots
+
+
+def attach_category_subtrees(categories):
+    """
+    Rattache aux catégories données (éventuellement plusieurs instances d'une
+    même catégorie) leurs sous-catégories actives et les nombres d'articles de
+    chaque nœud, en une seule requête.
+    """
+    categories = list(categories)
+    if not categories:
+        return categories
+    prefixes = Q()
+    for category in {category.pk: category for category in categories}.values():
+        prefixes |= category.subtree_q()
+    nodes = FormationCategory.objects.filter(prefixes).filter(
+        Q(is_active=True) | Q(pk__in={category.pk for category in categories})
+    ).with_articles_count().order_by('depth', 'order', 'name')
+    nodes = list(nodes)
+    build_category_tree(nodes)
+    by_pk = {node.pk: node for node in nodes}
+    for category in categories:
+        node = by_pk[category.pk]
+        category.tree_children = node.tree_children
+        category.direct_articles_count = node.direct_articles_count
+        category.subtree_articles_count = node.subtree_articles_count
+    return categories
+
+
+class FormationArticle(DerivedContentModel):
     """Article de formation"""
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
@@ -97,10 +240,8 @@ class FormationArticle(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
     published_at = models.DateTimeField(null=True, blank=True, verbose_name="Date de publication")
     
-    # Versioning
+    # Versioning (numéro de la dernière révision, voir FormationArticleRevision)
     version = models.PositiveIntegerField(default=1, verbose_name="Version")
-    previous_version = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, 
-                                       related_name='next_versions', verbose_name="Version précédente")
 
     class Meta:
         verbose_name = "Article de formation"
@@ -110,18 +251,79 @@ class FormationArticle(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valeurs chargées des champs historisés : la détection des changements
+        # se fait à l'enregistrement sans relire la base
+        instance._revision_state = {
+            field: instance.__dict__[field] for field in REVISION_FIELDS if field in instance.__dict__
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
         
         # Gestion du versioning
-        if self.pk:
-            old_instance = FormationArticle.objects.get(pk=self.pk)
-            if old_instance.content != self.content or old_instance.title != self.title:
-                self.version += 1
-                self.previous_version = old_instance
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        tracked = [
+            field for field in REVISION_FIELDS
+            if field not in deferred and (update_fields is None or field in update_fields)
+        ]
+        previous_state = getattr(self, '_revision_state', {})
+        adding = self._state.adding
+        if not adding and all(
+            field in previous_state and previous_state[field] == getattr(self, field)
+            for field in tracked
+        ):
+            super().save(*args, **kwargs)
+            return
         
-        super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get('using')):
+            if not adding:
+                # Numéro lu sous verrou : deux enregistrements concurrents ne
+                # peuvent pas obtenir le même numéro de révision
+                current = type(self)._default_manager.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('version', flat=True).get()
+                if current != self.version:
+                    # Révision écrite entre-temps : l'état chargé ne peut plus
+                    # servir de base au delta, la révision sera un instantané
+                    previous_state = None
+                self.version = current + 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = set(update_fields) | {'version'}
+            super().save(*args, **kwargs)
+            self.record_revision(None if adding else previous_state)
+
+    def record_revision(self, previous_state):
+        """Ajoute à l'historique la révision correspondant à l'état courant"""
+        deferred = self.get_deferred_fields()
+        if previous_state is not None and any(field not in previous_state for field in REVISION_FIELDS):
+            # Champ non chargé (defer) : repartir de la révision précédente
+            previous = get_revision_states(self, [self.version - 1]).get(self.version - 1)
+            previous_state = previous[1] if previous else None
+        state = {
+            field: previous_state[field] if field in deferred and previous_state else getattr(self, field)
+            for field in REVISION_FIELDS
+        }
+        is_snapshot, data, size = build_revision_data(self.version, state, previous_state)
+        FormationArticleRevision.objects.create(
+            article=self,
+            number=self.version,
+            is_snapshot=is_snapshot,
+            data=data,
+            size=size,
+            # Auteur de la modification (positionné par la vue), sinon auteur de l'article
+            author_id=getattr(getattr(self, 'revision_author', None), 'pk', None) or self.author_id,
+        )
+        self._revision_state = state
+
+    def get_revision(self, number):
+        """Retourne (révision, état) pour un numéro de révision, ou None"""
+        return get_revision_states(self, [number]).get(number)
 
     def get_absolute_url(self):
         # URL temporaire pour éviter l'erreur NoReverseMatch
@@ -134,14 +336,13 @@ class FormationArticle(models.Model):
         return breadcrumbs
 
     def increment_views(self):
-        """Incrémente le compteur de vues"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """Incrémente le compteur de vues (écriture différée)"""
+        view_counter.increment(self)
 
     def update_comments_count(self):
-        """Met à jour le compteur de commentaires"""
-        self.comments_count = self.comments.filter(is_approved=True).count()
-        self.save(update_fields=['comments_count'])
+        """Recalcule le compteur de commentaires visibles (tenu à jour incrémentalement)"""
+        self.comments_count = self.comments.visible().count()
+        FormationArticle.objects.filter(pk=self.pk).update(comments_count=self.comments_count)
 
     def update_likes_count(self):
         """Met à jour le compteur de likes"""
@@ -149,6 +350,26 @@ class FormationArticle(models.Model):
         self.save(update_fields=['likes_count'])
 
 
+class FormationArticleRevision(models.Model):
+    """Révision d'un article : instantané ou delta compressé (voir formations.revisions)"""
+    article = models.ForeignKey(FormationArticle, on_delete=models.CASCADE, related_name='revisions', verbose_name="Article")
+    number = models.PositiveIntegerField(verbose_name="Numéro")
+    is_snapshot = models.BooleanField(default=False, verbose_name="Instantané complet")
+    data = models.BinaryField(verbose_name="Données compressées")
+    size = models.PositiveIntegerField(default=0, verbose_name="Taille du texte (caractères)")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Auteur")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+
+    class Meta:
+        verbose_name = "Révision d'article"
+        verbose_name_plural = "Révisions d'articles"
+        ordering = ['article', '-number']
+        unique_together = ['article', 'number']
+
+    def __str__(self):
+        return f"{self.article_id} - révision {self.number}"
+
+
 class FormationFavorite(models.Model):
     """Favoris des utilisateurs pour les articles"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Utilisateur")
@@ -167,6 +388,21 @@ class FormationFavorite(models.Model):
         return f"{self.user.username} - {self.article.title}"
 
 
+COMMENT_PATH_SEGMENT_WIDTH = 8
+COMMENT_MAX_DEPTH = 50
+
+
+class FormationCommentQuerySet(models.QuerySet):
+    """Requêtes sur les commentaires (arborescence par chemin matérialisé)"""
+
+    def visible(self):
+        return self.filter(is_approved=True, is_active=True)
+
+    def in_threads(self, roots):
+        """Commentaires des fils des racines données, dans l'ordre de l'arbre"""
+        return self.filter(thread_id__in=[root.pk for root in roots]).order_by('path')
+
+
 class FormationComment(models.Model):
     """Commentaires sur les articles de formation"""
     article = models.ForeignKey(FormationArticle, on_delete=models.CASCADE, 
@@ -175,10 +411,20 @@ class FormationComment(models.Model):
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, 
                               related_name='replies', verbose_name="Commentaire parent")
     
+    # Arborescence : chemin matérialisé (ids sur 8 chiffres) et commentaire racine du fil
+    thread = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, editable=False,
+                              related_name='thread_comments', verbose_name="Fil")
+    path = models.CharField(max_length=900, blank=True, db_index=True, editable=False, verbose_name="Chemin")
+    depth = models.PositiveIntegerField(default=0, editable=False, verbose_name="Profondeur")
+    
     content = models.TextField(verbose_name="Contenu")
     is_approved = models.BooleanField(default=False, verbose_name="Approuvé")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
     
+    # Compteurs de réponses visibles, tenus à jour incrémentalement
+    replies_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Réponses directes")
+    descendants_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Réponses du fil")
+    
     # Modération
     moderated_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, 
                                     related_name='moderated_comments', verbose_name="Modéré par")
@@ -188,17 +434,193 @@ class FormationComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
 
+    objects = FormationCommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Commentaire de formation"
         verbose_name_plural = "Commentaires de formation"
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['article', 'depth', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Commentaire de {self.author.username} sur {self.article.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Visibilité et parent chargés : les compteurs sont ajustés à
+        # l'enregistrement sans relire la base
+        instance._was_visible = instance.is_visible if {'is_approved', 'is_active'} <= set(field_names) else None
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    @property
+    def is_visible(self):
+        return self.is_approved and self.is_active
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        if adding:
+            if self.parent_id and self.parent.depth >= COMMENT_MAX_DEPTH:
+                # Au-delà de la profondeur maximale, la réponse rejoint le parent
+                self.parent = self.parent.parent
+            was_visible = False
+        else:
+            if self.parent_id != getattr(self, '_loaded_parent_id', self.parent_id):
+                raise ValueError("Un commentaire ne peut pas changer de parent.")
+            if update_fields is not None and not {'is_approved', 'is_active'}.intersection(update_fields):
+                was_visible = self.is_visible
+            else:
+                was_visible = getattr(self, '_was_visible', None)
+                if was_visible is None:
+                    was_visible = type(self).objects.filter(pk=self.pk).visible().exists()
+
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if adding:
+                self._set_path()
+            if self.is_visible != was_visible:
+                self._update_counts(1 if self.is_visible else -1)
+        self._was_visible = self.is_visible
+        self._loaded_parent_id = self.parent_id
+
+    def _set_path(self):
+        """Calcule le chemin et le fil d'un commentaire qui vient d'être créé"""
+        segment = f"{self.pk:0{COMMENT_PATH_SEGMENT_WIDTH}d}/"
+        if self.parent_id:
+            parent = self.parent
+            self.path = f"{parent.path}{segment}"
+            self.depth = parent.depth + 1
+            self.thread_id = parent.thread_id or parent.pk
+        else:
+            self.path = segment
+            self.depth = 0
+            self.thread_id = self.pk
+        type(self).objects.filter(pk=self.pk).update(path=self.path, depth=self.depth, thread_id=self.thread_id)
+
+    def get_ancestor_ids(self):
+        """Retourne les ids des ancêtres, de la racine au parent"""
+        return [int(segment) for segment in self.path.split('/')[:-2] if segment]
+
+    def _update_counts(self, delta):
+        """Répercute l'apparition (+1) ou la disparition (-1) du commentaire"""
+        FormationComment.update_visible_counts(self.article_id, self.parent_id, self.get_ancestor_ids(), delta)
+
+    @staticmethod
+    def update_visible_counts(article_id, parent_id, ancestor_ids, delta):
+        """Met à jour les compteurs de l'article, du parent et des ancêtres en F()"""
+        FormationArticle.objects.filter(pk=article_id).update(comments_count=F('comments_count') + delta)
+        if parent_id:
+            FormationComment.objects.filter(pk=parent_id).update(replies_count=F('replies_count') + delta)
+        if ancestor_ids:
+            FormationComment.objects.filter(pk__in=ancestor_ids).update(
+                descendants_count=F('descendants_count') + delta
+            )
+
     def get_replies_count(self):
         """Retourne le nombre de réponses"""
-        return self.replies.filter(is_approved=True, is_active=True).count()
+        return self.replies_count
+
+
+def build_comment_tree(comments, root=None):
+    """
+    Rattache en mémoire les commentaires (triés par chemin) à leur parent via
+    l'attribut `tree_replies` ; un commentaire dont le parent est absent de la
+    liste (masqué) est écarté avec son sous-arbre. Retourne les commentaires
+    de premier niveau (les réponses directes à `root` si fourni).
+    """
+    by_pk = {}
+    roots = []
+    if root is not None:
+        root.tree_replies = []
+        by_pk[root.pk] = root
+    for comment in comments:
+        comment.tree_replies = []
+        if comment.parent_id is None:
+            roots.append(comment)
+        else:
+            parent = by_pk.get(comment.parent_id)
+            if parent is None:
+                continue
+            comment.parent = parent
+            parent.tree_replies.append(comment)
+        by_pk[comment.pk] = comment
+    return roots if root is None else root.tree_replies
+
+
+class FormationProgressQuerySet(models.QuerySet):
+    """Requêtes sur les progressions de lecture"""
+
+    def record_heartbeats(self, user, updates, update_percentage=True):
+        """
+        Enregistre des pings de lecture {article_id, progress_percentage,
+        reading_time} en une seule instruction INSERT ... ON CONFLICT DO UPDATE.
+
+        Les pings d'un même article sont fusionnés : dernier pourcentage reçu,
+        temps de lecture cumulé. Avec `update_percentage=False`, seule la
+        lecture est marquée (le pourcentage existant est conservé).
+        Retourne le nombre d'articles mis à jour.
+        """
+        merged = {}
+        for update in updates:
+            article_id = update['article_id']
+            percentage = max(0, min(100, update.get('progress_percentage') or 0))
+            reading_time = max(0, update.get('reading_time') or 0)
+            if article_id in merged:
+                reading_time += merged[article_id][1]
+            merged[article_id] = (percentage, reading_time)
+        if not merged:
+            return 0
+
+        conn = connections[self.db]
+        if conn.vendor not in ('sqlite', 'postgresql'):
+            return self._record_heartbeats_fallback(user, merged, update_percentage)
+
+        now = timezone.now()
+        db_now = conn.ops.adapt_datetimefield_value(now)
+        rows, params = [], []
+        for article_id, (percentage, reading_time) in merged.items():
+            completed = percentage >= 100
+            rows.append('(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)')
+            params.extend([
+                user.pk, article_id, True, completed, percentage, db_now,
+                db_now if completed else None, db_now, reading_time, '',
+            ])
+
+        table = conn.ops.quote_name(self.model._meta.db_table)
+        assignments = [
+            f"total_reading_time = {table}.total_reading_time + EXCLUDED.total_reading_time",
+            "is_started = EXCLUDED.is_started",
+            f"started_at = COALESCE({table}.started_at, EXCLUDED.started_at)",
+            "last_read_at = EXCLUDED.last_read_at",
+        ]
+        if update_percentage:
+            assignments += [
+                "progress_percentage = EXCLUDED.progress_percentage",
+                f"is_completed = ({table}.is_completed OR EXCLUDED.is_completed)",
+                f"completed_at = COALESCE({table}.completed_at, EXCLUDED.completed_at)",
+            ]
+        sql = (
+            f"INSERT INTO {table} (user_id, article_id, is_started, is_completed, progress_percentage, "
+            f"started_at, completed_at, last_read_at, total_reading_time, personal_notes) "
+            f"VALUES {', '.join(rows)} "
+            f"ON CONFLICT (user_id, article_id) DO UPDATE SET {', '.join(assignments)}"
+        )
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+        return len(merged)
+
+    def _record_heartbeats_fallback(self, user, merged, update_percentage):
+        """Variante ligne à ligne pour les moteurs sans ON CONFLICT"""
+        with transaction.atomic(using=self.db):
+            for article_id, (percentage, reading_time) in merged.items():
+                progress, _ = self.select_for_update().get_or_create(user=user, article_id=article_id)
+                progress.total_reading_time += reading_time
+                progress.update_progress(percentage if update_percentage else progress.progress_percentage)
+        return len(merged)
 
 
 class FormationProgress(models.Model):
@@ -231,6 +653,8 @@ class FormationProgress(models.Model):
         verbose_name="Note de difficulté (1-5)"
     )
 
+    objects = FormationProgressQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Progression de formation"
         verbose_name_plural = "Progressions de formation"
@@ -272,6 +696,13 @@ class FormationMedia(models.Model):
         ('document', 'Document'),
         ('archive', 'Archive'),
     ]
+    PROCESSING_STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('done', 'Analysé'),
+        ('failed', 'Échec'),
+    ]
+    # Champs renseignés par l'analyse du fichier
+    METADATA_FIELDS = ('file_size', 'duration', 'dimensions', 'content_hash', 'processing_status', 'processed_at')
 
     article = models.ForeignKey(FormationArticle, on_delete=models.CASCADE, 
                                related_name='media_files', verbose_name="Article")
@@ -281,10 +712,15 @@ class FormationMedia(models.Model):
     description = models.TextField(blank=True, verbose_name="Description")
     order = models.PositiveIntegerField(default=0, verbose_name="Ordre d'affichage")
     
-    # Métadonnées
-    file_size = models.PositiveIntegerField(blank=True, null=True, verbose_name="Taille du fichier (bytes)")
+    # Métadonnées (renseignées en tâche de fond après l'envoi du fichier)
+    file_size = models.PositiveBigIntegerField(blank=True, null=True, verbose_name="Taille du fichier (bytes)")
     duration = models.PositiveIntegerField(blank=True, null=True, verbose_name="Durée (secondes)")
     dimensions = models.CharField(max_length=50, blank=True, verbose_name="Dimensions (WxH)")
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False, verbose_name="Empreinte SHA-256")
+    thumbnail = models.ImageField(upload_to='formations/media/thumbnails/', blank=True, editable=False, verbose_name="Vignette")
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS_CHOICES, default='pending',
+                                         editable=False, verbose_name="Statut d'analyse")
+    processed_at = models.DateTimeField(blank=True, null=True, editable=False, verbose_name="Date d'analyse")
     
     is_active = models.BooleanField(default=True, verbose_name="Actif")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
@@ -297,21 +733,42 @@ class FormationMedia(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_file_type_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'file' in instance.__dict__:
+            instance._loaded_file_name = instance.__dict__['file']
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.file_size and self.file:
-            self.file_size = self.file.size
+        # Nouveau fichier : les métadonnées seront recalculées hors requête
+        self._needs_processing = bool(self.file) and (
+            self._state.adding or self.file.name != getattr(self, '_loaded_file_name', self.file.name)
+        )
+        if self._needs_processing:
+            self.file_size = None
+            self.duration = None
+            self.dimensions = ''
+            self.content_hash = ''
+            self.processing_status = 'pending'
+            self.processed_at = None
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.METADATA_FIELDS)
         super().save(*args, **kwargs)
+        self._loaded_file_name = self.file.name
 
     def get_file_size_formatted(self):
         """Retourne la taille du fichier formatée"""
         if not self.file_size:
             return "0 B"
         
+        size = float(self.file_size)
         for unit in ['B', 'KB', 'MB', 'GB']:
-            if self.file_size < 1024.0:
-                return f"{self.file_size:.1f} {unit}"
-            self.file_size /= 1024.0
-        return f"{self.file_size:.1f} TB"
+            if size < 1024.0:
+                return f"{size:.1f} {unit}"
+            size /= 1024.0
+        return f"{size:.1f} TB"
 
 
 class FormationSearchLog(models.Model):
@@ -328,6 +785,52 @@ class FormationSearchLog(models.Model):
         verbose_name = "Log de recherche de formation"
         verbose_name_plural = "Logs de recherche de formation"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"Recherche: {self.query} ({self.results_count} résultats)"
+
+
+class FormationSearchQueryStat(models.Model):
+    """Agrégat quotidien des recherches par requête normalisée"""
+    date = models.DateField(verbose_name="Date")
+    query = models.CharField(max_length=500, verbose_name="Requête")
+    searches_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de recherches")
+    zero_results_count = models.PositiveIntegerField(default=0, verbose_name="Recherches sans résultat")
+    total_results = models.PositiveIntegerField(default=0, verbose_name="Total des résultats")
+    users_count = models.PositiveIntegerField(default=0, verbose_name="Utilisateurs distincts")
+
+    class Meta:
+        verbose_name = "Statistique quotidienne de requête"
+        verbose_name_plural = "Statistiques quotidiennes de requêtes"
+        ordering = ['-date', '-searches_count']
+        unique_together = ['date', 'query']
+        indexes = [
+            models.Index(fields=['date', 'searches_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.query} ({self.searches_count})"
+
+    @property
+    def average_results(self):
+        return round(self.total_results / self.searches_count, 1) if self.searches_count else 0
+
+
+class FormationSearchFilterStat(models.Model):
+    """Agrégat quotidien de l'usage des filtres de recherche"""
+    date = models.DateField(verbose_name="Date")
+    filter_name = models.CharField(max_length=50, verbose_name="Filtre")
+    filter_value = models.CharField(max_length=100, verbose_name="Valeur")
+    searches_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de recherches")
+
+    class Meta:
+        verbose_name = "Statistique quotidienne de filtre"
+        verbose_name_plural = "Statistiques quotidiennes de filtres"
+        ordering = ['-date', '-searches_count']
+        unique_together = ['date', 'filter_name', 'filter_value']
+
+    def __str__(self):
+        return f"{self.date} - {self.filter_name}={self.filter_value} ({self.searches_count})"
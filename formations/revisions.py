@@ -0,0 +1,144 @@
+"""
+Historique compact des articles de formation.
+
+Chaque révision est stockée compressée (zlib) dans `FormationArticleRevision` :
+soit un instantané complet des champs suivis, soit un delta par rapport à la
+révision précédente. Un instantané est écrit toutes les
+`FORMATION_REVISION_SNAPSHOT_INTERVAL` révisions, ce qui borne le nombre de
+deltas à rejouer pour reconstruire n'importe quelle révision.
+
+Les contenus sont découpés en segments (après chaque balise fermante `>`,
+chaque saut de ligne ou chaque fin de phrase) ; un delta est une liste
+d'opérations : `[début, fin]` recopie des segments de la révision précédente,
+une chaîne insère un nouveau texte.
+"""
+import difflib
+import json
+import re
+import zlib
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+# Champs de l'article conservés dans l'historique
+REVISION_FIELDS = ('title', 'excerpt', 'content')
+
+CHUNK_RE = re.compile(r'(?<=[>\n])|(?<=\. )')
+
+
+def snapshot_interval():
+    return getattr(settings, 'FORMATION_REVISION_SNAPSHOT_INTERVAL', 10)
+
+
+def split_chunks(text):
+    """Découpe un texte en segments stables pour le calcul des deltas"""
+    return [chunk for chunk in CHUNK_RE.split(text or '') if chunk]
+
+
+def make_delta(old, new):
+    """Retourne les opérations transformant `old` en `new`"""
+    old_chunks, new_chunks = split_chunks(old), split_chunks(new)
+    matcher = difflib.SequenceMatcher(None, old_chunks, new_chunks, autojunk=False)
+    operations = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([i1, i2])
+        elif j2 > j1:
+            operations.append(''.join(new_chunks[j1:j2]))
+    return operations
+
+
+def apply_delta(old, operations):
+    """Reconstruit un texte à partir du texte précédent et d'un delta"""
+    old_chunks = split_chunks(old)
+    parts = []
+    for operation in operations:
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            start, end = operation
+            parts.extend(old_chunks[start:end])
+    return ''.join(parts)
+
+
+def encode(payload):
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def decode(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def build_revision_data(number, state, previous_state=None):
+    """
+    Retourne (is_snapshot, data compressée, taille du texte complet) pour une
+    révision, instantané si la période est atteinte ou si l'état précédent
+    est inconnu.
+    """
+    size = sum(len(state.get(field) or '') for field in REVISION_FIELDS)
+    if previous_state is None or (number - 1) % snapshot_interval() == 0:
+        return True, encode({field: state.get(field) or '' for field in REVISION_FIELDS}), size
+    delta = {
+        field: make_delta(previous_state.get(field) or '', state.get(field) or '')
+        for field in REVISION_FIELDS
+        if (previous_state.get(field) or '') != (state.get(field) or '')
+    }
+    return False, encode(delta), size
+
+
+def replay(revisions):
+    """
+    Rejoue une suite ordonnée de révisions commençant par un instantané et
+    produit (révision, état) pour chacune.
+    """
+    state = None
+    for revision in revisions:
+        payload = decode(revision.data)
+        if revision.is_snapshot:
+            state = payload
+        else:
+            if state is None:
+                raise ValueError(f"Révision {revision.number} sans instantané de départ")
+            state = dict(state)
+            for field, operations in payload.items():
+                state[field] = apply_delta(state[field], operations)
+        yield revision, state
+
+
+def get_revision_states(article, numbers):
+    """
+    Retourne {numéro: (révision, état)} pour les numéros demandés, en une
+    requête (de l'instantané précédant le plus petit numéro au plus grand).
+    """
+    from .models import FormationArticleRevision
+
+    numbers = set(numbers)
+    if not numbers:
+        return {}
+    lowest, highest = min(numbers), max(numbers)
+    snapshot = FormationArticleRevision.objects.filter(
+        article=OuterRef('article'), is_snapshot=True, number__lte=lowest
+    ).order_by('-number').values('number')[:1]
+    revisions = FormationArticleRevision.objects.filter(
+        article=article, number__lte=highest, number__gte=Subquery(snapshot)
+    ).select_related('author').order_by('number')
+    return {
+        revision.number: (revision, state)
+        for revision, state in replay(revisions)
+        if revision.number in numbers
+    }
+
+
+def diff_states(old_state, new_state, old_label='', new_label=''):
+    """Retourne, pour chaque champ modifié, un diff unifié entre deux états"""
+    diff = {}
+    for field in REVISION_FIELDS:
+        old_value, new_value = old_state.get(field) or '', new_state.get(field) or ''
+        if old_value == new_value:
+            continue
+        diff[field] = ''.join(difflib.unified_diff(
+            [chunk if chunk.endswith('\n') else chunk + '\n' for chunk in split_chunks(old_value)],
+            [chunk if chunk.endswith('\n') else chunk + '\n' for chunk in split_chunks(new_value)],
+            fromfile=old_label, tofile=new_label,
+        ))
+    return diff
@@ -0,0 +1,259 @@
+"""
+Index de recherche plein texte des articles de formation.
+
+Le texte indexé (titre, catégorie, contenu) est débarrassé de son HTML, sans
+accents et racinisé par `core.text.analyze` ; les requêtes passent par la même
+analyse. Le stockage dépend du moteur de base de données :
+
+- SQLite : table virtuelle FTS5 `formations_article_fts`, classement BM25 ;
+- PostgreSQL : table `formations_article_search` (tsvector pondéré + index GIN),
+  classement `ts_rank_cd`.
+
+Dans les deux cas la pertinence est exposée dans l'attribut `relevance`, les
+valeurs les plus faibles correspondant aux meilleurs résultats.
+"""
+import logging
+
+from django.db import connection, connections, transaction
+from django.db.models import FloatField, Q, Value
+
+from core.text import analyze, strip_html
+
+logger = logging.getLogger(__name__)
+
+SQLITE_TABLE = 'formations_article_fts'
+POSTGRES_TABLE = 'formations_article_search'
+
+# Poids relatifs des colonnes : titre, catégorie, contenu
+TITLE_WEIGHT = 10.0
+CATEGORY_WEIGHT = 4.0
+BODY_WEIGHT = 1.0
+
+INDEXED_FIELDS = frozenset({'title', 'content', 'excerpt', 'category', 'status'})
+
+
+class SearchBackend:
+    """Interface commune aux index plein texte"""
+    vendor = None
+
+    def create_index(self, cursor):
+        raise NotImplementedError
+
+    def drop_index(self, cursor):
+        raise NotImplementedError
+
+    def upsert(self, cursor, rows):
+        raise NotImplementedError
+
+    def delete(self, cursor, article_ids):
+        raise NotImplementedError
+
+    def clear(self, cursor):
+        raise NotImplementedError
+
+    def apply(self, queryset, terms):
+        """Restreint le queryset aux articles correspondants et annote `relevance`"""
+        raise NotImplementedError
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Index FTS5 (le rowid de la table virtuelle est l'id de l'article)"""
+    vendor = 'sqlite'
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            f"USING fts5(title, category, body, tokenize='unicode61')"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+
+    def upsert(self, cursor, rows):
+        self.delete(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, title, category, body) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+    def delete(self, cursor, article_ids):
+        cursor.executemany(
+            f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s",
+            [(article_id,) for article_id in article_ids],
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+
+    def apply(self, queryset, terms):
+        # Tous les termes sont requis, le dernier est traité comme un préfixe
+        # pour couvrir la saisie en cours
+        match = ' '.join(f'"{term}"' for term in terms[:-1])
+        match = f'{match} "{terms[-1]}"*'.strip()
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            select={
+                'relevance': f"bm25({SQLITE_TABLE}, {TITLE_WEIGHT}, {CATEGORY_WEIGHT}, {BODY_WEIGHT})"
+            },
+            tables=[SQLITE_TABLE],
+            where=[f"{SQLITE_TABLE}.rowid = {table}.id", f"{SQLITE_TABLE} MATCH %s"],
+            params=[match],
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Index tsvector pondéré (A : titre, B : catégorie, C : contenu)"""
+    vendor = 'postgresql'
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+            f"article_id bigint PRIMARY KEY "
+            f"REFERENCES formations_formationarticle (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            f"document tsvector NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx "
+            f"ON {POSTGRES_TABLE} USING GIN (document)"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {POSTGRES_TABLE} (article_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('simple', %s), 'A') || "
+            f"setweight(to_tsvector('simple', %s), 'B') || "
+            f"setweight(to_tsvector('simple', %s), 'C')) "
+            f"ON CONFLICT (article_id) DO UPDATE SET document = EXCLUDED.document",
+            rows,
+        )
+
+    def delete(self, cursor, article_ids):
+        cursor.execute(
+            f"DELETE FROM {POSTGRES_TABLE} WHERE article_id = ANY(%s)",
+            [list(article_ids)],
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+
+    def apply(self, queryset, terms):
+        tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            select={
+                # Négatif pour partager le sens de tri de BM25 (croissant)
+                'relevance': f"-ts_rank_cd({POSTGRES_TABLE}.document, to_tsquery('simple', %s))"
+            },
+            select_params=[tsquery],
+            tables=[POSTGRES_TABLE],
+            where=[
+                f"{POSTGRES_TABLE}.article_id = {table}.id",
+                f"{POSTGRES_TABLE}.document @@ to_tsquery('simple', %s)",
+            ],
+            params=[tsquery],
+        )
+
+
+BACKENDS = {
+    backend.vendor: backend
+    for backend in (SQLiteSearchBackend(), PostgresSearchBackend())
+}
+
+
+def get_backend(conn=None):
+    """Retourne l'index adapté à la connexion, ou None si le moteur n'est pas géré"""
+    return BACKENDS.get((conn or connection).vendor)
+
+
+def parse_query(query):
+    """Retourne les racines significatives d'une requête utilisateur"""
+    return analyze(query or '')
+
+
+def document_for(article):
+    """Retourne la ligne d'index (id, titre, catégorie, contenu) d'un article"""
+    body = ' '.join(filter(None, [strip_html(article.excerpt), strip_html(article.content)]))
+    return (
+        article.pk,
+        ' '.join(analyze(article.title)),
+        ' '.join(analyze(article.category.name)),
+        ' '.join(analyze(body)),
+    )
+
+
+def index_articles(articles):
+    """Indexe les articles publiés et retire les autres de l'index"""
+    backend = get_backend()
+    if backend is None:
+        return
+    articles = list(articles)
+    published = [document_for(article) for article in articles if article.status == 'published']
+    removed = [article.pk for article in articles if article.status != 'published']
+    with transaction.atomic(), connection.cursor() as cursor:
+        if published:
+            backend.upsert(cursor, published)
+        if removed:
+            backend.delete(cursor, removed)
+
+
+def remove_articles(article_ids):
+    """Retire des articles de l'index"""
+    backend = get_backend()
+    if backend is None or not article_ids:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, list(article_ids))
+
+
+def rebuild_index(batch_size=500):
+    """Reconstruit entièrement l'index et retourne le nombre d'articles indexés"""
+    from .models import FormationArticle
+
+    backend = get_backend()
+    if backend is None:
+        return 0
+    queryset = FormationArticle.objects.filter(status='published').select_related('category').order_by('pk')
+    indexed = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            backend.clear(cursor)
+        batch = []
+        for article in queryset.iterator(chunk_size=batch_size):
+            batch.append(article)
+            if len(batch) >= batch_size:
+                index_articles(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            index_articles(batch)
+            indexed += len(batch)
+    return indexed
+
+
+def search_articles(queryset, query):
+    """
+    Filtre un queryset d'articles par une requête plein texte.
+
+    Retourne le queryset annoté de `relevance` (plus petit = plus pertinent)
+    et les racines recherchées ; sans terme significatif le queryset est
+    retourné tel quel.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return queryset, terms
+    conn = connections[queryset.db]
+    backend = get_backend(conn)
+    if backend is None:
+        # Moteur sans index : simple recherche par sous-chaîne, sans classement
+        logger.warning("Recherche plein texte indisponible pour le moteur %s", conn.vendor)
+        queryset = queryset.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(excerpt__icontains=query) |
+            Q(category__name__icontains=query)
+        ).annotate(relevance=Value(0.0, output_field=FloatField()))
+        return queryset, terms
+    return backend.apply(queryset, terms), terms
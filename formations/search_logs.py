@@ -0,0 +1,101 @@
+"""
+Journal des recherches : écriture différée des logs bruts et agrégats quotidiens.
+
+Les logs sont mis en file pendant la requête puis insérés par lots
+(`core.buffers.BufferedWriter`). La commande `rollup_search_logs` les agrège
+par jour dans `FormationSearchQueryStat` et `FormationSearchFilterStat`, puis
+purge les logs bruts plus anciens que `FORMATION_SEARCH_LOG_RETENTION_DAYS`.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.buffers import BufferedWriter
+
+from .models import FormationSearchFilterStat, FormationSearchLog, FormationSearchQueryStat
+
+search_log_writer = BufferedWriter('formations.FormationSearchLog').register_exit_flush()
+
+
+def normalize_query(query):
+    """Normalise une requête pour l'agrégation (casse et espaces)"""
+    return ' '.join((query or '').lower().split())[:500]
+
+
+def log_search(request, query, results_count, filters_applied):
+    """Met en file le log d'une recherche (sans écriture dans la requête)"""
+    search_log_writer.add(FormationSearchLog(
+        user=request.user if request.user.is_authenticated else None,
+        query=query,
+        results_count=results_count,
+        filters_applied=filters_applied,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        user_agent=request.META.get('HTTP_USER_AGENT', '')
+    ))
+
+
+def day_bounds(day):
+    """Retourne les bornes [début, fin[ d'un jour dans le fuseau courant"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def rollup_search_logs(day):
+    """
+    Recalcule les agrégats d'un jour à partir des logs bruts (opération
+    idempotente) ; retourne le nombre de logs agrégés.
+    """
+    start, end = day_bounds(day)
+    logs = FormationSearchLog.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).values_list('query', 'results_count', 'user_id', 'filters_applied')
+
+    queries = defaultdict(lambda: {'searches': 0, 'zero': 0, 'results': 0, 'users': set()})
+    filters = Counter()
+    total = 0
+    for query, results_count, user_id, filters_applied in logs.iterator():
+        total += 1
+        normalized = normalize_query(query)
+        if normalized:
+            stats = queries[normalized]
+            stats['searches'] += 1
+            stats['results'] += results_count
+            if results_count == 0:
+                stats['zero'] += 1
+            if user_id is not None:
+                stats['users'].add(user_id)
+        for name, value in (filters_applied or {}).items():
+            if value not in (None, ''):
+                filters[(name[:50], str(value)[:100])] += 1
+
+    with transaction.atomic():
+        FormationSearchQueryStat.objects.filter(date=day).delete()
+        FormationSearchFilterStat.objects.filter(date=day).delete()
+        FormationSearchQueryStat.objects.bulk_create([
+            FormationSearchQueryStat(
+                date=day,
+                query=query,
+                searches_count=stats['searches'],
+                zero_results_count=stats['zero'],
+                total_results=stats['results'],
+                users_count=len(stats['users']),
+            )
+            for query, stats in queries.items()
+        ], batch_size=500)
+        FormationSearchFilterStat.objects.bulk_create([
+            FormationSearchFilterStat(date=day, filter_name=name, filter_value=value, searches_count=count)
+            for (name, value), count in filters.items()
+        ], batch_size=500)
+    return total
+
+
+def purge_search_logs(retention_days=None):
+    """Supprime les logs bruts plus anciens que la durée de rétention"""
+    if retention_days is None:
+        retention_days = getattr(settings, 'FORMATION_SEARCH_LOG_RETENTION_DAYS', 30)
+    start, _ = day_bounds(timezone.localdate() - timedelta(days=retention_days))
+    deleted, _ = FormationSearchLog.objects.filter(created_at__lt=start).delete()
+    return deleted
@@ -1,12 +1,20 @@
 from rest_framework import serializers
 from .models import (
     FormationCategory, FormationArticle, FormationFavorite, 
-    FormationComment, FormationProgress, FormationMedia, FormationSearchLog
+    FormationComment, FormationProgress, FormationMedia, FormationSearchLog,
+    FormationArticleRevision, attach_category_subtrees, build_comment_tree
 )
 from django.contrib.auth import get_user_model
+from core.counters import view_counter
+from core.serializers import BufferedCountField, ContentCardSerializer
+from core.viewer import ViewerContextListSerializer, ViewerContextMixin, ViewerRelation
 
 User = get_user_model()
 
+# Relations entre l'utilisateur courant et les articles, préchargées par page
+FAVORITE_RELATION = ViewerRelation('formations.FormationFavorite', 'article', filters={'is_active': True})
+PROGRESS_RELATION = ViewerRelation('formations.FormationProgress', 'article')
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Sérialiseur pour les utilisateurs"""
@@ -32,7 +40,9 @@ class FormationCategorySerializer(serializers.ModelSerializer):
     
     def get_children(self, obj):
         """Retourne les sous-catégories"""
-        children = obj.children.filter(is_active=True).order_by('order', 'name')
+        children = getattr(obj, 'tree_children', None)
+        if children is None:
+            children = obj.children.filter(is_active=True).order_by('order', 'name')
         return FormationCategorySerializer(children, many=True, context=self.context).data
     
     def get_articles_count(self, obj):
@@ -52,21 +62,20 @@ class FormationCategoryTreeSerializer(serializers.ModelSerializer):
     
     def get_children(self, obj):
         """Retourne les sous-catégories actives"""
-        children = obj.children.filter(is_active=True).order_by('order', 'name')
+        children = getattr(obj, 'tree_children', None)
+        if children is None:
+            children = obj.children.filter(is_active=True).order_by('order', 'name')
         return FormationCategoryTreeSerializer(children, many=True, context=self.context).data
     
     def get_articles_count(self, obj):
         """Retourne le nombre d'articles publiés"""
+        if hasattr(obj, 'direct_articles_count'):
+            return obj.direct_articles_count
         return obj.formationarticle_set.filter(status='published').count()
     
     def get_level(self, obj):
         """Retourne le niveau de profondeur de la catégorie"""
-        level = 0
-        current = obj
-        while current.parent:
-            level += 1
-            current = current.parent
-        return level
+        return obj.depth
 
 
 class FormationMediaSerializer(serializers.ModelSerializer):
@@ -78,21 +87,23 @@ class FormationMediaSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'file', 'file_type', 'title', 'description', 'order',
             'file_size', 'file_size_formatted', 'duration', 'dimensions',
-            'is_active', 'created_at'
+            'content_hash', 'thumbnail', 'processing_status', 'is_active', 'created_at'
         ]
-        read_only_fields = ['id', 'file_size', 'created_at']
+        read_only_fields = ['id', 'file_size', 'duration', 'dimensions', 'content_hash',
+                            'thumbnail', 'processing_status', 'created_at']
     
     def get_file_size_formatted(self, obj):
         """Retourne la taille du fichier formatée"""
         return obj.get_file_size_formatted()
 
 
-class FormationArticleListSerializer(serializers.ModelSerializer):
+class FormationArticleListSerializer(ViewerContextMixin, serializers.ModelSerializer):
     """Sérialiseur pour la liste des articles de formation"""
     author = UserSerializer(read_only=True)
     category = FormationCategorySerializer(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     excerpt = serializers.SerializerMethodField()
+    views_count = BufferedCountField(view_counter)
     is_favorited = serializers.SerializerMethodField()
     user_progress = serializers.SerializerMethodField()
     
@@ -104,55 +115,56 @@ class FormationArticleListSerializer(serializers.ModelSerializer):
             'likes_count', 'comments_count', 'is_favorited', 'user_progress',
             'created_at', 'published_at'
         ]
-        read_only_fields = ['id', 'slug', 'views_count', 'likes_count', 'comments_count', 'created_at']
+        read_only_fields = ['id', 'slug', 'reading_time', 'views_count', 'likes_count', 'comments_count', 'created_at']
+        list_serializer_class = ViewerContextListSerializer
+        # Colonnes lues par les champs calculés (champs à la demande)
+        sparse_requires = {'excerpt': ('excerpt', 'generated_excerpt')}
+    
+    viewer_relations = (FAVORITE_RELATION, PROGRESS_RELATION)
+    
+    def preload_viewer_context(self, instances):
+        """Précharge aussi l'arborescence des catégories affichées sur la page"""
+        super().preload_viewer_context(instances)
+        attach_category_subtrees([article.category for article in instances])
     
     def get_excerpt(self, obj):
-        """Retourne l'extrait ou génère un extrait depuis le contenu"""
-        if obj.excerpt:
-            return obj.excerpt
-        # Générer un extrait depuis le contenu HTML (supprimer les balises)
-        import re
-        content_text = re.sub('<[^<]+?>', '', obj.content)
-        return content_text[:200] + '...' if len(content_text) > 200 else content_text
+        """Retourne l'extrait, ou l'extrait généré à l'enregistrement"""
+        return obj.get_excerpt()
     
     def get_is_favorited(self, obj):
         """Vérifie si l'article est dans les favoris de l'utilisateur"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.formationfavorite_set.filter(user=request.user, is_active=True).exists()
-        return False
+        return self.viewer_context.has(FAVORITE_RELATION, obj.pk)
     
     def get_user_progress(self, obj):
         """Retourne la progression de l'utilisateur sur cet article"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                progress = obj.formationprogress_set.get(user=request.user)
-                return {
-                    'progress_percentage': progress.progress_percentage,
-                    'is_started': progress.is_started,
-                    'is_completed': progress.is_completed,
-                    'last_read_at': progress.last_read_at
-                }
-            except FormationProgress.DoesNotExist:
-                return {
-                    'progress_percentage': 0,
-                    'is_started': False,
-                    'is_completed': False,
-                    'last_read_at': None
-                }
-        return None
-
-
-class FormationArticleDetailSerializer(serializers.ModelSerializer):
+        if self.viewer_context.user is None:
+            return None
+        progress = self.viewer_row(PROGRESS_RELATION, obj)
+        if progress is None:
+            return {
+                'progress_percentage': 0,
+                'is_started': False,
+                'is_completed': False,
+                'last_read_at': None
+            }
+        return {
+            'progress_percentage': progress.progress_percentage,
+            'is_started': progress.is_started,
+            'is_completed': progress.is_completed,
+            'last_read_at': progress.last_read_at
+        }
+
+
+class FormationArticleDetailSerializer(ViewerContextMixin, serializers.ModelSerializer):
     """Sérialiseur détaillé pour les articles de formation"""
     author = UserSerializer(read_only=True)
     category = FormationCategorySerializer(read_only=True)
     media_files = FormationMediaSerializer(many=True, read_only=True)
-    related_courses = serializers.SerializerMethodField()
-    related_festivals = serializers.SerializerMethodField()
-    related_events = serializers.SerializerMethodField()
+    related_courses = ContentCardSerializer(many=True, read_only=True)
+    related_festivals = ContentCardSerializer(many=True, read_only=True)
+    related_events = ContentCardSerializer(many=True, read_only=True)
     breadcrumbs = serializers.SerializerMethodField()
+    views_count = BufferedCountField(view_counter)
     is_favorited = serializers.SerializerMethodField()
     user_progress = serializers.SerializerMethodField()
     user_notes = serializers.SerializerMethodField()
@@ -162,27 +174,13 @@ class FormationArticleDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'slug', 'content', 'excerpt', 'author', 'category',
             'level', 'status', 'meta_description', 'featured_image', 'reading_time',
+            'word_count', 'table_of_contents',
             'views_count', 'likes_count', 'comments_count', 'media_files',
             'related_courses', 'related_festivals', 'related_events',
             'breadcrumbs', 'is_favorited', 'user_progress', 'user_notes',
             'version', 'created_at', 'updated_at', 'published_at'
         ]
-        read_only_fields = ['id', 'slug', 'views_count', 'likes_count', 'comments_count', 'created_at', 'updated_at']
-    
-    def get_related_courses(self, obj):
-        """Retourne les cours liés"""
-        from courses.serializers import CourseSerializer
-        return CourseSerializer(obj.related_courses.all(), many=True, context=self.context).data
-    
-    def get_related_festivals(self, obj):
-        """Retourne les festivals liés"""
-        from festivals.serializers import FestivalSerializer
-        return FestivalSerializer(obj.related_festivals.all(), many=True, context=self.context).data
-    
-    def get_related_events(self, obj):
-        """Retourne les événements liés"""
-        from events.serializers import EventSerializer
-        return EventSerializer(obj.related_events.all(), many=True, context=self.context).data
+        read_only_fields = ['id', 'slug', 'reading_time', 'views_count', 'likes_count', 'comments_count', 'created_at', 'updated_at']
     
     def get_breadcrumbs(self, obj):
         """Retourne le fil d'Ariane"""
@@ -198,41 +196,38 @@ class FormationArticleDetailSerializer(serializers.ModelSerializer):
     
     def get_is_favorited(self, obj):
         """Vérifie si l'article est dans les favoris de l'utilisateur"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.favorites.filter(user=request.user, is_active=True).exists()
-        return False
+        return self.viewer_context.has(FAVORITE_RELATION, obj.pk)
     
     def get_user_progress(self, obj):
         """Retourne la progression de l'utilisateur sur cet article"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                progress = obj.formationprogress_set.get(user=request.user)
-                return {
-                    'progress_percentage': progress.progress_percentage,
-                    'is_started': progress.is_started,
-                    'is_completed': progress.is_completed,
-                    'started_at': progress.started_at,
-                    'completed_at': progress.completed_at,
-                    'last_read_at': progress.last_read_at,
-                    'total_reading_time': progress.total_reading_time,
-                    'difficulty_rating': progress.difficulty_rating
-                }
-            except FormationProgress.DoesNotExist:
-                return None
-        return None
+        progress = self.viewer_row(PROGRESS_RELATION, obj)
+        if progress is None:
+            return None
+        return {
+            'progress_percentage': progress.progress_percentage,
+            'is_started': progress.is_started,
+            'is_completed': progress.is_completed,
+            'started_at': progress.started_at,
+            'completed_at': progress.completed_at,
+            'last_read_at': progress.last_read_at,
+            'total_reading_time': progress.total_reading_time,
+            'difficulty_rating': progress.difficulty_rating
+        }
     
     def get_user_notes(self, obj):
         """Retourne les notes personnelles de l'utilisateur"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                progress = obj.formationprogress_set.get(user=request.user)
-                return progress.personal_notes
-            except FormationProgress.DoesNotExist:
-                return ""
-        return ""
+        progress = self.viewer_row(PROGRESS_RELATION, obj)
+        return progress.personal_notes if progress is not None else ""
+
+
+class FormationArticleRevisionSerializer(serializers.ModelSerializer):
+    """Sérialiseur pour les métadonnées des révisions d'articles"""
+    author = UserSerializer(read_only=True)
+    
+    class Meta:
+        model = FormationArticleRevision
+        fields = ['number', 'is_snapshot', 'size', 'author', 'created_at']
+        read_only_fields = fields
 
 
 class FormationFavoriteSerializer(serializers.ModelSerializer):
@@ -269,27 +264,42 @@ class FormationCommentSerializer(serializers.ModelSerializer):
     """Sérialiseur pour les commentaires de formation"""
     author = UserSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
-    replies_count = serializers.SerializerMethodField()
     can_moderate = serializers.SerializerMethodField()
     
     class Meta:
         model = FormationComment
         fields = [
             'id', 'article', 'author', 'parent', 'content', 'is_approved',
-            'is_active', 'replies', 'replies_count', 'can_moderate',
-            'created_at', 'updated_at'
+            'is_active', 'depth', 'replies', 'replies_count', 'descendants_count',
+            'can_moderate', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'author', 'is_approved', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'author', 'is_approved', 'depth', 'replies_count',
+                            'descendants_count', 'created_at', 'updated_at']
+    
+    def validate(self, attrs):
+        """Un commentaire existant ne change ni d'article ni de parent"""
+        if self.instance is not None:
+            for field in ('article', 'parent'):
+                if field in attrs and attrs[field] != getattr(self.instance, field):
+                    raise serializers.ValidationError({field: "Ce champ ne peut pas être modifié."})
+        parent = attrs.get('parent')
+        article = attrs.get('article')
+        if parent is not None and article is not None and parent.article_id != article.pk:
+            raise serializers.ValidationError({'parent': "Le commentaire parent appartient à un autre article."})
+        return attrs
     
     def get_replies(self, obj):
-        """Retourne les réponses approuvées"""
-        replies = obj.replies.filter(is_approved=True, is_active=True).order_by('created_at')
+        """Retourne l'arbre des réponses approuvées (fil chargé en une requête)"""
+        replies = getattr(obj, 'tree_replies', None)
+        if replies is None:
+            if not obj.descendants_count:
+                return []
+            descendants = FormationComment.objects.visible().filter(
+                path__startswith=obj.path, depth__gt=obj.depth
+            ).select_related('author').order_by('path')
+            replies = build_comment_tree(descendants, root=obj)
         return FormationCommentSerializer(replies, many=True, context=self.context).data
     
-    def get_replies_count(self, obj):
-        """Retourne le nombre de réponses"""
-        return obj.get_replies_count()
-    
     def get_can_moderate(self, obj):
         """Vérifie si l'utilisateur peut modérer ce commentaire"""
         request = self.context.get('request')
@@ -303,6 +313,14 @@ class FormationCommentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class FormationThreadCommentSerializer(FormationCommentSerializer):
+    """Commentaire d'une page de fil, à plat (la profondeur sert à l'indentation)"""
+    replies = None
+    
+    class Meta(FormationCommentSerializer.Meta):
+        fields = [field for field in FormationCommentSerializer.Meta.fields if field != 'replies']
+
+
 class FormationProgressSerializer(serializers.ModelSerializer):
     """Sérialiseur pour la progression de formation"""
     article = FormationArticleListSerializer(read_only=True)
@@ -318,6 +336,11 @@ class FormationProgressSerializer(serializers.ModelSerializer):
             'difficulty_rating'
         ]
         read_only_fields = ['id', 'started_at', 'completed_at', 'last_read_at']
+        list_serializer_class = ViewerContextListSerializer
+    
+    def preload_viewer_context(self, instances):
+        """Précharge le contexte des articles liés aux progressions de la page"""
+        self.fields['article'].preload_viewer_context([progress.article for progress in instances])
     
     def get_time_spent_formatted(self, obj):
         """Retourne le temps passé formaté"""
@@ -343,6 +366,18 @@ class FormationProgressSerializer(serializers.ModelSerializer):
         return progress
 
 
+class FormationProgressPingSerializer(serializers.Serializer):
+    """Ping de lecture d'un article"""
+    article_id = serializers.IntegerField(min_value=1)
+    progress_percentage = serializers.IntegerField(min_value=0, max_value=100, default=0)
+    reading_time = serializers.IntegerField(min_value=0, max_value=3600, default=0)
+
+
+class FormationProgressHeartbeatSerializer(serializers.Serializer):
+    """Lot de pings de lecture envoyés par le lecteur"""
+    updates = FormationProgressPingSerializer(many=True, allow_empty=False, max_length=200)
+
+
 class FormationSearchSerializer(serializers.Serializer):
     """Sérialiseur pour la recherche de formation"""
     query = serializers.CharField(max_length=500, required=False)
@@ -366,7 +401,8 @@ class FormationSearchSerializer(serializers.Serializer):
 
 class FormationSearchResultSerializer(serializers.Serializer):
     """Sérialiseur pour les résultats de recherche"""
-    articles = FormationArticleListSerializer(many=True)
+    # Articles déjà sérialisés (enrichis de `relevance` et `snippet`)
+    articles = serializers.ListField(child=serializers.DictField())
     total_count = serializers.IntegerField()
     page = serializers.IntegerField()
     page_size = serializers.IntegerField()
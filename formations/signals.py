@@ -0,0 +1,78 @@
+"""
+Signaux de l'application formations (index de recherche et de similarité, compteurs de
+commentaires, analyse des médias)
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .media import schedule_media_processing
+from .models import FormationArticle, FormationCategory, FormationComment, FormationMedia
+from .search import INDEXED_FIELDS, index_articles, remove_articles
+from .similarity import SIMILARITY_FIELDS, article_similarity
+
+
+@receiver(post_save, sender=FormationArticle)
+def index_article(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Réindexe un article après modification de son contenu ou de son statut"""
+    if raw:
+        return
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(lambda: index_articles([instance]))
+
+
+@receiver(post_delete, sender=FormationArticle)
+def unindex_article(sender, instance, **kwargs):
+    """Retire un article supprimé de l'index"""
+    article_id = instance.pk
+    transaction.on_commit(lambda: remove_articles([article_id]))
+
+
+@receiver(post_save, sender=FormationArticle)
+def update_article_similarity(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Recalcule le vecteur de similarité d'un article modifié"""
+    if raw:
+        return
+    if update_fields is not None and not SIMILARITY_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(lambda: article_similarity.update([instance]))
+
+
+@receiver(post_delete, sender=FormationArticle)
+def remove_article_similarity(sender, instance, **kwargs):
+    """Retire un article supprimé de l'index de similarité"""
+    article_id = instance.pk
+    transaction.on_commit(lambda: article_similarity.remove([article_id]))
+
+
+@receiver(post_save, sender=FormationCategory)
+def reindex_category_articles(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Réindexe les articles publiés d'une catégorie renommée"""
+    if raw or created:
+        return
+    if update_fields is not None and 'name' not in update_fields:
+        return
+
+    def reindex():
+        articles = FormationArticle.objects.filter(category=instance, status='published').select_related('category')
+        index_articles(articles)
+
+    transaction.on_commit(reindex)
+
+
+@receiver(post_delete, sender=FormationComment)
+def discount_comment(sender, instance, **kwargs):
+    """Retire un commentaire visible supprimé des compteurs de l'article et du fil"""
+    if instance.is_visible:
+        FormationComment.update_visible_counts(
+            instance.article_id, instance.parent_id, instance.get_ancestor_ids(), -1
+        )
+
+
+@receiver(post_save, sender=FormationMedia)
+def process_uploaded_media(sender, instance, raw=False, **kwargs):
+    """Programme l'analyse d'un fichier nouvellement envoyé"""
+    if raw or not getattr(instance, '_needs_processing', False):
+        return
+    schedule_media_processing(instance)
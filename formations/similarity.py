@@ -0,0 +1,28 @@
+"""
+Index de similarité des articles de formation (voir core/similarity.py).
+"""
+from core.similarity import SimilarityIndex, text_terms
+
+# Champs dont la modification change le vecteur d'un article
+SIMILARITY_FIELDS = {'title', 'excerpt', 'content', 'category', 'level', 'status'}
+
+
+def article_terms(article):
+    """Termes pondérés d'un article : titre, extrait, texte, catégories et niveau"""
+    terms = text_terms(article.title, 3.0)
+    terms.update(text_terms(article.excerpt, 2.0))
+    terms.update(text_terms(article.plain_text))
+    # La catégorie et ses ancêtres rapprochent les articles d'une même branche
+    for category_id in article.category.get_ancestor_ids():
+        terms[f'category:{category_id}'] += 2.0
+    terms[f'level:{article.level}'] += 2.0
+    return terms
+
+
+article_similarity = SimilarityIndex(
+    'formations.article',
+    'formations.FormationArticle',
+    terms=article_terms,
+    is_indexed=lambda article: article.status == 'published',
+    select_related=('category',),
+)
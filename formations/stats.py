@@ -0,0 +1,35 @@
+"""
+Statistiques globales des articles (rollup lu par `FormationArticleViewSet.stats`)
+"""
+from django.db.models import Count, Sum
+
+from core.rollups import StatsRollup
+
+from .models import FormationArticle
+
+HIGHLIGHTED_ARTICLES = 5
+
+
+def compute_article_stats():
+    """
+    Calcule les totaux des articles publiés ; les articles mis en avant sont
+    stockés par identifiant et sérialisés à la lecture.
+    """
+    articles = FormationArticle.objects.filter(status='published').order_by()
+    totals = articles.aggregate(total=Count('pk'), views=Sum('views_count'), likes=Sum('likes_count'))
+    by_level = dict(articles.values_list('level').annotate(count=Count('pk')))
+    return {
+        'total_articles': totals['total'],
+        'total_views': totals['views'] or 0,
+        'total_likes': totals['likes'] or 0,
+        'articles_by_level': {
+            code: {'name': name, 'count': by_level.get(code, 0)} for code, name in FormationArticle.LEVEL_CHOICES
+        },
+        'most_popular_ids': list(
+            articles.order_by('-views_count').values_list('pk', flat=True)[:HIGHLIGHTED_ARTICLES]
+        ),
+        'recent_ids': list(articles.order_by('-published_at').values_list('pk', flat=True)[:HIGHLIGHTED_ARTICLES]),
+    }
+
+
+article_stats = StatsRollup('formations', compute_article_stats, depends_on=('formations.FormationArticle',))
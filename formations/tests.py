@@ -1,3 +1,89 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .models import FormationArticle, FormationArticleRevision, FormationCategory
+
+User = get_user_model()
+
+
+class FormationCategoryTreeTests(TestCase):
+    """Nombres d'articles par sous-arbre (chemin matérialisé)"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='auteur', email='auteur@example.com', password='x')
+        self.root = FormationCategory.objects.create(name='Technique', slug='technique')
+        self.child = FormationCategory.objects.create(name='Tours', slug='tours', parent=self.root)
+        self.other = FormationCategory.objects.create(name='Musicalité', slug='musicalite')
+        for number, category in enumerate([self.root, self.child, self.child, self.other]):
+            FormationArticle.objects.create(
+                title=f'Article {number}', slug=f'article-{number}', content='<p>Contenu</p>',
+                author=self.author, category=category, status='published',
+            )
+
+    def counts(self):
+        return {
+            category.slug: (category.direct_articles_count, category.subtree_articles_count)
+            for category in FormationCategory.objects.with_articles_count()
+        }
+
+    def test_subtree_counts(self):
+        self.assertEqual(self.counts(), {'technique': (1, 3), 'tours': (2, 2), 'musicalite': (1, 1)})
+        self.assertEqual(self.root.get_articles_count(), 3)
+
+    def test_category_without_path_counts_only_its_articles(self):
+        # Ligne chargée sans save() (loaddata) : chemin vide
+        FormationCategory.objects.filter(pk=self.other.pk).update(path='')
+        self.other.refresh_from_db()
+
+        self.assertEqual(self.counts()['musicalite'], (1, 1))
+        self.assertEqual(self.other.get_articles_count(), 1)
+        self.assertEqual(list(FormationCategory.objects.descendants_of(self.other)), [self.other])
+
+
+@override_settings(FORMATION_REVISION_SNAPSHOT_INTERVAL=3)
+class FormationArticleRevisionTests(TestCase):
+    """Historique compact : instantanés périodiques et deltas zlib"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='auteur', email='auteur@example.com', password='x')
+        self.category = FormationCategory.objects.create(name='Technique', slug='technique')
+        self.article = FormationArticle.objects.create(
+            title='Les pas de base', slug='les-pas-de-base', excerpt='Débuter',
+            content='<p>Le pas de base.</p>\n<p>Le basique latéral.</p>\n',
+            author=self.author, category=self.category,
+        )
+
+    def edit(self, article, number):
+        article.content += f'<p>Variation {number}. Avec un tour.</p>\n'
+        if number % 2:
+            article.title = f'Les pas de base ({number})'
+        article.save()
+        return {'title': article.title, 'excerpt': article.excerpt, 'content': article.content}
+
+    def test_states_rebuilt_across_snapshot_interval(self):
+        states = {1: {'title': self.article.title, 'excerpt': self.article.excerpt, 'content': self.article.content}}
+        for number in range(2, 9):
+            states[number] = self.edit(self.article, number)
+
+        snapshots = list(FormationArticleRevision.objects.filter(article=self.article, is_snapshot=True)
+                         .order_by('number').values_list('number', flat=True))
+        self.assertEqual(snapshots, [1, 4, 7])
+        for number, state in states.items():
+            revision, rebuilt = self.article.get_revision(number)
+            self.assertEqual(revision.number, number)
+            self.assertEqual(rebuilt, state)
+
+    def test_stale_save_gets_next_number(self):
+        stale = FormationArticle.objects.get(pk=self.article.pk)
+        self.edit(self.article, 2)
+
+        state = self.edit(stale, 3)
+
+        self.assertEqual(stale.version, 3)
+        numbers = list(FormationArticleRevision.objects.filter(article=self.article)
+                       .order_by('number').values_list('number', flat=True))
+        self.assertEqual(numbers, [1, 2, 3])
+        # Le delta ne peut pas partir de l'état périmé : instantané
+        revision, rebuilt = stale.get_revision(3)
+        self.assertTrue(revision.is_snapshot)
+        self.assertEqual(rebuilt, state)
@@ -1,8 +1,7 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q, Count, F
+from django.db.models import Q, Count, F, Sum, Avg
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
@@ -12,56 +11,103 @@ from django.db.models.functions import Coalesce
 
 from .models import (
     FormationCategory, FormationArticle, FormationFavorite, 
-    FormationComment, FormationProgress, FormationMedia, FormationSearchLog
+    FormationComment, FormationProgress, FormationMedia,
+    attach_category_subtrees, build_category_tree, build_comment_tree
 )
 from .serializers import (
     FormationCategorySerializer, FormationCategoryTreeSerializer,
     FormationArticleListSerializer, FormationArticleDetailSerializer,
     FormationFavoriteSerializer, FormationCommentSerializer,
     FormationProgressSerializer, FormationSearchSerializer,
-    FormationSearchResultSerializer, FormationStatsSerializer
+    FormationSearchResultSerializer, FormationStatsSerializer,
+    FormationArticleRevisionSerializer, FormationProgressPingSerializer,
+    FormationProgressHeartbeatSerializer, FormationThreadCommentSerializer
 )
 from .permissions import IsAuthorOrReadOnly, IsAdminOrReadOnly
+from .search import search_articles
+from .search_logs import log_search
+from .similarity import article_similarity
+from .stats import article_stats
+from .revisions import REVISION_FIELDS, diff_states, get_revision_states
+from core.conditional import ConditionalMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.pagination import KeysetPagination
+from core.serializers import content_card_prefetch
+from core.similarity import SIMILAR_LIMIT
+from core.text import highlight
 
 
-class FormationCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Actions de liste servies sans charger le contenu complet des articles
+LIST_ACTIONS = ('list', 'featured', 'recent', 'by_level', 'stats', 'search', 'similar')
+
+# Relations vers les autres applications, sérialisées en cartes dans le détail
+RELATED_CONTENT_PREFETCHES = (
+    ('related_courses', 'courses.Course'),
+    ('related_festivals', 'festivals.Festival'),
+    ('related_events', 'events.Event'),
+)
+
+
+class FormationCategoryViewSet(ConditionalMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet pour les catégories de formation"""
     queryset = FormationCategory.objects.filter(is_active=True)
     serializer_class = FormationCategorySerializer
     lookup_field = 'slug'
     permission_classes = [permissions.AllowAny]  # Permettre l'accès public
+    conditional_models = ('formations.FormationCategory', 'formations.FormationArticle')
+    conditional_actions = ('list', 'retrieve', 'tree')
+    cache_control = {'list': {'max_age': 300}, 'retrieve': {'max_age': 300}, 'tree': {'max_age': 300}}
     
     def get_queryset(self):
-        """Retourne les catégories avec leurs enfants"""
+        """Retourne les catégories racines"""
         return FormationCategory.objects.filter(
             is_active=True,
             parent__isnull=True  # Seulement les catégories racines
-        ).prefetch_related('children')
+        )
+    
+    def list(self, request, *args, **kwargs):
+        """Liste les catégories racines et leur arborescence"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(attach_category_subtrees(page), many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(attach_category_subtrees(queryset), many=True)
+        return Response(serializer.data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Retourne une catégorie et son arborescence"""
+        category = attach_category_subtrees([self.get_object()])[0]
+        serializer = self.get_serializer(category)
+        return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """Retourne l'arborescence complète des catégories"""
         categories = FormationCategory.objects.filter(
-            is_active=True,
-            parent__isnull=True
-        ).prefetch_related('children')
+            is_active=True
+        ).with_articles_count().order_by('depth', 'order', 'name')
+        roots = build_category_tree(list(categories))
         
-        serializer = FormationCategoryTreeSerializer(categories, many=True, context={'request': request})
+        serializer = FormationCategoryTreeSerializer(roots, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def articles(self, request, slug=None):
         """Retourne les articles d'une catégorie"""
-        category = self.get_object()
-        
-        # Récupérer tous les articles de cette catégorie et ses sous-catégories
-        def get_category_articles(cat):
-            articles = list(FormationArticle.objects.filter(category=cat, status='published'))
-            for child in cat.children.filter(is_active=True):
-                articles.extend(get_category_articles(child))
-            return articles
-        
-        all_articles = get_category_articles(category)
+        category = attach_category_subtrees([self.get_object()])[0]
+        
+        # Tous les articles du sous-arbre, hors branches désactivées
+        all_articles = FormationArticle.objects.filter(
+            category.subtree_q('category__'),
+            status='published',
+        ).select_related('author', 'category', 'category__parent').defer('content', 'plain_text')
+        inactive = FormationCategory.objects.descendants_of(
+            category, include_self=False
+        ).filter(is_active=False).only('pk', 'path')
+        for branch in inactive:
+            all_articles = all_articles.exclude(branch.subtree_q('category__'))
         
         # Pagination
         page = request.query_params.get('page', 1)
@@ -85,26 +131,44 @@ class FormationCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class FormationArticleViewSet(viewsets.ModelViewSet):
+class FormationArticleViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet pour les articles de formation"""
     queryset = FormationArticle.objects.all()
     serializer_class = FormationArticleListSerializer
     lookup_field = 'slug'
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetPagination
     permission_classes = [permissions.AllowAny]  # Permettre l'accès public temporairement
+    conditional_models = (
+        'formations.FormationArticle', 'formations.FormationCategory', 'formations.FormationFavorite',
+        'formations.FormationProgress', 'accounts.User',
+    )
+    # Le détail (vues, progression) et la recherche (journal) écrivent : ils ne sont pas conditionnels
+    conditional_actions = ('list', 'featured', 'recent', 'by_level')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         """Retourne les articles selon l'utilisateur et l'action"""
         # Simplification maximale pour déboguer
-        return FormationArticle.objects.filter(status='published')
+        queryset = FormationArticle.objects.filter(status='published').select_related(
+            'author', 'category', 'category__parent'
+        )
+        if self.action in LIST_ACTIONS:
+            # Les listes lisent les valeurs dérivées, pas le HTML
+            queryset = queryset.defer('content', 'plain_text')
+        elif self.action == 'retrieve':
+            # Contenus liés affichés en cartes : une requête réduite par relation
+            queryset = queryset.prefetch_related(*[
+                content_card_prefetch(lookup, model_label) for lookup, model_label in RELATED_CONTENT_PREFETCHES
+            ])
+        return queryset
     
     def perform_create(self, serializer):
         """Crée un article avec l'auteur actuel"""
         serializer.save(author=self.request.user)
     
     def perform_update(self, serializer):
-        """Met à jour un article"""
-        serializer.save()
+        """Met à jour un article (l'utilisateur courant signe la révision)"""
+        serializer.save(revision_author=self.request.user)
     
     def get_serializer_class(self):
         """Retourne le bon sérialiseur selon l'action"""
@@ -119,20 +183,61 @@ class FormationArticleViewSet(viewsets.ModelViewSet):
         # Incrémenter le compteur de vues
         article.increment_views()
         
-        # Créer/mettre à jour la progression de l'utilisateur
+        # Créer/mettre à jour la progression de l'utilisateur (une seule écriture)
         if request.user.is_authenticated:
-            progress, created = FormationProgress.objects.get_or_create(
-                user=request.user,
-                article=article,
-                defaults={'is_started': True}
+            FormationProgress.objects.record_heartbeats(
+                request.user, [{'article_id': article.pk}], update_percentage=False
             )
-            if not created:
-                progress.is_started = True
-                progress.save()
         
+        attach_category_subtrees([article.category])
         serializer = self.get_serializer(article)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def revisions(self, request, slug=None):
+        """Liste les révisions de l'article, de la plus récente à la plus ancienne"""
+        article = self.get_object()
+        revisions = article.revisions.select_related('author').defer('data').order_by('-number')
+        page = self.paginate_queryset(revisions)
+        if page is not None:
+            serializer = FormationArticleRevisionSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = FormationArticleRevisionSerializer(revisions, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>\d+)')
+    def revision(self, request, slug=None, number=None):
+        """Retourne le contenu de l'article à une révision donnée"""
+        article = self.get_object()
+        found = article.get_revision(int(number))
+        if found is None:
+            raise Http404("Révision introuvable")
+        revision, state = found
+        data = FormationArticleRevisionSerializer(revision).data
+        data.update({field: state[field] for field in REVISION_FIELDS})
+        return Response(data)
+    
+    @action(detail=True, methods=['get'], url_path='revisions/diff')
+    def revision_diff(self, request, slug=None):
+        """Retourne le diff unifié entre deux révisions (?from=1&to=3)"""
+        article = self.get_object()
+        try:
+            old_number = int(request.query_params.get('from', article.version - 1))
+            new_number = int(request.query_params.get('to', article.version))
+        except ValueError:
+            return Response({'error': 'Numéros de révision invalides'}, status=status.HTTP_400_BAD_REQUEST)
+        states = get_revision_states(article, [old_number, new_number])
+        if old_number not in states or new_number not in states:
+            raise Http404("Révision introuvable")
+        return Response({
+            'from': old_number,
+            'to': new_number,
+            'diff': diff_states(
+                states[old_number][1], states[new_number][1],
+                f'révision {old_number}', f'révision {new_number}'
+            )
+        })
+    
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Retourne les articles en vedette"""
@@ -140,6 +245,21 @@ class FormationArticleViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(articles, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def similar(self, request, slug=None):
+        """Retourne les articles au contenu le plus proche (vecteurs TF-IDF précalculés)"""
+        article = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', SIMILAR_LIMIT)), 1), 20)
+        except ValueError:
+            limit = SIMILAR_LIMIT
+        articles = article_similarity.similar_objects(article, self.get_queryset(), limit)
+        serializer = self.get_serializer(articles, many=True)
+        data = serializer.data
+        for item, similar_article in zip(data, articles):
+            item['similarity'] = similar_article.similarity
+        return Response(data)
+    
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Retourne les articles récents"""
@@ -164,46 +284,32 @@ class FormationArticleViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Retourne les statistiques des articles"""
-        total_articles = self.get_queryset().count()
-        total_views = sum(article.views_count for article in self.get_queryset())
-        total_likes = sum(article.likes_count for article in self.get_queryset())
-        
-        articles_by_level = {}
-        for level_choice in FormationArticle.LEVEL_CHOICES:
-            level_code = level_choice[0]
-            level_name = level_choice[1]
-            count = self.get_queryset().filter(level=level_code).count()
-            articles_by_level[level_code] = {
-                'name': level_name,
-                'count': count
-            }
-        
-        most_popular = self.get_queryset().order_by('-views_count')[:5]
-        recent_articles = self.get_queryset().order_by('-published_at')[:5]
-        
-        return Response({
-            'total_articles': total_articles,
-            'total_views': total_views,
-            'total_likes': total_likes,
-            'articles_by_level': articles_by_level,
-            'most_popular_articles': FormationArticleListSerializer(most_popular, many=True, context={'request': request}).data,
-            'recent_articles': FormationArticleListSerializer(recent_articles, many=True, context={'request': request}).data
-        })
+        """Retourne les statistiques des articles (pré-agrégées, voir formations/stats.py)"""
+        stats = dict(article_stats.get())
+        most_popular_ids = stats.pop('most_popular_ids')
+        recent_ids = stats.pop('recent_ids')
+        articles = self.get_queryset().in_bulk(most_popular_ids + recent_ids)
+        context = {'request': request}
+        stats['most_popular_articles'] = FormationArticleListSerializer(
+            [articles[pk] for pk in most_popular_ids if pk in articles], many=True, context=context
+        ).data
+        stats['recent_articles'] = FormationArticleListSerializer(
+            [articles[pk] for pk in recent_ids if pk in articles], many=True, context=context
+        ).data
+        return Response(stats)
     
     @action(detail=False, methods=['get'])
     def search(self, request):
         """Recherche dans les articles"""
         query = request.query_params.get('search', '')
-        if query:
-            queryset = self.get_queryset().filter(
-                Q(title__icontains=query) |
-                Q(content__icontains=query) |
-                Q(excerpt__icontains=query) |
-                Q(category__name__icontains=query)
-            )
-        else:
-            queryset = self.get_queryset()
+        queryset, terms = search_articles(self.get_queryset(), query)
+        if terms:
+            queryset = queryset.order_by('relevance', '-views_count')
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -253,26 +359,67 @@ class FormationFavoriteViewSet(viewsets.ModelViewSet):
         })
 
 
-class FormationCommentViewSet(viewsets.ModelViewSet):
+class FormationCommentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet pour les commentaires de formation"""
     serializer_class = FormationCommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     
     def get_queryset(self):
         """Retourne les commentaires approuvés"""
-        return FormationComment.objects.filter(
-            is_approved=True,
-            is_active=True,
-            parent__isnull=True  # Seulement les commentaires parents
-        ).select_related('author', 'article').prefetch_related('replies')
+        queryset = FormationComment.objects.visible().select_related('author')
+        if self.action == 'list':
+            # Seulement les commentaires racines, éventuellement d'un article
+            queryset = queryset.filter(depth=0).order_by('created_at')
+            if 'slug' in self.kwargs:
+                queryset = queryset.filter(article__slug=self.kwargs['slug'])
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """Liste paginée des fils, chacun chargé entier en une seule requête"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        roots = page if page is not None else list(queryset)
+        self.attach_threads(roots)
+        serializer = self.get_serializer(roots, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+    
+    def attach_threads(self, roots):
+        """Charge les réponses visibles de tous les fils de la page (une requête, ordre de l'arbre)"""
+        roots = [root for root in roots if root.descendants_count]
+        for root in roots:
+            root.tree_replies = []
+        if not roots:
+            return
+        replies = FormationComment.objects.visible().in_threads(roots).filter(
+            depth__gt=0
+        ).select_related('author')
+        by_thread = {root.pk: root for root in roots}
+        threads = {}
+        for reply in replies:
+            threads.setdefault(reply.thread_id, []).append(reply)
+        for thread_id, comments in threads.items():
+            build_comment_tree(comments, root=by_thread[thread_id])
+    
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """Page à plat d'un fil à partir de ce commentaire, dans l'ordre de l'arbre"""
+        comment = self.get_object()
+        queryset = FormationComment.objects.visible().filter(
+            path__startswith=comment.path
+        ).select_related('author').order_by('path')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = FormationThreadCommentSerializer(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        serializer = FormationThreadCommentSerializer(queryset, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
     
     def perform_create(self, serializer):
         """Crée un commentaire avec l'auteur actuel"""
+        # Les compteurs de l'article et du fil sont tenus à jour par le modèle
         serializer.save(author=self.request.user)
-        
-        # Mettre à jour le compteur de commentaires de l'article
-        article = serializer.instance.article
-        article.update_comments_count()
     
     @action(detail=True, methods=['post'])
     def reply(self, request, pk=None):
@@ -284,15 +431,12 @@ class FormationCommentViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Contenu requis'}, status=status.HTTP_400_BAD_REQUEST)
         
         reply = FormationComment.objects.create(
-            article=parent_comment.article,
+            article_id=parent_comment.article_id,
             author=request.user,
             parent=parent_comment,
             content=content
         )
         
-        # Mettre à jour le compteur de commentaires de l'article
-        parent_comment.article.update_comments_count()
-        
         serializer = self.get_serializer(reply)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -309,70 +453,84 @@ class FormationProgressViewSet(viewsets.ModelViewSet):
         ).select_related('article', 'article__author', 'article__category')
     
     @action(detail=False, methods=['post'])
-    def update_progress(self, request):
+    def update_progress(self, request, slug=None):
         """Met à jour la progression de lecture d'un article"""
-        article_id = request.data.get('article_id')
-        progress_percentage = request.data.get('progress_percentage', 0)
-        reading_time = request.data.get('reading_time', 0)
-        
-        if not article_id:
+        data = request.data.copy()
+        if slug is not None:
+            article = FormationArticle.objects.filter(slug=slug, status='published').only('pk').first()
+            if article is None:
+                return Response({'error': 'Article non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+            data['article_id'] = article.pk
+        elif not data.get('article_id'):
             return Response({'error': 'article_id requis'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            article = FormationArticle.objects.get(id=article_id, status='published')
-        except FormationArticle.DoesNotExist:
+        ping = FormationProgressPingSerializer(data=data)
+        ping.is_valid(raise_exception=True)
+        article_id = ping.validated_data['article_id']
+        if not FormationArticle.objects.filter(id=article_id, status='published').exists():
             return Response({'error': 'Article non trouvé'}, status=status.HTTP_404_NOT_FOUND)
         
-        progress, created = FormationProgress.objects.get_or_create(
-            user=request.user,
-            article=article,
-            defaults={
-                'progress_percentage': progress_percentage,
-                'total_reading_time': reading_time,
-                'is_started': True
-            }
-        )
-        
-        if not created:
-            progress.progress_percentage = progress_percentage
-            progress.total_reading_time += reading_time
-            progress.save()
-        
-        # Mettre à jour les métadonnées
-        progress.update_progress(progress_percentage)
-        
+        FormationProgress.objects.record_heartbeats(request.user, [ping.validated_data])
+        progress = self.get_queryset().get(article_id=article_id)
         serializer = self.get_serializer(progress)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'])
+    def heartbeat(self, request):
+        """
+        Enregistre un lot de pings de lecture ({"updates": [{article_id,
+        progress_percentage, reading_time}, ...]}) en une seule écriture
+        """
+        serializer = FormationProgressHeartbeatSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updates = serializer.validated_data['updates']
+        
+        # Seuls les articles publiés sont suivis
+        article_ids = {update['article_id'] for update in updates}
+        published = set(FormationArticle.objects.filter(
+            id__in=article_ids, status='published'
+        ).values_list('id', flat=True))
+        recorded = FormationProgress.objects.record_heartbeats(
+            request.user, [update for update in updates if update['article_id'] in published]
+        )
+        return Response({
+            'recorded': recorded,
+            'ignored_article_ids': sorted(article_ids - published)
+        })
+    
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Retourne le tableau de bord de progression de l'utilisateur"""
         progress_list = self.get_queryset()
         
-        total_articles_started = progress_list.filter(is_started=True).count()
-        total_articles_completed = progress_list.filter(is_completed=True).count()
-        total_reading_time = sum(progress.total_reading_time for progress in progress_list)
+        # Une seule agrégation conditionnelle pour les totaux et les niveaux
+        aggregates = {
+            'started': Count('pk', filter=Q(is_started=True)),
+            'completed': Count('pk', filter=Q(is_completed=True)),
+            'reading_time': Coalesce(Sum('total_reading_time'), 0),
+        }
+        for level_code, _ in FormationArticle.LEVEL_CHOICES:
+            aggregates[f'{level_code}_count'] = Count('pk', filter=Q(article__level=level_code))
+            aggregates[f'{level_code}_average'] = Avg('progress_percentage', filter=Q(article__level=level_code))
+        stats = progress_list.order_by().aggregate(**aggregates)
+        total_reading_time = stats['reading_time']
         
         # Articles récemment lus
         recently_read = progress_list.order_by('-last_read_at')[:5]
         
         # Progression par niveau
         progress_by_level = {}
-        for level_choice in FormationArticle.LEVEL_CHOICES:
-            level_code = level_choice[0]
-            level_name = level_choice[1]
-            level_progress = progress_list.filter(article__level=level_code)
-            if level_progress.exists():
-                avg_progress = sum(p.progress_percentage for p in level_progress) / level_progress.count()
+        for level_code, level_name in FormationArticle.LEVEL_CHOICES:
+            if stats[f'{level_code}_count']:
                 progress_by_level[level_code] = {
                     'name': level_name,
-                    'average_progress': round(avg_progress, 1),
-                    'articles_count': level_progress.count()
+                    'average_progress': round(stats[f'{level_code}_average'], 1),
+                    'articles_count': stats[f'{level_code}_count']
                 }
         
         return Response({
-            'total_articles_started': total_articles_started,
-            'total_articles_completed': total_articles_completed,
+            'total_articles_started': stats['started'],
+            'total_articles_completed': stats['completed'],
             'total_reading_time_seconds': total_reading_time,
             'total_reading_time_formatted': f"{total_reading_time // 60}m {total_reading_time % 60}s",
             'recently_read': FormationProgressSerializer(recently_read, many=True, context={'request': request}).data,
@@ -402,17 +560,11 @@ class FormationSearchViewSet(viewsets.ViewSet):
         
         # Construire la requête de base
         queryset = FormationArticle.objects.filter(status='published').select_related(
-            'author', 'category'
-        ).prefetch_related('formationfavorite_set', 'formationprogress_set', 'media_files')
-        
-        # Filtres
-        if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(content__icontains=query) |
-                Q(excerpt__icontains=query) |
-                Q(category__name__icontains=query)
-            )
+            'author', 'category', 'category__parent'
+        ).defer('content')
+        
+        # Filtres (la requête passe par l'index plein texte)
+        queryset, terms = search_articles(queryset, query)
         
         if category:
             queryset = queryset.filter(category__slug=category)
@@ -433,12 +585,9 @@ class FormationSearchViewSet(viewsets.ViewSet):
         elif sort_by == 'reading_time':
             queryset = queryset.order_by('reading_time', '-published_at')
         else:  # relevance
-            # Tri par pertinence (nombre de correspondances dans le titre)
-            if query:
-                queryset = queryset.extra(
-                    select={'relevance': "CASE WHEN title ILIKE %s THEN 3 WHEN content ILIKE %s THEN 2 ELSE 1 END"},
-                    select_params=[f'%{query}%', f'%{query}%']
-                ).order_by('-relevance', '-views_count')
+            # Score BM25 de l'index (plus petit = plus pertinent)
+            if terms:
+                queryset = queryset.order_by('relevance', '-views_count')
             else:
                 queryset = queryset.order_by('-views_count')
         
@@ -449,21 +598,14 @@ class FormationSearchViewSet(viewsets.ViewSet):
         except:
             articles_page = paginator.page(1)
         
-        # Log de la recherche
+        # Log de la recherche (mis en file, écrit par lots hors requête)
         if request.user.is_authenticated:
-            FormationSearchLog.objects.create(
-                user=request.user,
-                query=query,
-                results_count=paginator.count,
-                filters_applied={
-                    'category': category,
-                    'level': level,
-                    'author': author,
-                    'sort_by': sort_by
-                },
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
-            )
+            log_search(request, query, paginator.count, {
+                'category': category,
+                'level': level,
+                'author': author,
+                'sort_by': sort_by
+            })
         
         # Préparer la réponse
         articles_serializer = FormationArticleListSerializer(
@@ -471,9 +613,18 @@ class FormationSearchViewSet(viewsets.ViewSet):
             many=True, 
             context={'request': request}
         )
+        articles_data = articles_serializer.data
+        
+        # Pertinence et extrait surligné, calculés sur la page courante uniquement
+        if terms:
+            for article, article_data in zip(articles_page.object_list, articles_data):
+                article_data['relevance'] = getattr(article, 'relevance', None)
+                article_data['snippet'] = highlight(
+                    article.plain_text or article.excerpt, terms, prefix=terms[-1]
+                )
         
         result_serializer = FormationSearchResultSerializer({
-            'articles': articles_serializer.data,
+            'articles': articles_data,
             'total_count': paginator.count,
             'page': page,
             'page_size': page_size,
@@ -12,7 +12,7 @@ class ArticleAdmin(admin.ModelAdmin):
         'category', 'difficulty', 'is_published', 'is_featured', 'published_date', 'created_at'
     ]
     search_fields = ['title', 'content', 'excerpt', 'author_name', 'tags']
-    readonly_fields = ['created_at', 'updated_at', 'views_count', 'slug']
+    readonly_fields = ['created_at', 'updated_at', 'views_count', 'slug', 'reading_time', 'word_count']
     list_editable = ['is_published', 'is_featured']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'published_date'
@@ -31,7 +31,7 @@ class ArticleAdmin(admin.ModelAdmin):
             'fields': ('tags', 'related_articles', 'resources', 'bibliography')
         }),
         ('Métadonnées', {
-            'fields': ('reading_time', 'views_count', 'created_at', 'updated_at'),
+            'fields': ('reading_time', 'word_count', 'views_count', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         })
     )
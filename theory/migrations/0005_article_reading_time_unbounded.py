@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theory", "0004_content_tags"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="article",
+            name="reading_time",
+            field=models.PositiveIntegerField(
+                default=5, verbose_name="Temps de lecture (minutes)"
+            ),
+        ),
+    ]
@@ -3,6 +3,9 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
+from core.counters import view_counter
+from core.models import DerivedContentModel, TagLinkModel
+from core.tags import TagIndex
 
 User = get_user_model()
 
@@ -145,10 +148,20 @@ class TheoryCourse(models.Model):
         super().save(*args, **kwargs)
     
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        view_counter.increment(self)
 
-class TheoryLesson(models.Model):
+class TheoryCourseTag(TagLinkModel):
+    """Lien entre un cours théorique et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(TheoryCourse, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Cours théorique'))
+    tag_index = TagIndex('theory_course')
+
+    class Meta:
+        verbose_name = _("Tag de cours théorique")
+        verbose_name_plural = _("Tags de cours théoriques")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
+
+class TheoryLesson(DerivedContentModel):
     """Leçon individuelle dans un cours de théorie"""
     title = models.CharField(max_length=200, verbose_name=_('Titre'))
     slug = models.SlugField(max_length=200, blank=True, verbose_name=_('Slug'))
@@ -172,6 +185,7 @@ class TheoryLesson(models.Model):
     images = models.JSONField(default=list, blank=True, verbose_name=_('Images'))
     
     # Métadonnées
+    reading_time = models.PositiveIntegerField(default=1, verbose_name=_('Temps de lecture (minutes)'))
     duration_minutes = models.PositiveIntegerField(
         default=15,
         validators=[MinValueValidator(1), MaxValueValidator(120)],
@@ -303,7 +317,7 @@ class TheoryProgress(models.Model):
                 self.completed_at = timezone.now()
             self.save()
 
-class Article(models.Model):
+class Article(DerivedContentModel):
     """Modèle pour les articles de théorie de la bachata"""
     CATEGORY_CHOICES = [
         ('technique', 'Technique'),
@@ -375,10 +389,9 @@ class Article(models.Model):
     resources = models.JSONField(default=list, blank=True, verbose_name=_('Ressources'))
     bibliography = models.TextField(blank=True, verbose_name=_('Bibliographie'))
     
-    # Métadonnées
+    # Métadonnées (temps de lecture calculé à l'enregistrement, voir DerivedContentModel)
     reading_time = models.PositiveIntegerField(
         default=5,
-        validators=[MinValueValidator(1), MaxValueValidator(120)],
         verbose_name=_('Temps de lecture (minutes)')
     )
     views_count = models.PositiveIntegerField(default=0, verbose_name=_('Nombre de vues'))
@@ -420,8 +433,7 @@ class Article(models.Model):
         super().save(*args, **kwargs)
     
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        view_counter.increment(self)
     
     def get_reading_time_display(self):
         if self.reading_time < 60:
@@ -435,3 +447,13 @@ class Article(models.Model):
                 return f"{hours}h{minutes}"
 
 
+class ArticleTag(TagLinkModel):
+    """Lien entre un article et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Article'))
+    tag_index = TagIndex('article')
+
+    class Meta:
+        verbose_name = _("Tag d'article")
+        verbose_name_plural = _("Tags d'articles")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Article, TheoryCourse, TheoryLesson
 from django.contrib.auth import get_user_model
+from core.counters import view_counter
+from core.serializers import BufferedCountField
 
 User = get_user_model()
 
@@ -13,19 +15,24 @@ class UserSerializer(serializers.ModelSerializer):
 class ArticleSerializer(serializers.ModelSerializer):
     """Sérialiseur pour les articles théoriques"""
     author = UserSerializer(read_only=True)
+    summary = serializers.CharField(source='get_excerpt', read_only=True)
+    views_count = BufferedCountField(view_counter)
     
     class Meta:
         model = Article
         fields = [
             'id', 'title', 'slug', 'content', 'summary', 'category',
             'difficulty', 'author', 'is_published', 'is_featured',
-            'main_image', 'gallery', 'tags', 'views_count', 'rating',
+            'main_image', 'gallery', 'tags', 'reading_time', 'word_count',
+            'table_of_contents', 'views_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'slug', 'author', 'views_count', 'rating',
+            'id', 'slug', 'author', 'reading_time', 'views_count',
             'created_at', 'updated_at'
         ]
+        # Colonnes lues par les champs calculés (champs à la demande)
+        sparse_requires = {'summary': ('excerpt', 'generated_excerpt')}
     
     def create(self, validated_data):
         # Assigner l'utilisateur connecté comme auteur
@@ -35,14 +42,17 @@ class ArticleSerializer(serializers.ModelSerializer):
 class ArticleListSerializer(serializers.ModelSerializer):
     """Sérialiseur simplifié pour la liste des articles"""
     author_name = serializers.CharField(source='author.get_full_name', read_only=True)
+    summary = serializers.CharField(source='get_excerpt', read_only=True)
+    views_count = BufferedCountField(view_counter)
     
     class Meta:
         model = Article
         fields = [
             'id', 'title', 'slug', 'summary', 'category', 'difficulty',
-            'author_name', 'main_image', 'tags', 'views_count', 'rating',
+            'author_name', 'main_image', 'tags', 'reading_time', 'views_count',
             'created_at'
         ]
+        sparse_requires = {'summary': ('excerpt', 'generated_excerpt')}
 
 class TheoryCourseSerializer(serializers.ModelSerializer):
     """Sérialiseur pour les cours théoriques"""
@@ -73,9 +83,10 @@ class TheoryLessonSerializer(serializers.ModelSerializer):
         model = TheoryLesson
         fields = [
             'id', 'title', 'slug', 'content', 'course',
-            'order', 'is_required', 'duration_minutes',
+            'order', 'is_required', 'duration_minutes', 'reading_time',
+            'word_count', 'table_of_contents',
             'images', 'video_url', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'slug', 'created_at', 'updated_at'
+            'id', 'slug', 'reading_time', 'created_at', 'updated_at'
         ]
@@ -0,0 +1,26 @@
+"""
+Signaux de l'application theory (maintien de l'index de similarité)
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Article
+from .similarity import SIMILARITY_FIELDS, article_similarity
+
+
+@receiver(post_save, sender=Article)
+def update_article_similarity(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Recalcule le vecteur de similarité d'un article modifié"""
+    if raw:
+        return
+    if update_fields is not None and not SIMILARITY_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(lambda: article_similarity.update([instance]))
+
+
+@receiver(post_delete, sender=Article)
+def remove_article_similarity(sender, instance, **kwargs):
+    """Retire un article supprimé de l'index de similarité"""
+    article_id = instance.pk
+    transaction.on_commit(lambda: article_similarity.remove([article_id]))
@@ -0,0 +1,29 @@
+"""
+Index de similarité des articles théoriques (voir core/similarity.py).
+"""
+from core.similarity import SimilarityIndex, text_terms
+from core.text import fold_accents
+
+# Champs dont la modification change le vecteur d'un article
+SIMILARITY_FIELDS = {'title', 'excerpt', 'content', 'category', 'difficulty', 'tags', 'is_published'}
+
+
+def article_terms(article):
+    """Termes pondérés d'un article : titre, extrait, texte, catégorie, niveau et tags"""
+    terms = text_terms(article.title, 3.0)
+    terms.update(text_terms(article.excerpt, 2.0))
+    terms.update(text_terms(article.plain_text))
+    terms[f'category:{article.category}'] += 2.0
+    terms[f'level:{article.difficulty}'] += 2.0
+    for tag in article.tags or []:
+        if isinstance(tag, str) and tag.strip():
+            terms[f'tag:{fold_accents(tag.strip())}'] += 2.0
+    return terms
+
+
+article_similarity = SimilarityIndex(
+    'theory.article',
+    'theory.Article',
+    terms=article_terms,
+    is_indexed=lambda article: article.is_published,
+)
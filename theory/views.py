@@ -5,21 +5,29 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
-from .models import Article, TheoryCourse, TheoryLesson
-from .serializers import ArticleSerializer, TheoryCourseSerializer, TheoryLessonSerializer
+from .models import Article, ArticleTag, TheoryCourse, TheoryLesson
+from .serializers import ArticleSerializer, ArticleListSerializer, TheoryCourseSerializer, TheoryLessonSerializer
+from .similarity import article_similarity
+from core.conditional import ConditionalMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import TagFilterBackend
+from core.similarity import SIMILAR_LIMIT
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les articles théoriques
     """
     queryset = Article.objects.filter(is_published=True)
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, TagFilterBackend]
     filterset_fields = ['category', 'difficulty', 'is_featured']
     search_fields = ['title', 'content', 'summary', 'tags']
     ordering_fields = ['created_at', 'updated_at', 'views_count', 'rating']
     ordering = ['-created_at']
+    conditional_models = ('theory.Article', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'featured', 'search')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = Article.objects.filter(is_published=True)
@@ -34,12 +42,6 @@ class ArticleViewSet(viewsets.ModelViewSet):
         if difficulty:
             queryset = queryset.filter(difficulty=difficulty)
         
-        # Filtrage par tags
-        tags = self.request.query_params.get('tags', None)
-        if tags:
-            tag_list = [tag.strip() for tag in tags.split(',')]
-            queryset = queryset.filter(tags__contains=tag_list)
-        
         return queryset
     
     @action(detail=False, methods=['get'])
@@ -52,6 +54,21 @@ class ArticleViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(featured_articles, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Retourne les articles au contenu le plus proche (vecteurs TF-IDF précalculés)"""
+        article = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', SIMILAR_LIMIT)), 1), 20)
+        except ValueError:
+            limit = SIMILAR_LIMIT
+        queryset = Article.objects.filter(is_published=True).select_related('author').defer('content', 'plain_text')
+        articles = article_similarity.similar_objects(article, queryset, limit)
+        data = ArticleListSerializer(articles, many=True, context=self.get_serializer_context()).data
+        for item, similar_article in zip(data, articles):
+            item['similarity'] = similar_article.similarity
+        return Response(data)
+    
     @action(detail=False, methods=['get'])
     def search(self, request):
         """Recherche avancée d'articles"""
@@ -63,7 +80,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
             models.Q(title__icontains=query) |
             models.Q(content__icontains=query) |
             models.Q(summary__icontains=query) |
-            models.Q(tags__contains=[query])
+            ArticleTag.tag_index.search_q(query)
         )
         
         serializer = self.get_serializer(articles, many=True)
@@ -73,18 +90,17 @@ class ArticleViewSet(viewsets.ModelViewSet):
     def increment_views(self, request, pk=None):
         """Incrémente le compteur de vues d'un article"""
         article = self.get_object()
-        article.views_count += 1
-        article.save()
+        article.increment_views()
         return Response({'status': 'Vues incrémentées'})
 
-class TheoryCourseViewSet(viewsets.ModelViewSet):
+class TheoryCourseViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les cours théoriques
     """
     queryset = TheoryCourse.objects.filter(status='published')
     serializer_class = TheoryCourseSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, TagFilterBackend]
     filterset_fields = ['difficulty', 'is_featured']
     search_fields = ['title', 'description', 'tags']
     ordering_fields = ['created_at', 'estimated_duration', 'rating']
@@ -98,7 +114,7 @@ class TheoryCourseViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(featured_courses, many=True)
         return Response(serializer.data)
 
-class TheoryLessonViewSet(viewsets.ModelViewSet):
+class TheoryLessonViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les leçons théoriques
     """
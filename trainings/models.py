@@ -3,11 +3,16 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from core.capacity import SeatCapacity
+from core.models import AtomicCountersModel, GeoLocatedModel, SeatHoldingModel, TagLinkModel
+from core.tags import TagIndex
 
 User = get_user_model()
 
-class Training(models.Model):
+class Training(GeoLocatedModel, AtomicCountersModel):
     """Modèle pour les trainings entre adhérents"""
+    # Compteur tenu par les réservations atomiques (voir core/capacity.py)
+    atomic_fields = ('current_participants',)
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('pending', 'En attente de validation'),
@@ -173,8 +178,21 @@ class Training(models.Model):
     def can_start(self):
         return self.current_participants >= self.min_participants
 
-class TrainingEnrollment(models.Model):
+class TrainingTag(TagLinkModel):
+    """Lien entre un training et un tag normalisé (index des tags)"""
+    content = models.ForeignKey(Training, on_delete=models.CASCADE, related_name='tag_links', verbose_name=_('Training'))
+    tag_index = TagIndex('training')
+
+    class Meta:
+        verbose_name = _("Tag de training")
+        verbose_name_plural = _("Tags de trainings")
+        unique_together = ['content', 'tag']
+        indexes = [models.Index(fields=['tag', 'content'])]
+
+class TrainingEnrollment(SeatHoldingModel):
     """Inscription à un training"""
+    seat_capacity = SeatCapacity('training')
+    
     STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('confirmed', 'Confirmé'),
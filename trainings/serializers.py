@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Training
 from django.contrib.auth import get_user_model
+from core.serializers import DistanceField
 
 User = get_user_model()
 
@@ -17,6 +18,7 @@ class TrainingSerializer(serializers.ModelSerializer):
     
     # Champs calculés
     duration_display = serializers.ReadOnlyField()
+    distance = DistanceField()
     
     class Meta:
         model = Training
@@ -25,7 +27,8 @@ class TrainingSerializer(serializers.ModelSerializer):
             'training_type', 'difficulty', 'status', 'creator', 'approved_by',
             'approved_at', 'start_date', 'end_date', 'duration_minutes',
             'schedule', 'location', 'address', 'city', 'postal_code',
-            'country', 'price', 'currency', 'is_free', 'max_participants',
+            'country', 'latitude', 'longitude', 'distance', 'price', 'currency',
+            'is_free', 'max_participants',
             'current_participants', 'main_image', 'gallery', 'video_url',
             'curriculum', 'prerequisites', 'materials_needed', 'objectives',
             'tags', 'duration_display', 'created_at', 'updated_at'
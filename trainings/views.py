@@ -5,21 +5,27 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
-from .models import Training
+from core.conditional import ConditionalMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.filters import NearbyFilterBackend, TagFilterBackend
+from .models import Training, TrainingTag
 from .serializers import TrainingSerializer
 
-class TrainingViewSet(viewsets.ModelViewSet):
+class TrainingViewSet(ConditionalMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les formations et entraînements
     """
     queryset = Training.objects.all()
     serializer_class = TrainingSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, NearbyFilterBackend, TagFilterBackend]
     filterset_fields = ['difficulty', 'city', 'status', 'is_free']
     search_fields = ['title', 'description', 'location', 'city']
     ordering_fields = ['start_date', 'price', 'duration_minutes', 'created_at']
     ordering = ['-start_date']
+    conditional_models = ('trainings.Training', 'trainings.TrainingEnrollment', 'accounts.User')
+    conditional_actions = ('list', 'retrieve', 'upcoming', 'featured', 'search', 'by_difficulty')
+    cache_control = {'featured': {'max_age': 60}}
     
     def get_queryset(self):
         queryset = Training.objects.filter(status='active')
@@ -79,8 +85,14 @@ class TrainingViewSet(viewsets.ModelViewSet):
             models.Q(description__icontains=query) |
             models.Q(location__icontains=query) |
             models.Q(city__icontains=query) |
-            models.Q(tags__contains=[query])
+            TrainingTag.tag_index.search_q(query)
         )
+        trainings = NearbyFilterBackend().filter_queryset(request, trainings, self)
+        
+        page = self.paginate_queryset(trainings)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(trainings, many=True)
         return Response(serializer.data)